@@ -12,8 +12,16 @@
 #		3. Injection adapter in monitor mode
 #
 #
-#		Example to inject via all interfaces that start with wl* or mon*:
-#		root@nms2:~/software# for iface in $(ls /sys/class/net/ | grep -e wl -e mon); do ./CaptureTestV0.py -i $iface -m 'ALL'; done
+#		Example to inject via all interfaces that start with wl* or mon*, in parallel from one process:
+#		root@nms2:~/software# ./CaptureTestV0.2.py -i 'wl*,mon*' -m 'ALL'
+#		Same, burst mode, recording every frame sent for correlate.py:
+#		root@nms2:~/software# ./CaptureTestV0.2.py -i 'wl*,mon*' -b -l run1.sendlog
+#		Each interface is watched while it injects (adapterhealth): a stalled, erroring or vanished adapter is
+#		paused and retried, then skipped for the rest of the run; -N turns this off
+#		Paced to keep 80% of the channel busy, each frame spaced by its own on-air time (see airtime):
+#		root@nms2:~/software# ./CaptureTestV0.2.py -i wlan1 -x 10 -p airtime -A 80
+#		Dry run, no radio or root needed: frames go to a pcapng file paced at 1000 frames/s (expected capture, see drysink)
+#		$ ./CaptureTestV0.2.py -i wlan1 -x 100 -R 1000 -D expected.pcapng -l expected.sendlog
 #		root@nms2:~/software# ./CaptureTestV0.py -m 'HT40' -i 
 #
 #		References
@@ -26,20 +34,48 @@
 #	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 
 
-import binascii
-from scapy.all import *
-print("scapy version in use: " + scapy.__version__)
+import time
+starttime = time.perf_counter()
 import argparse
+import json
+import adapterhealth
+import airtime
+import dot11catalog
+import drysink
+import framecache
+import frametag
+import pacing
+import multiinject
+import rawinject
+import sendlog
 
 
 #---------------------------------------------------------------------------------
 # Parse arguments
 #---------------------------------------------------------------------------------
 cliargs = argparse.ArgumentParser(description='Scapy test tool to inject 802.11 frames')
-cliargs.add_argument('-i', action='store', default="mon0", dest='iface', help='Injection interface - should be in monitor mode')
+cliargs.add_argument('-i', action='store', default="mon0", dest='iface', help='Injection interface(s) - should be in monitor mode; comma separated names and/or globs, e.g. \'wl*,mon*\' injects on all of them in parallel')
 cliargs.add_argument('-m', action='store', default="ALL", dest='modrequested', help='Modulation requested default: \'All\'')
 cliargs.add_argument('-d', action='store_true', default=False, dest='displaymods', help='Display modulations available')
+cliargs.add_argument('-c', action='store', default=framecache.cachedirdefault, dest='cachedir', help='Frame cache directory default: ' + framecache.cachedirdefault)
+cliargs.add_argument('-r', action='store_true', default=False, dest='rebuild', help='Rebuild frames and refresh the frame cache')
+cliargs.add_argument('-x', action='store', type=int, default=1, dest='repeat', help='Number of times to inject the frame set default: 1')
+cliargs.add_argument('-b', action='store_true', default=False, dest='burst', help='Burst mode: write frames back to back over one raw socket and report frames/s')
+cliargs.add_argument('-p', action='store', default=None, choices=pacing.schedules, dest='pacing', help='Paced mode over one raw socket with this schedule, reports achieved rate and jitter')
+cliargs.add_argument('-R', action='store', type=float, default=20.0, dest='rate', help='Paced mode target rate in frames/s default: 20')
+cliargs.add_argument('-A', action='store', type=float, default=None, dest='airtime', help='Set the paced / dry run rate from the airtime model to this %% of channel airtime (-p airtime default: {:g})'.format(airtime.targetdefault))
+cliargs.add_argument('-k', action='store', type=int, default=pacing.bucketdepthdefault, dest='bucketdepth', help='Paced mode token bucket depth in frames default: ' + str(pacing.bucketdepthdefault))
+cliargs.add_argument('-l', action='store', default=None, dest='sendlog', help='Write a send log (run id, sequence, Tx time of every frame sent) to this file, see correlate.py')
+cliargs.add_argument('-f', action='store', default=None, dest='frametypes', help='Only inject these frame types: comma separated type_subtype values, e.g. \'0x08,0x1b,0x28\' default: all')
+cliargs.add_argument('-J', action='store', default=None, dest='summary', help='Write a JSON summary of the run (run id, per interface result) to this file')
+cliargs.add_argument('-D', action='store', default=None, dest='dryrun', help='Dry run: write the frames to this pcapng file instead of injecting, timestamped by the -p schedule (default fixed) at -R or -A; {iface} in the name is replaced, else _iface is added for several interfaces')
+cliargs.add_argument('-N', action='store_true', default=False, dest='nohealth', help='No adapter health feedback (tx counters, send errors, kernel log; pause/back off/skip on a failing adapter)')
+cliargs.add_argument('-v', action='store_true', default=False, dest='verbose', help='Verbose: dump the RadioTap header of every modulation (imports Scapy)')
 clioptions=cliargs.parse_args()
+if not clioptions.rate > 0:
+	cliargs.error('-R must be above 0 frames/s')
+if clioptions.airtime is not None and not 0 < clioptions.airtime <= 100:
+	cliargs.error('-A must be above 0 and at most 100 %')
 
 
 #Read injection interface from CLI
@@ -47,48 +83,17 @@ print(clioptions)
 
 
 #Name various fields in the injected frames to match the interface used for identification
-SSID = clioptions.iface
+#	SSID and the Vendor Specific IE carry the injection interface, see dot11catalog
+#	Hardcoded source MAC: dot11catalog.srcmac
 
-#Hardcoded parameters to use throughout injection exercise
-srcmac = '01:23:45:67:89:ab'
-#srcmac = RandMAC()
 
+#Startup budget: time from script start until frames are ready to inject, with a warm frame cache
+#	Scapy is only imported when frames have to be built (cache miss), for -v, or for the sendp path
+startupbudget = 0.25
 
-#Add information element
-vsie = bytearray(b'\x00\x01\x02\x03 ')
-vsie.extend(clioptions.iface.encode("utf-8"))
 
-
-#Array of packets to inject
-packets = []
-
-#Setup functions to build the various 802.11 frame types
-#	Modulation is one of:
-#		1. abg		--> 24Mbs
-#		2. HTxSS20	HT/xSS/20MHz/SGI --> x=1/72.2, x=2/144.4, x=3/216.7 	
-#		3. HTxSS40	HT/xSS/40MHz/SGI --> x=1/150, x=2/300, x=3/450
-#		4. VHT8		2SS/SGI/MCS8 --> 780Mbps
-#		5. VHT9		2SS/SGI/MCS9 --> 867Mbps
-#		6. HE		TBD
-radiomodulation = {
-	'abg': RadioTap(present='Rate', Rate=24), 
-	'HT1SS20': RadioTap(present='MCS', knownMCS=7, MCS_index=7, MCS_bandwidth=0, guard_interval=1),
-	'HT1SS20LDPC': RadioTap(present='MCS', knownMCS=95, MCS_index=7, MCS_bandwidth=0, guard_interval=1, FEC_type=1),
-	'HT2SS20': RadioTap(present='MCS', knownMCS=7, MCS_index=15, MCS_bandwidth=0, guard_interval=1),
-	'HT3SS20': RadioTap(present='MCS', knownMCS=7, MCS_index=23, MCS_bandwidth=0, guard_interval=1),
-	'HT1SS40': RadioTap(present='MCS', knownMCS=7, MCS_index=7, MCS_bandwidth=1, guard_interval=1),
-	'HT2SS40': RadioTap(present='MCS', knownMCS=7, MCS_index=15, MCS_bandwidth=1, guard_interval=1),
-	'HT3SS40': RadioTap(present='MCS', knownMCS=7, MCS_index=23, MCS_bandwidth=1, guard_interval=1),
-	'HT2SS40LDPC': RadioTap(present='MCS', knownMCS=95, MCS_index=15, MCS_bandwidth=1, guard_interval=1, FEC_type=1),
-	'HT3SS40LDPC': RadioTap(present='MCS', knownMCS=95, MCS_index=23, MCS_bandwidth=1, guard_interval=1, FEC_type=1),
-	'VHT81SS': RadioTap(present='VHT', KnownVHT=69, PresentVHT=69, guard_interval=1, VHT_bandwidth=4, mcs_nss=b'\x81'),
-	'VHT91SS': RadioTap(present='VHT', KnownVHT=69, PresentVHT=69, guard_interval=1, VHT_bandwidth=4, mcs_nss=b'\x91'),
-	'VHT82SS': RadioTap(present='VHT', KnownVHT=69, PresentVHT=69, guard_interval=1, VHT_bandwidth=4, mcs_nss=b'\x82'),
-	'VHT92SS': RadioTap(present='VHT', KnownVHT=69, PresentVHT=69, guard_interval=1, VHT_bandwidth=4, mcs_nss=b'\x92'),
-	'VHT83SS': RadioTap(present='VHT', KnownVHT=69, PresentVHT=69, guard_interval=1, VHT_bandwidth=4, mcs_nss=b'\x83'),
-	'VHT93SS': RadioTap(present='VHT', KnownVHT=69, PresentVHT=69, guard_interval=1, VHT_bandwidth=4, mcs_nss=b'\x93'),
-	'HE': RadioTap(present='HE', he_data1=51196, he_data2=126, he_data3=10587, he_data4=0, he_data5=8338, he_data6=32514)
-}
+#RadioTap fields for the various modulations, see dot11catalog.radiomodulation
+radiomodulation = dot11catalog.radiomodulation
 
 
 #Frame types
@@ -167,878 +172,143 @@ if clioptions.displaymods:
 
 
 
-print("Available modulations are...")
-for key, value in radiomodulation.items():
-	print(key, ' : ', value.show())
-
 if clioptions.modrequested == 'ALL':  
-	radiomodulationtouse = radiomodulation.copy()
+	radiomodulationtouse = list(radiomodulation)
 else:
-	radiomodulationtouse = {k: v for k, v in  radiomodulation.items() if k == clioptions.modrequested}
+	radiomodulationtouse = [k for k in radiomodulation if k == clioptions.modrequested]
  
-print("Selected modulation(s) are...")
-for key, value in radiomodulationtouse.items():
-	print(key, ' : ', value.show())
+print("Selected modulation(s) are: " + ", ".join(radiomodulationtouse))
+if clioptions.verbose:
+	import scapy
+	print("scapy version in use: " + scapy.__version__)
+	print("Available modulations are...")
+	for key in radiomodulation:
+		print(key, ' : ', dot11catalog.radiotap(key).show())
 
 
 
 
 
 ########################################################################
-#	Funtions to create frames of various types
-#
-#	Type Management
-
-def dot11_assocreq_0_0(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=0, # Assoc Request
-			addr1=srcmac, 
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11AssoReq(cap='ESS+privacy', listen_interval=50)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_assocresp_0_1(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=1, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11AssoResp(cap='ESS+privacy', status=1, AID=1001)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_reassocreq_0_2(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=2, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11ReassoReq(cap='ESS+privacy', listen_interval=50, current_AP=srcmac)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_reassocresp_0_3(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=3, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11ReassoResp(cap='ESS+privacy', status=1, AID=1001)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_probereq_0_4(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=4, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11ProbeReq()
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_proberesp_0_5(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=5, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11ProbeResp(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-	
-#ToDo Layout Timing frame better
-def dot11_timingadv_0_6(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=6, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_beacon_0_8(modSelected):
-	"""dot11 Beacon type_subtype 0x08"""
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=8, # Management beacon frame
-			addr1='ff:ff:ff:ff:ff:ff', # Broadcast address
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_atim_0_9(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=9, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-
-def dot11_disassociation_0_10(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=10, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Disas(reason=4)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_authentication_0_11(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=11, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Auth(algo=0, seqnum=1, status=2)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-def dot11_deauthentication_0_12(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=12, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Deauth(reason=4)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the Action frames better
-def dot11_action_0_13(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=13, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the Action frames better
-def dot11_actionnoack_0_14(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=0, subtype=14, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-
-############################################
-#	Type Control
-
-
-#ToDo: layout the frame better
-def dot11_trigger_1_2(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=2, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_tack_1_3(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=3, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_beamreport_1_4(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=4, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_vhtndp_1_5(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=5, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_ctrlframeext_1_6(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=6, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_ctrlwrapper_1_7(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=7, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_blkackrqst_1_8(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=8, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_blkack_1_9(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=9, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_pspoll_1_10(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=10, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_rts_1_11(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=11, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-	
-#ToDo: layout the frame better
-def dot11_cts_1_12(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=12, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_ack_1_13(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=13, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Ack()
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 
-
-#ToDo: layout the frame better
-def dot11_cfend_1_14(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=14, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 	
-	
-
-#ToDo: layout the frame better
-def dot11_cfendack_1_15(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=1, subtype=15, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Beacon(cap='ESS+privacy')
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal)))	
-	return  dot11frame 		
-
-
-############################################
-#	Type Data
-
-#ToDo: layout the frame better
-def dot11_data_2_0(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=0, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 		
-
-#ToDo: layout the frame better
-def dot11_datacfack_2_1(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=1, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))	
-		/ LLC())
-	return  dot11frame 		
-
-#ToDo: layout the frame better
-def dot11_datacfpoll_2_2(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=2, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 		
-
-#ToDo: layout the frame better
-def dot11_datacfackpoll_2_3(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=3, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 		
-
-#ToDo: layout the frame better
-def dot11_null_2_4(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=4, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 	
-
-#ToDo: layout the frame better
-def dot11_cfack_2_5(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=5, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 	
-
-#ToDo: layout the frame better
-def dot11_cfpoll_2_6(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=6, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 	
-
-#ToDo: layout the frame better
-def dot11_cfackpoll_2_7(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=7, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 	
-	
-#ToDo: layout the frame better
-def dot11_qosdata_2_8(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=8, 
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 	
-	
-def dot11_qosdatacfack_2_9(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=9,
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 
-	
-def dot11_qosdatacfpoll_2_10(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=10,
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 
-	
-def dot11_qosdatacfackpoll_2_11(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=11,
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 	
-	
-def dot11_qosnull_2_12(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=12,
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 		
-
-#No 2_13
-
-def dot11_qoscfpoll_2_14(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=14,
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 			
-
-def dot11_qoscfackpoll_2_15(modSelected):
-	vsielocal = bytearray(b'\x00\x01\x02\x03 ')
-	vsielocal.extend(clioptions.iface.encode("utf-8"))
-	vsieadder='_' + modSelected
-	vsielocal.extend(vsieadder.encode("utf-8"))
-	#print("Select: " + modSelected) 
-	dot11frame = (radiomodulation.get(modSelected)
-		/ Dot11(type=2, subtype=15,
-			addr1=srcmac,
-			addr2=srcmac,
-			addr3=srcmac,
-			ID=43210)
-		/ Dot11Elt(ID='SSID', info=SSID, len=len(SSID))
-		/ Dot11Elt(ID='Vendor Specific', len=len(vsielocal), info=(vsielocal))
-		/ LLC())
-	return  dot11frame 	
-	
-
-#Create frames for each modulation
-for key, value in radiomodulationtouse.items():
-	#Management
-	packets.append(dot11_assocreq_0_0(key))
-	packets.append(dot11_assocresp_0_1(key))
-	packets.append(dot11_reassocreq_0_2(key))
-	packets.append(dot11_reassocresp_0_3(key))
-	packets.append(dot11_probereq_0_4(key))
-	packets.append(dot11_proberesp_0_5(key))
-	packets.append(dot11_timingadv_0_6(key))
-		#No 0_7
-	packets.append(dot11_beacon_0_8(key))
-	packets.append(dot11_atim_0_9(key))
-	packets.append(dot11_disassociation_0_10(key))
-	packets.append(dot11_authentication_0_11(key))
-	packets.append(dot11_deauthentication_0_12(key))
-	packets.append(dot11_action_0_13(key))	
-	packets.append(dot11_actionnoack_0_14(key))
-	#Control
-	packets.append(dot11_trigger_1_2(key))
-	packets.append(dot11_tack_1_3(key))
-	packets.append(dot11_beamreport_1_4(key))
-	packets.append(dot11_vhtndp_1_5(key))
-	packets.append(dot11_ctrlframeext_1_6(key))
-	packets.append(dot11_ctrlwrapper_1_7(key))
-	packets.append(dot11_blkackrqst_1_8(key))
-	packets.append(dot11_blkack_1_9(key))
-	packets.append(dot11_pspoll_1_10(key))
-	packets.append(dot11_rts_1_11(key))
-	packets.append(dot11_cts_1_12(key))
-	packets.append(dot11_ack_1_13(key))
-	packets.append(dot11_cfend_1_14(key))
-	packets.append(dot11_cfendack_1_15(key))
-	#Data
-	packets.append(dot11_data_2_0(key))
-	packets.append(dot11_datacfack_2_1(key))
-	packets.append(dot11_datacfpoll_2_2(key))
-	packets.append(dot11_datacfackpoll_2_3(key))
-	packets.append(dot11_null_2_4(key))
-	packets.append(dot11_cfack_2_5(key))
-	packets.append(dot11_cfpoll_2_6(key))
-	packets.append(dot11_cfackpoll_2_7(key))
-	packets.append(dot11_qosdata_2_8(key))
-	packets.append(dot11_qosdatacfack_2_9(key))
-	packets.append(dot11_qosdatacfpoll_2_10(key))
-	packets.append(dot11_qosdatacfackpoll_2_11(key))
-	packets.append(dot11_qosnull_2_12(key))
-		#No 2_13
-	packets.append(dot11_qoscfpoll_2_14(key))
-	packets.append(dot11_qoscfackpoll_2_15(key))
-
-
-# #print('Building beacon frame with modulation \'abg\':')
-# packets.append(dot11_beacon_0_8('abg'))
-
-# #print('Building beacon frame with modulation \'HT\':')
-# packets.append(dot11_beacon_0_8('HT'))
+#	Create frames for each modulation
+#		Frame layouts live in dot11catalog; the Dot11 part of each frame is built once
+#		and only the RadioTap header is swapped per modulation
+#		Raw frames are cached per interface/modulation, see framecache
+
+ifaces = multiinject.expandifaces(clioptions.iface)
+#Frame types to inject, as (type, subtype) keys of dot11catalog.dot11frames
+if clioptions.frametypes:
+	frametypes = {(int(ts, 16) >> 4, int(ts, 16) & 0xf) for ts in clioptions.frametypes.split(',') if ts.strip()}
+else:
+	frametypes = None
+print("Injection interface(s): " + ", ".join(ifaces))
 
-# #print('Building beacon frame with modulation \'HT40\':')
-# packets.append(dot11_beacon_0_8('HT40'))
+templates = {}
+framesbyiface = {}
+for iface in ifaces:
+	framesbyiface[iface], rebuilt = framecache.loadframes(iface, radiomodulationtouse, cachedir=clioptions.cachedir, rebuild=clioptions.rebuild, templates=templates)
+	if frametypes is not None:
+		framesbyiface[iface] = [frame for frame in framesbyiface[iface] if frame[1] in frametypes]
+	print(iface + ": frames built for modulation(s): " + str(rebuilt) + ", loaded from cache: " + str(len(radiomodulationtouse) - len(rebuilt)))
 
-# #print('Building beacon frame with modulation \'HT3SS\':')
-# packets.append(dot11_beacon_0_8('HT3SS'))
 
-# #print('Building beacon frame with modulation \'HT3SS40\':')
-# packets.append(dot11_beacon_0_8('HT3SS40'))
+#Per-frame tags (see frametag): one run id for the whole run, sequence numbers per interface
+runid = frametag.newrunid()
+print('Run id: 0x{:08x}'.format(runid))
 
-# #print('Building beacon frame with modulation \'VHT\':')
-# packets.append(dot11_beacon_0_8('VHT'))
+startuptime = time.perf_counter() - starttime
+print('Startup: {:.3f}s to frames ready (budget {:.3f}s{})'.format(startuptime, startupbudget, ', OVER BUDGET' if startuptime > startupbudget else ''))
 
-# #print('Building beacon frame with modulation \'HE\':')
-# packets.append(dot11_beacon_0_8('HE'))
+#Legacy sendp path needs Scapy's send machinery; burst and paced modes do not
+if not (clioptions.pacing or clioptions.burst or clioptions.dryrun):
+	from scapy.packet import Raw
+	from scapy.sendrecv import sendp
 
 
-#for i in range(0, len(packets)):
-#	print('Frame number: ' + str(i)) 
-#	packets[i].show()   
- 
-for x in range(1):
-	print('Injecting frame:')
-	sendp(packets, iface=clioptions.iface, inter=0.05, return_packets=True)
+########################################################################
+#	Inject, one worker per interface, all starting together (see multiinject)
+
+def pacedschedule(iface):
+	"""Deadlines and mean rate for iface: the -p schedule (default fixed) at -R, or at the rate of -A % airtime"""
+	schedule = clioptions.pacing or 'fixed'
+	if schedule != 'airtime' and clioptions.airtime is None:
+		return pacing.schedule(schedule, clioptions.rate, depth=clioptions.bucketdepth), clioptions.rate
+	target = airtime.targetdefault if clioptions.airtime is None else clioptions.airtime
+	durations = airtime.durations(framesbyiface[iface])
+	rate = airtime.rate(sum(durations) / len(durations), target) if durations else clioptions.rate
+	print(iface + ': airtime {:.1f}us per frame on average, {:g}% airtime --> {:.1f} frames/s'.format(sum(durations) / max(1, len(durations)), target, rate))
+	return pacing.schedule(schedule, rate, depth=clioptions.bucketdepth, durations=durations, target=target), rate
+
+
+def inject(iface, gate):
+	"""Inject the frame set on iface in the mode selected on the CLI; returns the run statistics"""
+	frames = [frame for modSelected, key, frame in framesbyiface[iface]]
+	tagger = frametag.FrameTagger(frames, runid, log=bool(clioptions.sendlog))
+	taggers[iface] = tagger
+	if clioptions.dryrun:
+		path = drysink.sinkpath(clioptions.dryrun, iface, ifaces)
+		print('Dry run: writing ' + str(len(frames)) + ' frames x' + str(clioptions.repeat) + ' of ' + iface + ' to ' + path)
+		deadlines, rate = pacedschedule(iface)
+		with drysink.PcapngSink(path, iface, deadlines, start=drystart) as sink:
+			gate.wait()
+			return sink.burst(frames, repeat=clioptions.repeat, tagger=tagger)
+	health = None if clioptions.nohealth else adapterhealth.AdapterMonitor(iface)
+	monitors[iface] = health
+	queuefulltimeout = None if clioptions.nohealth else adapterhealth.queuefulltimeout
+	try:
+		if clioptions.pacing:
+			deadlines, rate = pacedschedule(iface)
+			print('Paced injection (' + clioptions.pacing + ' at ' + '{:.1f}'.format(rate) + ' frames/s) of ' + str(len(frames)) + ' frames x' + str(clioptions.repeat) + ' on ' + iface)
+			with rawinject.RawInjector(iface, queuefulltimeout=queuefulltimeout) as injector:
+				gate.wait()
+				return pacing.run(frames, injector.send, deadlines, rate, repeat=clioptions.repeat, tagger=tagger, health=health)
+		if clioptions.burst:
+			print('Burst injecting ' + str(len(frames)) + ' frames x' + str(clioptions.repeat) + ' on ' + iface)
+			with rawinject.RawInjector(iface, queuefulltimeout=queuefulltimeout) as injector:
+				gate.wait()
+				return injector.burst(frames, repeat=clioptions.repeat, tagger=tagger, health=health)
+		gate.wait()
+		for x in range(clioptions.repeat):
+			#sendp only hands back control after the whole list, so health is checked per repeat
+			if health is not None and not health.check(x * len(frames), force=True):
+				break
+			print('Injecting frame:')
+			#sendp queues the whole list, so tag timestamps here are list build time, not send time
+			tagger.tagrange(0, len(frames))
+			packets = [Raw(load=bytes(buf)) for buf in tagger.buffers]
+			sendp(packets, iface=iface, inter=0.05, return_packets=True)
+		return None
+	finally:
+		if health is not None:
+			health.close()
+
+
+taggers = {}
+monitors = {}
+#Dry run interfaces share one virtual start time, as parallel injectors do
+drystart = time.time_ns()
+results = multiinject.injectall(ifaces, inject)
+for iface, result in results.items():
+	if isinstance(result, Exception):
+		print(iface + ': injection failed: ' + str(result))
+	elif result is not None:
+		print(iface + ': ' + str(result))
+	if monitors.get(iface) is not None:
+		health = monitors[iface].summary()
+		print(iface + ': adapter health ' + health['verdict'] + ', ' + str(len(health['events'])) + ' event(s), paused ' + '{:.1f}s'.format(health['paused']) +
+			('' if health['kernellog'] else ' (no kernel log access)'))
+if clioptions.sendlog:
+	sendlog.write(clioptions.sendlog, runid, {iface: (framesbyiface[iface], taggers[iface]) for iface in ifaces if iface in taggers})
+	print('Send log: ' + clioptions.sendlog)
+if clioptions.summary:
+	summary = {'runid': runid, 'modulations': radiomodulationtouse, 'repeat': clioptions.repeat,
+		'mode': 'dry run' if clioptions.dryrun else 'paced' if clioptions.pacing else 'burst' if clioptions.burst else 'sendp', 'interfaces': {}}
+	for iface, result in results.items():
+		if isinstance(result, Exception):
+			summary['interfaces'][iface] = {'error': str(result)}
+		else:
+			summary['interfaces'][iface] = {'frames': len(framesbyiface[iface]) * clioptions.repeat, 'result': result.summary() if result is not None else None}
+		if monitors.get(iface) is not None:
+			summary['interfaces'][iface]['health'] = monitors[iface].summary()
+	with open(clioptions.summary, 'w') as f:
+		json.dump(summary, f, indent=1)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+#
+#	Injection adapter health feedback
+#
+#	Adapters fail during injection without the injector noticing: sys1_mon0 stops after a part
+#	of the frames, sys2_wlan1's ath10k logs "failed to transmit frame: -524" while the socket
+#	keeps accepting frames, a wedged queue makes every send return ENOBUFS.  An AdapterMonitor
+#	watches one injection interface while frames go out, checked by the send loops of rawinject,
+#	pacing and CaptureTestV0.2.py between batches / frames (at most every checkinterval seconds):
+#		tx stall	frames handed to the socket but the interface tx_packets counter (see
+#				ifstats) has not moved for stall seconds
+#		send errors	socket send errors (incl. a queue that stays full, rawinject queuefulltimeout)
+#		kernel		new /dev/kmsg lines naming the interface, its phy or its bus device
+#		gone		interface counters no longer readable / interface removed
+#	On a problem the sender is paused for a back-off (doubling per consecutive problem) and then
+#	retries; after maxretries consecutive problems, or at once when the interface is gone, the rest
+#	of the cell is skipped.  Every problem and action is kept as an event for the run output.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import errno
+import os
+import re
+import time
+
+import ifstats
+import multiinject
+
+
+kmsgpath = '/dev/kmsg'
+checkinterval = 0.25
+stalldefault = 2.0
+#Frames handed to the socket without tx progress before a stall can be declared
+stallframes = 8
+backoffdefault = 0.5
+#Give up on a frame when the driver queue stays full this long (rawinject queuefulltimeout)
+queuefulltimeout = 1.0
+maxretriesdefault = 3
+#Kernel log lines containing one of these (lower case) count as adapter problems
+kernelwords = ('fail', 'error', 'timeout', 'timed out', 'crash', 'firmware', 'reset', 'stuck', 'disconnect', 'hang')
+kernellinesmax = 20
+
+OK = 'ok'
+SKIPPED = 'skipped'
+
+
+class KernelLog:
+	"""New kernel log records that mention one of names, read without blocking from /dev/kmsg"""
+
+	def __init__(self, names, path=kmsgpath):
+		self.names = [name for name in names if name]
+		#Whole names only: wlan1 must not match wlan10, phy1 not phy10, 1-1 not 1-1.2 ("wlan1: ..." still matches)
+		self.pattern = re.compile('|'.join(r'(?<![\w.:-])' + re.escape(name) + r'(?![\w-]|[.:]\w)' for name in self.names)) if self.names else None
+		self.pending = b''
+		try:
+			self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+			os.lseek(self.fd, 0, os.SEEK_END)
+		except OSError:
+			#Not root, or no /dev/kmsg (container): kernel log feedback is off
+			self.fd = None
+
+	def close(self):
+		if self.fd is not None:
+			os.close(self.fd)
+			self.fd = None
+
+	def read(self):
+		"""Messages logged since the last read that mention the adapter"""
+		if self.fd is None:
+			return []
+		data = self.pending
+		while True:
+			try:
+				chunk = os.read(self.fd, 8192)
+			except OSError as e:
+				if e.errno == errno.EPIPE:
+					#Records overwritten before we got to them; carry on with the next one
+					continue
+				break
+			if not chunk:
+				break
+			data += chunk
+		lines = data.split(b'\n')
+		self.pending = lines.pop()
+		messages = []
+		for line in lines:
+			#/dev/kmsg record: "priority,sequence,timestamp,flags;message"
+			message = line.split(b';', 1)[-1].decode('utf-8', 'replace')
+			if self.pattern is not None and self.pattern.search(message):
+				messages.append(message)
+		return messages
+
+
+def adapternames(iface, netdir=multiinject.netdir):
+	"""Names under which the kernel logs about an interface: itself, its phy, its bus device"""
+	names = [iface]
+	for link in ('phy80211', 'device'):
+		try:
+			names.append(os.path.basename(os.readlink(os.path.join(netdir, iface, link))))
+		except OSError:
+			pass
+	return names
+
+
+class AdapterMonitor:
+	"""Health of one injection interface, checked from its send loop (see the header)"""
+
+	def __init__(self, iface, stall=stalldefault, backoff=backoffdefault, maxretries=maxretriesdefault, netdir=multiinject.netdir, kmsg=kmsgpath):
+		self.iface = iface
+		self.stall = stall
+		self.backoff = backoff
+		self.maxretries = maxretries
+		self.netdir = netdir
+		self.sampler = ifstats.Sampler([iface], ('tx_packets', 'tx_errors', 'tx_dropped'), history=2, netdir=netdir)
+		self.kernellog = KernelLog(adapternames(iface, netdir), kmsg)
+		self.kernellogenabled = self.kernellog.fd is not None
+		self.events = []
+		self.kernellines = []
+		self.checks = 0
+		self.paused = 0.0
+		self.consecutive = 0
+		self.skipped = False
+		self.nextcheck = 0.0
+		self.lasterrors = 0
+		self.sampler.sample()
+		self.lasttx = self.sampler.latest()[iface]['tx_packets']
+		self.lastprogress = time.monotonic()
+		self.sentatprogress = 0
+
+	def close(self):
+		self.sampler.close()
+		self.kernellog.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def _event(self, now, event, action, detail, sent):
+		self.events.append({'time': time.time(), 'event': event, 'action': action, 'detail': detail, 'sent': sent})
+		print('{}: {} ({}) -> {}'.format(self.iface, event, detail, action))
+
+	def problems(self, sent, senderrors, now):
+		"""[(event, detail)] found since the last check; sent / senderrors are the sender's running totals"""
+		found = []
+		self.sampler.sample()
+		if not self.sampler.readable[0] or not os.path.exists(os.path.join(self.netdir, self.iface)):
+			return [('gone', 'interface counters unreadable')]
+		tx = self.sampler.latest()[self.iface]['tx_packets']
+		if tx != self.lasttx:
+			self.lasttx = tx
+			self.lastprogress = now
+			self.sentatprogress = sent
+		elif sent - self.sentatprogress >= stallframes and now - self.lastprogress >= self.stall:
+			found.append(('tx stall', '{} frames sent, tx_packets unchanged for {:.1f}s'.format(sent - self.sentatprogress, now - self.lastprogress)))
+		if senderrors > self.lasterrors:
+			found.append(('send errors', '{} new'.format(senderrors - self.lasterrors)))
+			self.lasterrors = senderrors
+		lines = [line for line in self.kernellog.read() if any(word in line.lower() for word in kernelwords)]
+		if lines:
+			if len(self.kernellines) < kernellinesmax:
+				self.kernellines += lines[:kernellinesmax - len(self.kernellines)]
+			found.append(('kernel', lines[-1][:200]))
+		return found
+
+	def check(self, sent, senderrors=0, force=False):
+		"""Called by the sender; False when the rest of the cell should be skipped
+
+		Returns at once unless checkinterval has passed (or force).  On a problem it pauses the
+		caller for the back-off before returning True to retry.
+		"""
+		now = time.monotonic()
+		if self.skipped:
+			return False
+		if now < self.nextcheck and not force:
+			return True
+		self.nextcheck = now + checkinterval
+		self.checks += 1
+		found = self.problems(sent, senderrors, now)
+		if not found:
+			if self.consecutive and self.lastprogress == now:
+				self._event(now, 'recovered', 'resume', 'tx_packets moving again', sent)
+				self.consecutive = 0
+			return True
+		self.consecutive += 1
+		gone = any(event == 'gone' for event, detail in found)
+		if gone or self.consecutive > self.maxretries:
+			for event, detail in found:
+				self._event(now, event, 'skip', detail, sent)
+			self.skipped = True
+			return False
+		pause = self.backoff * 2 ** (self.consecutive - 1)
+		for event, detail in found:
+			self._event(now, event, 'backoff {:.1f}s'.format(pause), detail, sent)
+		time.sleep(pause)
+		self.paused += pause
+		#Give the adapter a fresh stall window after the pause
+		self.lastprogress = time.monotonic()
+		self.sentatprogress = sent
+		self.nextcheck = self.lastprogress + checkinterval
+		return True
+
+	def summary(self):
+		"""Dict for the run output"""
+		return {'verdict': SKIPPED if self.skipped else OK if not self.events else 'recovered' if self.consecutive == 0 else 'degraded',
+			'skipped': self.skipped, 'checks': self.checks, 'paused': self.paused, 'events': self.events, 'kernel': self.kernellines,
+			'kernellog': self.kernellogenabled}
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+#
+#	Protoype: airtime.py [options]
+#
+#	On-air duration of every catalog frame under every modulation, and the frame rates that load
+#	the channel to a target share of airtime.  Per frame (802.11-2016 / 802.11ax TXTIME):
+#		channel access	DIFS (SIFS + 2 slots) + mean backoff (CWmin / 2 slots)
+#		PPDU		preamble / PLCP headers of the PHY (legacy OFDM/DSSS, HT mixed format, VHT,
+#				HE SU: training fields per spatial stream) + data symbols for
+#				SERVICE + PSDU (frame + FCS) + tail bits at the PHY rate
+#		response	SIFS + ACK at the legacy control rate when addr1 is an individual address
+#				(injected frames to the group srcmac and broadcast are not acknowledged)
+#	Rates come from modcheck.requested(), i.e. from the radiomodulation entries; BCC coding, 5 GHz
+#	timing (9 us slot, 16 us SIFS) and no HE packet extension are assumed.
+#
+#	The pacing 'airtime' schedule spaces frames by their own channel time divided by the target,
+#	so long frames at 24 Mbps and short VHT frames alike keep the channel at the target share and
+#	never queue up more than the radio can send (see CaptureTestV0.2.py -p airtime -A).
+#
+#		Example:
+#		./airtime.py					(all modulations, 90% target)
+#		./airtime.py -m VHT92SS -a 50 -v		(per frame type)
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+import math
+import struct
+
+import dot11catalog
+import framecache
+import modcheck
+import radiotap
+
+
+targetdefault = 90.0
+#5 GHz OFDM timing, us
+slot = 9
+sifs = 16
+difs = sifs + 2 * slot
+cwmin = 15
+#DSSS (1, 2, 5.5, 11 Mbps) timing, long preamble
+dsssrates = (1, 2, 5.5, 11)
+dsssslot = 20
+dssssifs = 10
+dssspreamble = 192
+#Legacy OFDM: L-STF + L-LTF + L-SIG, 4 us symbols
+legacypreamble = 20
+symbol = 4.0
+servicebits = 16
+tailbits = 6
+fcslen = 4
+#ACK frame at the control response rate
+acklen = 14
+ackrate = 24
+#Data subcarriers per bandwidth (MHz)
+htsubcarriers = {20: 52, 40: 108, 80: 234, 160: 468}
+hesubcarriers = {20: 234, 40: 468, 80: 980, 160: 1960}
+#Coded bits per subcarrier x coding rate, per MCS (modulation index; HT MCS modulo 8)
+mcsbits = (0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 4.5, 5.0, 6.0, 20 / 3, 7.5, 25 / 3)
+#HE: 12.8 us data symbols + GI (0.8, 1.6, 3.2 us), 2x HE-LTF (6.4 us + GI)
+hegi = (0.8, 1.6, 3.2)
+
+
+def longtrainingfields(nss):
+	"""Number of HT/VHT/HE long training fields for nss spatial streams"""
+	return nss if nss in (1, 2) else nss + nss % 2
+
+
+def phyparameters(modSelected):
+	"""PHY of a radiomodulation entry: modcheck.requested() with the defaults filled in"""
+	params = modcheck.requested(modSelected)
+	if params['bw'] < 0:
+		params['bw'] = 20
+	if params['gi'] < 0:
+		params['gi'] = 0
+	return params
+
+
+def txtime(length, params):
+	"""Duration in us of a PPDU carrying a PSDU of length bytes (incl. FCS)"""
+	phy = params['phy']
+	bits = servicebits + 8 * length + tailbits
+	if phy == radiotap.PHY_LEGACY:
+		rate = params['rate'] / 2
+		if rate in dsssrates:
+			return dssspreamble + math.ceil(8 * length / rate)
+		return legacypreamble + symbol * math.ceil(bits / (symbol * rate))
+	ndbps = mcsbits[params['mcs'] % 8 if phy == radiotap.PHY_HT else params['mcs']] * params['nss']
+	ltfs = longtrainingfields(params['nss'])
+	if phy == radiotap.PHY_HE:
+		gi = hegi[params['gi']] if params['gi'] < len(hegi) else hegi[-1]
+		#L-STF, L-LTF, L-SIG, RL-SIG, HE-SIG-A, HE-STF, HE-LTFs
+		preamble = 8 + 8 + 4 + 4 + 8 + 4 + ltfs * (6.4 + gi)
+		symbols = math.ceil(bits / (hesubcarriers[params['bw']] * ndbps))
+		return preamble + symbols * (12.8 + gi)
+	symbols = math.ceil(bits / (htsubcarriers[params['bw']] * ndbps))
+	if phy == radiotap.PHY_HT:
+		#L-STF, L-LTF, L-SIG, HT-SIG, HT-STF, HT-LTFs
+		preamble = 8 + 8 + 4 + 8 + 4 + 4 * ltfs
+	else:
+		#L-STF, L-LTF, L-SIG, VHT-SIG-A, VHT-STF, VHT-LTFs, VHT-SIG-B
+		preamble = 8 + 8 + 4 + 8 + 4 + 4 * ltfs + 4
+	if params['gi'] == 1:
+		#3.6 us short GI symbols, padded to the 4 us symbol boundary
+		return preamble + symbol * math.ceil(symbols * 3.6 / symbol)
+	return preamble + symbols * symbol
+
+
+def psdulength(frame):
+	"""802.11 frame + FCS bytes of an injected frame (RadioTap header stripped)"""
+	return len(frame) - struct.unpack_from('<H', frame, 2)[0] + fcslen
+
+
+def acknowledged(frame):
+	"""True when the receiver acknowledges the frame: management/data frame to an individual address"""
+	offset = struct.unpack_from('<H', frame, 2)[0]
+	frametype = (frame[offset] >> 2) & 0x3
+	return frametype in (0, 2) and len(frame) >= offset + 10 and not frame[offset + 4] & 0x01
+
+
+def channeltime(frame, params):
+	"""Channel time in us one injected frame takes: access, PPDU and ACK"""
+	dsss = params['phy'] == radiotap.PHY_LEGACY and params['rate'] / 2 in dsssrates
+	access = (dssssifs + 2 * dsssslot + cwmin / 2 * dsssslot) if dsss else (difs + cwmin / 2 * slot)
+	duration = access + txtime(psdulength(frame), params)
+	if acknowledged(frame):
+		duration += (dssssifs if dsss else sifs) + txtime(acklen, {'phy': radiotap.PHY_LEGACY, 'rate': ackrate * 2})
+	return duration
+
+
+def durations(frames):
+	"""Channel time in us of each (modulation, key, frame) of a dot11catalog.buildframes() list"""
+	params = {}
+	result = []
+	for modSelected, key, frame in frames:
+		if modSelected not in params:
+			params[modSelected] = phyparameters(modSelected)
+		result.append(channeltime(frame, params[modSelected]))
+	return result
+
+
+def rate(frameduration, target=targetdefault):
+	"""Frames/s that fill target % of the airtime with frames of mean channel time frameduration (us)"""
+	return target / 100.0 * 1e6 / frameduration if frameduration > 0 else 0.0
+
+
+def permodulation(frames, target=targetdefault):
+	"""{modulation: {'frames', 'mean', 'min', 'max' (us), 'maxrate', 'rate' (frames/s), 'mbps'}}"""
+	table = {}
+	for (modSelected, key, frame), duration in zip(frames, durations(frames)):
+		entry = table.setdefault(modSelected, {'frames': 0, 'total': 0.0, 'min': duration, 'max': duration, 'bytes': 0})
+		entry['frames'] += 1
+		entry['total'] += duration
+		entry['bytes'] += psdulength(frame)
+		entry['min'] = min(entry['min'], duration)
+		entry['max'] = max(entry['max'], duration)
+	for modSelected, entry in table.items():
+		entry['mean'] = entry.pop('total') / entry['frames']
+		entry['maxrate'] = rate(entry['mean'], 100.0)
+		entry['rate'] = rate(entry['mean'], target)
+		#Offered load at the target rate, 802.11 bytes incl. FCS
+		entry['mbps'] = entry['rate'] * entry.pop('bytes') / entry['frames'] * 8 / 1e6
+	return table
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='On-air duration of the catalog frames per modulation and the frame rates for a target airtime')
+	cliargs.add_argument('-i', action='store', default='wlan1', dest='iface', help='Injection interface the frames are built for (name length changes the IEs) default: wlan1')
+	cliargs.add_argument('-m', action='store', default='ALL', dest='modrequested', help='Modulation default: \'ALL\'')
+	cliargs.add_argument('-a', action='store', type=float, default=targetdefault, dest='target', help='Target airtime in %% default: {:g}'.format(targetdefault))
+	cliargs.add_argument('-c', action='store', default=framecache.cachedirdefault, dest='cachedir', help='Frame cache directory default: ' + framecache.cachedirdefault)
+	cliargs.add_argument('-v', action='store_true', default=False, dest='verbose', help='Channel time of every frame type')
+	cliargs.add_argument('-j', action='store_true', default=False, dest='json', help='JSON output')
+	clioptions = cliargs.parse_args()
+	if not 0 < clioptions.target <= 100:
+		cliargs.error('-a must be above 0 and at most 100 %')
+
+	modulations = list(dot11catalog.radiomodulation) if clioptions.modrequested == 'ALL' else [clioptions.modrequested]
+	frames, rebuilt = framecache.loadframes(clioptions.iface, modulations, cachedir=clioptions.cachedir)
+	table = permodulation(frames, clioptions.target)
+	if clioptions.json:
+		print(json.dumps(table, indent=1))
+	else:
+		print('{:12s} {:28s} {:>6s} {:>9s} {:>9s} {:>9s} {:>10s} {:>10s} {:>8s}'.format('Modulation', 'PHY', 'Frames', 'Min us', 'Mean us', 'Max us', 'Max fr/s', 'At {:g}%'.format(clioptions.target), 'Mbps'))
+		for modSelected, entry in table.items():
+			print('{:12s} {:28s} {:6d} {:9.1f} {:9.1f} {:9.1f} {:10.0f} {:10.0f} {:8.2f}'.format(modSelected, modcheck.label(phyparameters(modSelected)),
+				entry['frames'], entry['min'], entry['mean'], entry['max'], entry['maxrate'], entry['rate'], entry['mbps']))
+		if clioptions.verbose:
+			print('\n{:12s} {:>12s} {:>6s} {:>4s} {:>9s}'.format('Modulation', 'Type/Subtype', 'Bytes', 'Ack', 'us'))
+			for (modSelected, key, frame), duration in zip(frames, durations(frames)):
+				print('{:12s} {:>12s} {:6d} {:>4s} {:9.1f}'.format(modSelected, '0x{:02x}'.format(key[0] << 4 | key[1]), psdulength(frame),
+					'yes' if acknowledged(frame) else '', duration))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+#
+#	Incremental cache of per-capture pcapanalyze results
+#
+#	Each dataset directory keeps a .pcapanalyze.cache.json next to its captures, holding the
+#	analyze() result of every capture analyzed so far with the key it was computed under:
+#	file size, mtime, SHA-1 of the content, analyzer version and injection MAC.  A result is reused
+#	while size and mtime are unchanged; when only the mtime moved (copy, touch, rsync) the content
+#	hash decides, so identical captures are not parsed again.  New or changed captures are
+#	analyzed and added; pcapbatch merges cached and fresh per-file results alike.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import hashlib
+import json
+import os
+
+import pcapanalyze
+
+
+cachefilename = '.pcapanalyze.cache.json'
+hashchunk = 1 << 20
+
+
+def filehash(path):
+	"""SHA-1 of a file's content"""
+	digest = hashlib.sha1()
+	with open(path, 'rb') as f:
+		for chunk in iter(lambda: f.read(hashchunk), b''):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def filestamp(path):
+	"""Cache key of a capture as it is now: {'size', 'mtime_ns', 'sha1'}"""
+	st = os.stat(path)
+	return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha1': filehash(path)}
+
+
+def analyzestamped(path, addr=pcapanalyze.injectmac):
+	"""analyze() result of path and the stamp of the content it was computed from"""
+	stamp = filestamp(path)
+	return pcapanalyze.analyze(path, addr), stamp
+
+
+class AnalysisCache:
+	"""Cached analyze() results of the captures of one directory"""
+
+	def __init__(self, directory):
+		self.path = os.path.join(directory, cachefilename)
+		self.dirty = False
+		try:
+			with open(self.path) as f:
+				self.entries = json.load(f)
+		except (OSError, ValueError):
+			self.entries = {}
+
+	@staticmethod
+	def _key(path, addr):
+		return '{}@{}'.format(os.path.basename(path), addr.lower())
+
+	def lookup(self, path, addr=pcapanalyze.injectmac):
+		"""Cached result for path, or None when missing or stale"""
+		entry = self.entries.get(self._key(path, addr))
+		if entry is None or entry['version'] != pcapanalyze.analyzerversion:
+			return None
+		try:
+			st = os.stat(path)
+			if st.st_size != entry['size']:
+				return None
+			if st.st_mtime_ns != entry['mtime_ns']:
+				if filehash(path) != entry['sha1']:
+					return None
+				entry['mtime_ns'] = st.st_mtime_ns
+				self.dirty = True
+		except OSError:
+			return None
+		result = pcapanalyze.fromjson(entry['result'])
+		result['file'] = path
+		return result
+
+	def store(self, path, addr, result, stamp):
+		"""Record result of path, computed from content stamp (see analyzestamped)"""
+		entry = dict(stamp)
+		entry['version'] = pcapanalyze.analyzerversion
+		entry['result'] = pcapanalyze.tojson(result)
+		self.entries[self._key(path, addr)] = entry
+		self.dirty = True
+
+	def save(self):
+		"""Write back if anything changed; replaces atomically, failures only lose the cache"""
+		if not self.dirty:
+			return
+		tmppath = '{}.{}.tmp'.format(self.path, os.getpid())
+		try:
+			with open(tmppath, 'w') as f:
+				json.dump(self.entries, f)
+			os.replace(tmppath, self.path)
+			self.dirty = False
+		except OSError as e:
+			print('Analysis cache not written ({}): {}'.format(self.path, e))
+
+
+def cachesfor(files):
+	"""{directory: AnalysisCache} for the directories holding files"""
+	caches = {}
+	for path in files:
+		directory = os.path.dirname(os.path.abspath(path))
+		if directory not in caches:
+			caches[directory] = AnalysisCache(directory)
+	return caches
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+#
+#	Protoype: benchmark.py [options]
+#
+#	Repeatable benchmarks of the injection and analysis pipeline, no radios needed:
+#		catalog.import		Scapy import in a fresh interpreter (first frame build pays it)
+#		catalog.templates	dot11catalog.buildtemplates(), all frame types
+#		catalog.frames		dot11catalog.buildframes() for all modulations (731 frames)
+#		framecache.store/load	serialization of the built frames to / from the frame cache
+#		frametag.tagrange	stamping every frame with run id / sequence / Tx time
+#		rawinject.burst		raw socket send of the frame set to lo (or -i: a veth / dummy)
+#		drysink.burst		dry-run pcapng sink, frame set x10 (no radio, virtual timeline)
+#		pcapanalyze.analyze	one-pass rollup of each dataset capture (pcapfilter.sh replacement)
+#		pcapindex.build		columnar index (incl. bulk RadioTap decode) of each dataset capture
+#		modcheck.checkindex	requested vs observed modulation on the built index
+#	Each benchmark runs repeat times after one warm-up; best / median / mean wall time and the
+#	throughput (frames/s, MB/s) of the median run are reported and written as JSON (-o) with the
+#	versions and commit they were measured at.  -c compares against an earlier results file and
+#	flags benchmarks whose median got slower by more than the threshold (exit status 1).
+#
+#		Example:
+#		./benchmark.py -o bench-$(git rev-parse --short HEAD).json
+#		./benchmark.py -k pcap -c bench-1bb5654.json
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy
+
+import dot11catalog
+import drysink
+import framecache
+import frametag
+import modcheck
+import pcapanalyze
+import pcapindex
+import rawinject
+
+
+resultsversion = 1
+repeatsdefault = 5
+thresholddefault = 0.10
+codedir = os.path.dirname(os.path.abspath(__file__))
+datasetsdefault = [os.path.join(codedir, '..', 'DS1', 'sys1_wlan1.pcapng'), os.path.join(codedir, '..', 'DS2', 'sys1_wlan9.pcapng')]
+benchiface = 'wlan1'
+
+
+class Skip(Exception):
+	"""Benchmark cannot run here (missing module, no permission, no such interface)"""
+
+
+class Context:
+	"""Inputs shared by the benchmarks, built on first use"""
+
+	def __init__(self, iface, datasets):
+		self.iface = iface
+		self.datasets = datasets
+		self.workdir = tempfile.mkdtemp(prefix='benchmark.')
+		self._templates = None
+		self._frames = None
+		self._cleanups = []
+
+	def cleanup(self, function):
+		"""Call function once the current benchmark's timed runs are done"""
+		self._cleanups.append(function)
+
+	def release(self):
+		while self._cleanups:
+			self._cleanups.pop()()
+
+	def close(self):
+		self.release()
+		shutil.rmtree(self.workdir, ignore_errors=True)
+
+	def templates(self):
+		if self._templates is None:
+			try:
+				self._templates = dot11catalog.buildtemplates()
+			except ImportError as e:
+				raise Skip('Scapy not available: {}'.format(e))
+		return self._templates
+
+	def frames(self):
+		"""[(modulation, key, bytes)] of the full catalog"""
+		if self._frames is None:
+			self._frames = dot11catalog.buildframes(benchiface, list(dot11catalog.radiomodulation), templates=self.templates())
+		return self._frames
+
+
+def _work(frames):
+	return {'frames': len(frames), 'bytes': sum(len(frame) for frame in frames)}
+
+
+#Each benchmark takes the Context and returns the callable to time; the callable returns the work done
+
+def catalogimport(ctx):
+	command = [sys.executable, '-c', 'import scapy.layers.dot11']
+
+	def run():
+		if subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode != 0:
+			raise Skip('Scapy not available')
+		return {}
+	return run
+
+
+def catalogtemplates(ctx):
+	ctx.templates()
+
+	def run():
+		return {'frametypes': len(dot11catalog.buildtemplates())}
+	return run
+
+
+def catalogframes(ctx):
+	templates = ctx.templates()
+	modulations = list(dot11catalog.radiomodulation)
+
+	def run():
+		return _work([frame for modSelected, key, frame in dot11catalog.buildframes(benchiface, modulations, templates=templates)])
+	return run
+
+
+def _cachedframes(ctx):
+	bymodulation = {}
+	for modSelected, key, frame in ctx.frames():
+		bymodulation.setdefault(modSelected, []).append((key, frame))
+	return bymodulation
+
+
+def framecachestore(ctx):
+	bymodulation = _cachedframes(ctx)
+	cachedir = os.path.join(ctx.workdir, 'framecache')
+
+	def run():
+		for modSelected, frames in bymodulation.items():
+			framecache.store(cachedir, benchiface, modSelected, frames)
+		return _work([frame for modSelected, key, frame in ctx.frames()])
+	return run
+
+
+def framecacheload(ctx):
+	cachedir = os.path.join(ctx.workdir, 'framecache')
+	framecachestore(ctx)()
+
+	def run():
+		frames, rebuilt = framecache.loadframes(benchiface, list(dot11catalog.radiomodulation), cachedir=cachedir)
+		return _work([frame for modSelected, key, frame in frames])
+	return run
+
+
+def frametagrange(ctx):
+	tagger = frametag.FrameTagger([frame for modSelected, key, frame in ctx.frames()])
+
+	def run():
+		tagger.tagrange(0, len(tagger.buffers))
+		return _work(tagger.buffers)
+	return run
+
+
+def rawinjectburst(ctx):
+	frames = [frame for modSelected, key, frame in ctx.frames()]
+	try:
+		injector = rawinject.RawInjector(ctx.iface)
+	except OSError as e:
+		raise Skip('Raw socket on {}: {}'.format(ctx.iface, e))
+	ctx.cleanup(injector.close)
+	repeat = 10
+
+	def run():
+		stats = injector.burst(frames, repeat=repeat)
+		return {'frames': stats.frames, 'bytes': stats.bytes, 'errors': stats.errors}
+	return run
+
+
+def drysinkburst(ctx):
+	frames = [frame for modSelected, key, frame in ctx.frames()]
+	tagger = frametag.FrameTagger(frames)
+	path = os.path.join(ctx.workdir, 'drysink.pcapng')
+	repeat = 10
+
+	def run():
+		with drysink.sink(path, benchiface, rate=1000.0) as sink:
+			stats = sink.burst(frames, repeat=repeat, tagger=tagger)
+		return {'frames': stats.frames, 'bytes': stats.bytes}
+	return run
+
+
+def _capturebench(function):
+	def bench(ctx, path):
+		if not os.path.exists(path):
+			raise Skip('No such capture: {}'.format(path))
+		return function(path, os.path.getsize(path))
+	return bench
+
+
+@_capturebench
+def pcapanalyzeanalyze(path, size):
+	def run():
+		result = pcapanalyze.analyze(path)
+		return {'frames': result['packets'], 'bytes': size}
+	return run
+
+
+@_capturebench
+def pcapindexbuild(path, size):
+	def run():
+		index = pcapindex.build(path)
+		return {'frames': len(index['time']), 'bytes': size}
+	return run
+
+
+@_capturebench
+def modcheckcheckindex(path, size):
+	index = pcapindex.build(path)
+
+	def run():
+		modcheck.checkindex(index)
+		return {'frames': len(index['time'])}
+	return run
+
+
+benchmarks = [
+	('catalog.import', catalogimport),
+	('catalog.templates', catalogtemplates),
+	('catalog.frames', catalogframes),
+	('framecache.store', framecachestore),
+	('framecache.load', framecacheload),
+	('frametag.tagrange', frametagrange),
+	('rawinject.burst', rawinjectburst),
+	('drysink.burst', drysinkburst),
+]
+#Run once per dataset capture, named <benchmark>:<capture>
+capturebenchmarks = [
+	('pcapanalyze.analyze', pcapanalyzeanalyze),
+	('pcapindex.build', pcapindexbuild),
+	('modcheck.checkindex', modcheckcheckindex),
+]
+
+
+def timed(run, repeats):
+	"""Wall times of repeats runs after one warm-up, and the work reported by the last"""
+	work = run()
+	times = []
+	for x in range(repeats):
+		start = time.perf_counter()
+		work = run()
+		times.append(time.perf_counter() - start)
+	return times, work
+
+
+def runall(ctx, repeats=repeatsdefault, selected=None, show=print):
+	"""{'results': {name: figures}, 'skipped': {name: reason}}"""
+	jobs = [(name, lambda bench=bench: bench(ctx)) for name, bench in benchmarks]
+	for path in ctx.datasets:
+		label = os.path.splitext(os.path.basename(path))[0]
+		jobs += [('{}:{}'.format(name, label), lambda bench=bench, path=path: bench(ctx, path)) for name, bench in capturebenchmarks]
+	results = {}
+	skipped = {}
+	for name, setup in jobs:
+		if selected and not any(pattern in name for pattern in selected):
+			continue
+		try:
+			times, work = timed(setup(), repeats)
+		except Skip as e:
+			skipped[name] = str(e)
+			show('{:40s} skipped: {}'.format(name, e))
+			continue
+		finally:
+			ctx.release()
+		median = statistics.median(times)
+		rates = {}
+		if 'frames' in work and median > 0:
+			rates['frames/s'] = work['frames'] / median
+		if 'bytes' in work and median > 0:
+			rates['MB/s'] = work['bytes'] / median / 1e6
+		results[name] = {'best': min(times), 'median': median, 'mean': statistics.mean(times), 'runs': times, 'work': work, 'rates': rates}
+		show(formatresult(name, results[name]))
+	return {'results': results, 'skipped': skipped}
+
+
+def formatresult(name, result):
+	rates = '  '.join('{:.4g} {}'.format(value, unit) for unit, value in result['rates'].items())
+	return '{:40s} median {:10.3f} ms  best {:10.3f} ms  {}'.format(name, result['median'] * 1e3, result['best'] * 1e3, rates)
+
+
+def environment():
+	"""Versions and commit the results were measured at"""
+	try:
+		commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=codedir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode().strip()
+	except OSError:
+		commit = ''
+	try:
+		scapy = dot11catalog.scapyversion()
+	except ImportError:
+		scapy = None
+	return {'resultsversion': resultsversion, 'created': time.time(), 'host': platform.node(), 'platform': platform.platform(),
+		'python': platform.python_version(), 'numpy': numpy.__version__, 'scapy': scapy, 'commit': commit}
+
+
+def compare(baseline, current, threshold=thresholddefault):
+	"""[(name, baseline median, current median, change)] for benchmarks in both, and the names that regressed"""
+	rows = []
+	regressed = []
+	for name, result in current['results'].items():
+		before = baseline['results'].get(name)
+		if before is None:
+			continue
+		change = result['median'] / before['median'] - 1 if before['median'] > 0 else 0.0
+		rows.append((name, before['median'], result['median'], change))
+		if change > threshold:
+			regressed.append(name)
+	return rows, regressed
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Benchmark frame building, serialization, raw send and capture analysis (no radios needed)')
+	cliargs.add_argument('-n', action='store', type=int, default=repeatsdefault, dest='repeats', help='Timed runs per benchmark default: {}'.format(repeatsdefault))
+	cliargs.add_argument('-k', action='append', default=None, dest='selected', help='Only benchmarks whose name contains this (repeatable)')
+	cliargs.add_argument('-i', action='store', default='lo', dest='iface', help='Interface for rawinject.burst (lo, a veth or dummy) default: lo')
+	cliargs.add_argument('-d', action='append', default=None, dest='datasets', help='Capture for the analysis benchmarks (repeatable) default: the DS1/DS2 samples')
+	cliargs.add_argument('-o', action='store', default=None, dest='output', help='Write the results as JSON to this file')
+	cliargs.add_argument('-c', action='store', default=None, dest='baseline', help='Compare against an earlier results file')
+	cliargs.add_argument('-t', action='store', type=float, default=thresholddefault, dest='threshold', help='Regression threshold on the median default: {:g} (10%%)'.format(thresholddefault))
+	clioptions = cliargs.parse_args()
+
+	ctx = Context(clioptions.iface, clioptions.datasets or datasetsdefault)
+	try:
+		report = runall(ctx, clioptions.repeats, clioptions.selected)
+	finally:
+		ctx.close()
+	report.update(environment(), repeats=clioptions.repeats)
+	if clioptions.output:
+		with open(clioptions.output, 'w') as f:
+			json.dump(report, f, indent=1)
+		print('Results: ' + clioptions.output)
+	regressed = []
+	if clioptions.baseline:
+		with open(clioptions.baseline) as f:
+			baseline = json.load(f)
+		rows, regressed = compare(baseline, report, clioptions.threshold)
+		print('\nAgainst {} (commit {}):'.format(clioptions.baseline, baseline.get('commit', '?')))
+		for name, before, after, change in rows:
+			print('{:40s} {:10.3f} -> {:10.3f} ms  {:+7.1%}{}'.format(name, before * 1e3, after * 1e3, change, '  REGRESSION' if name in regressed else ''))
+	sys.exit(1 if regressed else 0)
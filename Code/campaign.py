@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+#
+#	Protoype: sudo campaign.py -C <checkpoint file> [matrix options]
+#
+#	Checkpointed campaign runner.  Replaces shell loops around CaptureTestV0.2.py ("5x on both
+#	bands per interface"): the interfaces x modulations x repetitions matrix, optionally limited to
+#	some frame types, is expanded into cells, one injection run of CaptureTestV0.2.py per cell
+#	(repetition-major, so the repetitions of a cell are spread over the campaign).
+#
+#	After every cell its outcome is written to the checkpoint file (JSON, replaced atomically).
+#	Running again with the same checkpoint resumes: finished cells are not repeated, failed or
+#	timed out cells are retried until they have had maxattempts attempts.  A cell that hangs (adapter
+#	wedged in the driver) is killed after the cell timeout; an interface whose cells fail
+#	repeatedly in a row is left alone for the rest of the run and its remaining cells stay pending
+#	for the next resume.
+#
+#		Example:
+#		sudo ./campaign.py -C DS3/5GHz.campaign.json -i 'wl*,mon*' -m ALL -n 5 -b
+#		sudo ./campaign.py -C DS3/5GHz.campaign.json			(resume after a crash)
+#		./campaign.py -C DS3/5GHz.campaign.json -s			(status only)
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import dot11catalog
+import multiinject
+
+
+injectscript = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CaptureTestV0.2.py')
+celltimeoutdefault = 120.0
+maxattemptsdefault = 3
+#Consecutive failed cells after which an interface is skipped for the rest of the run
+ifacefailuresdefault = 2
+retrydelay = 5.0
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+
+def cellid(repetition, iface, modSelected):
+	"""Checkpoint key (also used for file names) of one cell"""
+	return 'r{:02d}_{}_{}'.format(repetition, iface, modSelected)
+
+
+def expandcells(definition):
+	"""[(cell id, repetition, iface, modulation)] of a campaign definition, in execution order"""
+	cells = []
+	for repetition in range(1, definition['repetitions'] + 1):
+		for modSelected in definition['modulations']:
+			for iface in definition['interfaces']:
+				cells.append((cellid(repetition, iface, modSelected), repetition, iface, modSelected))
+	return cells
+
+
+class Checkpoint:
+	"""Campaign definition plus the outcome of every cell run so far, kept in one JSON file"""
+
+	def __init__(self, path):
+		self.path = path
+		self.definition = None
+		self.cells = {}
+		if os.path.exists(path):
+			with open(path) as f:
+				data = json.load(f)
+			self.definition = data['definition']
+			self.cells = data['cells']
+
+	def status(self, cell):
+		return self.cells.get(cell, {}).get('status', PENDING)
+
+	def attempts(self, cell):
+		return self.cells.get(cell, {}).get('attempts', 0)
+
+	def record(self, cell, status, **fields):
+		entry = self.cells.setdefault(cell, {'attempts': 0})
+		entry['attempts'] += 1
+		entry['status'] = status
+		entry.update(fields)
+		self.save()
+
+	def save(self):
+		"""Write atomically and durably, so a crash leaves either the old or the new checkpoint"""
+		tmppath = '{}.{}.tmp'.format(self.path, os.getpid())
+		with open(tmppath, 'w') as f:
+			json.dump({'definition': self.definition, 'cells': self.cells}, f, indent=1)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmppath, self.path)
+
+	def summary(self, cells):
+		counts = {}
+		for cell, repetition, iface, modSelected in cells:
+			status = self.status(cell)
+			counts[status] = counts.get(status, 0) + 1
+		return counts
+
+
+def cellcommand(definition, iface, modSelected, summarypath, sendlogpath):
+	"""CaptureTestV0.2.py command line for one cell"""
+	command = [sys.executable, injectscript, '-i', iface, '-m', modSelected, '-x', str(definition.get('repeat', 1)), '-J', summarypath]
+	if definition.get('frametypes'):
+		command += ['-f', definition['frametypes']]
+	if definition.get('pacing'):
+		command += ['-p', definition['pacing'], '-R', str(definition.get('rate', 20.0))]
+	elif definition.get('burst'):
+		command.append('-b')
+	if definition.get('cachedir'):
+		command += ['-c', definition['cachedir']]
+	if sendlogpath:
+		command += ['-l', sendlogpath]
+	return command
+
+
+def runcell(definition, workdir, cell, iface, modSelected, timeout):
+	"""Run one cell; returns (status, fields to record)"""
+	summarypath = os.path.join(workdir, cell + '.json')
+	sendlogpath = os.path.join(workdir, cell + '.sendlog') if definition.get('sendlogs') else None
+	command = cellcommand(definition, iface, modSelected, summarypath, sendlogpath)
+	started = time.time()
+	try:
+		completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout)
+	except subprocess.TimeoutExpired as e:
+		#subprocess.run kills the child on timeout
+		return TIMEOUT, {'started': started, 'elapsed': time.time() - started, 'output': (e.output or b'').decode('utf-8', 'replace')[-2000:]}
+	fields = {'started': started, 'elapsed': time.time() - started, 'returncode': completed.returncode,
+		'output': completed.stdout.decode('utf-8', 'replace')[-2000:]}
+	try:
+		with open(summarypath) as f:
+			summary = json.load(f)
+	except (OSError, ValueError):
+		return FAILED, fields
+	result = summary['interfaces'].get(iface, {})
+	fields['runid'] = summary['runid']
+	fields['result'] = result
+	if sendlogpath:
+		fields['sendlog'] = sendlogpath
+	if completed.returncode != 0 or 'error' in result or (result.get('health') or {}).get('skipped'):
+		return FAILED, fields
+	return DONE, fields
+
+
+def runcampaign(checkpoint, timeout=celltimeoutdefault, maxattempts=maxattemptsdefault, ifacefailures=ifacefailuresdefault, show=print):
+	"""Run every cell of checkpoint.definition that is not done yet; returns the status counts"""
+	definition = checkpoint.definition
+	cells = expandcells(definition)
+	workdir = os.path.splitext(checkpoint.path)[0] + '.cells'
+	os.makedirs(workdir, exist_ok=True)
+	failures = {}
+	for number, (cell, repetition, iface, modSelected) in enumerate(cells, 1):
+		if checkpoint.status(cell) == DONE or checkpoint.attempts(cell) >= maxattempts:
+			continue
+		if failures.get(iface, 0) >= ifacefailures:
+			continue
+		while True:
+			status, fields = runcell(definition, workdir, cell, iface, modSelected, timeout)
+			checkpoint.record(cell, status, **fields)
+			show('[{}/{}] {} {} ({:.1f}s, attempt {})'.format(number, len(cells), cell, status, fields['elapsed'], checkpoint.attempts(cell)))
+			if status == DONE or checkpoint.attempts(cell) >= maxattempts:
+				break
+			time.sleep(retrydelay)
+		if status == DONE:
+			failures[iface] = 0
+		else:
+			failures[iface] = failures.get(iface, 0) + 1
+			if failures[iface] >= ifacefailures:
+				show('{}: {} failed cells in a row, skipping its remaining cells this run'.format(iface, failures[iface]))
+	return checkpoint.summary(cells)
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Run an interfaces x modulations x repetitions injection campaign with a checkpoint per cell')
+	cliargs.add_argument('-C', action='store', required=True, dest='checkpoint', help='Checkpoint file; resumes the campaign it holds when it exists')
+	cliargs.add_argument('-i', action='store', default=None, dest='iface', help='Injection interfaces: comma separated names and/or globs')
+	cliargs.add_argument('-m', action='store', default='ALL', dest='modulations', help='Comma separated modulations default: ALL')
+	cliargs.add_argument('-f', action='store', default=None, dest='frametypes', help='Only these frame types (type_subtype list, see CaptureTestV0.2.py -f)')
+	cliargs.add_argument('-n', action='store', type=int, default=5, dest='repetitions', help='Repetitions of every interface/modulation cell default: 5')
+	cliargs.add_argument('-x', action='store', type=int, default=1, dest='repeat', help='Frame set repeats within a cell default: 1')
+	cliargs.add_argument('-b', action='store_true', default=False, dest='burst', help='Burst mode cells')
+	cliargs.add_argument('-p', action='store', default=None, dest='pacing', help='Paced mode cells with this schedule')
+	cliargs.add_argument('-R', action='store', type=float, default=20.0, dest='rate', help='Paced mode rate frames/s default: 20')
+	cliargs.add_argument('-c', action='store', default=None, dest='cachedir', help='Frame cache directory passed to every cell')
+	cliargs.add_argument('-l', action='store_true', default=False, dest='sendlogs', help='Keep a send log per cell (for correlate.py)')
+	cliargs.add_argument('-t', action='store', type=float, default=celltimeoutdefault, dest='timeout', help='Kill a cell after this many seconds default: {:g}'.format(celltimeoutdefault))
+	cliargs.add_argument('-a', action='store', type=int, default=maxattemptsdefault, dest='maxattempts', help='Attempts per cell default: {}'.format(maxattemptsdefault))
+	cliargs.add_argument('-s', action='store_true', default=False, dest='status', help='Only print the campaign status')
+	clioptions = cliargs.parse_args()
+
+	checkpoint = Checkpoint(clioptions.checkpoint)
+	if checkpoint.definition is None:
+		if not clioptions.iface:
+			sys.exit('New campaign: -i is required')
+		modulations = list(dot11catalog.radiomodulation) if clioptions.modulations == 'ALL' else clioptions.modulations.split(',')
+		unknown = [modSelected for modSelected in modulations if modSelected not in dot11catalog.radiomodulation]
+		if unknown:
+			sys.exit('Unknown modulation(s): ' + ', '.join(unknown))
+		checkpoint.definition = {
+			'interfaces': multiinject.expandifaces(clioptions.iface),
+			'modulations': modulations,
+			'frametypes': clioptions.frametypes,
+			'repetitions': clioptions.repetitions,
+			'repeat': clioptions.repeat,
+			'burst': clioptions.burst,
+			'pacing': clioptions.pacing,
+			'rate': clioptions.rate,
+			'cachedir': clioptions.cachedir,
+			'sendlogs': clioptions.sendlogs,
+			'created': time.time(),
+		}
+		checkpoint.save()
+	elif clioptions.iface:
+		print('Resuming the campaign in {}, matrix options on the command line are ignored'.format(clioptions.checkpoint))
+	cells = expandcells(checkpoint.definition)
+	print('Campaign: {} interface(s) x {} modulation(s) x {} repetition(s) = {} cells'.format(len(checkpoint.definition['interfaces']),
+		len(checkpoint.definition['modulations']), checkpoint.definition['repetitions'], len(cells)))
+	if not clioptions.status:
+		runcampaign(checkpoint, clioptions.timeout, clioptions.maxattempts)
+	print('Status: ' + ', '.join('{} {}'.format(n, status) for status, n in sorted(checkpoint.summary(cells).items())))
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+#
+#	Protoype: correlate.py -l <send log> [-l <send log> ...] [options] <dataset dir or pcapng> [...]
+#
+#	Injection-capture correlation.  Every frame sent is identified by (run id, injection
+#	interface, sequence number): the injector's send log (CaptureTestV0.2.py -l) lists them, and
+#	captured frames carry run id and sequence number in their tag IE and the injection interface in
+#	their Vendor Specific IE.  Captured frames are joined to sent frames on that key through a
+#	sorted key index (numpy.searchsorted), so the join costs one sort of the send log and one
+#	binary search per captured frame, all vectorized.
+#
+#	Per capture adapter and injector it reports
+#		sent / delivered (distinct sent frames seen at least once) / delivery ratio
+#		duplicates		copies of frames already seen
+#		unexpected		tagged frames that match nothing in the send logs (other runs, strays)
+#		untagged		frames to/from the injection MAC without a tag
+#		latency		capture time - Tx time of the first copy (needs synchronised clocks between
+#				injector and capture system, e.g. NTP/PTP, or both on one host)
+#
+#		Example:
+#		sudo ./CaptureTestV0.2.py -i 'wl*' -b -l run1.sendlog
+#		./correlate.py -l run1.sendlog DS3/
+#		./correlate.py -l run1.sendlog -t -j DS3/sys1_wlan1.pcapng
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+
+import numpy
+
+import pcapanalyze
+import pcapbatch
+import pcapindex
+import sendlog
+
+
+other = '(other)'
+latencypercentiles = (50, 95, 99)
+
+
+class SentFrames:
+	"""Every frame of one or more send logs as columns, with a sorted key index"""
+
+	def __init__(self, logs):
+		self.runids = numpy.unique(numpy.array([log['runid'] for log in logs], numpy.uint64))
+		self.injectors = sorted({name for log in logs for name in log['interfaces']})
+		columns = {'keys': [], 'injector': [], 'modindex': [], 'type_subtype': [], 'txtime': []}
+		for log in logs:
+			run = numpy.uint64(numpy.searchsorted(self.runids, log['runid']))
+			for name, sent in log['interfaces'].items():
+				frameindex = numpy.frombuffer(sent['sent'], numpy.uint16)
+				seq = numpy.arange(len(frameindex), dtype=numpy.uint64)
+				injector = self.injectors.index(name)
+				columns['keys'].append(self.makekey(run, numpy.uint64(injector), seq))
+				columns['injector'].append(numpy.full(len(seq), injector, numpy.int16))
+				columns['modindex'].append(numpy.frombuffer(sent['modindex'], numpy.uint8)[frameindex])
+				columns['type_subtype'].append(numpy.frombuffer(sent['type_subtype'], numpy.uint8)[frameindex])
+				columns['txtime'].append(numpy.frombuffer(sent['txtime'], numpy.int64))
+		for name, parts in columns.items():
+			setattr(self, name, numpy.concatenate(parts) if parts else numpy.zeros(0, numpy.uint64))
+		self.order = numpy.argsort(self.keys, kind='stable')
+		self.sortedkeys = self.keys[self.order]
+
+	@staticmethod
+	def makekey(run, injector, seq):
+		"""Join key: run number (position in runids) | injector number | sequence number"""
+		return (run << numpy.uint64(40)) | (injector << numpy.uint64(32)) | seq
+
+	def lookup(self, keys):
+		"""Row of the sent frame for each key, -1 where nothing was sent with that key"""
+		if not len(self.sortedkeys):
+			return numpy.full(len(keys), -1, numpy.int64)
+		pos = numpy.minimum(numpy.searchsorted(self.sortedkeys, keys), len(self.sortedkeys) - 1)
+		return numpy.where(self.sortedkeys[pos] == keys, self.order[pos], -1)
+
+
+def capturedkeys(sentframes, index, mask):
+	"""Join keys of the frames selected by mask, and whether a key could be formed"""
+	runid = index['runid'][mask].astype(numpy.uint64)
+	run = numpy.minimum(numpy.searchsorted(sentframes.runids, runid), max(len(sentframes.runids) - 1, 0))
+	known = sentframes.runids[run] == runid if len(sentframes.runids) else numpy.zeros(len(runid), bool)
+	#Injector names of this capture -> numbers in sentframes.injectors
+	names = [str(name) for name in index['injectors']]
+	mapping = numpy.array([sentframes.injectors.index(name) if name in sentframes.injectors else -1 for name in names] + [-1], numpy.int64)
+	injector = mapping[index['ieiface'][mask]]
+	known &= injector >= 0
+	keys = sentframes.makekey(run.astype(numpy.uint64), numpy.maximum(injector, 0).astype(numpy.uint64), index['seq'][mask].astype(numpy.uint64))
+	return keys, known
+
+
+def _cell():
+	return {'sent': 0, 'delivered': 0, 'duplicates': 0, 'unexpected': 0, 'untagged': 0, 'latency': {}, 'bytype': {}}
+
+
+def correlate(sentframes, files, addr=pcapanalyze.injectmac, rebuild=False, bytype=False):
+	"""{capture adapter: {injector: cell}} over the capture files, see the header for the cell fields"""
+	rows = {}
+	times = {}
+	extra = {}
+	for path in files:
+		index = pcapindex.load(path, rebuild)
+		ours = pcapindex.addrmask(index, addr)
+		tagged = ours & (index['tagmod'] >= 0)
+		keys, known = capturedkeys(sentframes, index, tagged)
+		sentrow = numpy.where(known, sentframes.lookup(keys), -1)
+		ifid = index['ifid'][tagged]
+		capturetime = index['time'][tagged].astype(numpy.int64)
+		injectornames = [str(name) for name in index['injectors']] + [other]
+		untaggedinjector = index['ieiface'][ours & ~tagged]
+		untaggedifid = index['ifid'][ours & ~tagged]
+		unmatchedinjector = index['ieiface'][tagged][sentrow < 0]
+		unmatchedifid = ifid[sentrow < 0]
+		for i, adapter in enumerate(str(name) for name in index['interfaces']):
+			selected = (ifid == i) & (sentrow >= 0)
+			rows.setdefault(adapter, []).append(sentrow[selected])
+			times.setdefault(adapter, []).append(capturetime[selected])
+			for kind, injectors in (('untagged', untaggedinjector[untaggedifid == i]), ('unexpected', unmatchedinjector[unmatchedifid == i])):
+				for injector, n in zip(*numpy.unique(injectors, return_counts=True)):
+					name = injectornames[injector]
+					name = name if name in sentframes.injectors else other
+					counts = extra.setdefault(adapter, {}).setdefault(name, {'untagged': 0, 'unexpected': 0})
+					counts[kind] += int(n)
+	sentper = numpy.bincount(sentframes.injector, minlength=len(sentframes.injectors)) if len(sentframes.injector) else numpy.zeros(len(sentframes.injectors), int)
+	report = {}
+	for adapter in rows:
+		adapterrows = numpy.concatenate(rows[adapter])
+		adaptertimes = numpy.concatenate(times[adapter])
+		#First copy of every delivered frame
+		order = numpy.lexsort((adaptertimes, adapterrows))
+		adapterrows = adapterrows[order]
+		adaptertimes = adaptertimes[order]
+		delivered, first, copies = numpy.unique(adapterrows, return_index=True, return_counts=True)
+		latency = adaptertimes[first] - sentframes.txtime[delivered]
+		injector = sentframes.injector[delivered]
+		perinjector = report.setdefault(adapter, {})
+		for number, name in enumerate(sentframes.injectors):
+			mine = injector == number
+			cell = perinjector[name] = _cell()
+			cell['sent'] = int(sentper[number])
+			cell['delivered'] = int(mine.sum())
+			cell['duplicates'] = int((copies[mine] - 1).sum())
+			if mine.any():
+				values = latency[mine] / 1e6
+				cell['latency'] = dict({'p{}'.format(p): float(v) for p, v in zip(latencypercentiles, numpy.percentile(values, latencypercentiles))},
+					min=float(values.min()), max=float(values.max()))
+			if bytype:
+				sentmine = sentframes.injector == number
+				types, sentcount = numpy.unique(sentframes.type_subtype[sentmine], return_counts=True)
+				deliveredcount = numpy.bincount(sentframes.type_subtype[delivered[mine]], minlength=256)
+				cell['bytype'] = {'0x{:02x}'.format(ts): [int(n), int(deliveredcount[ts])] for ts, n in zip(types.tolist(), sentcount.tolist())}
+		for name, counts in extra.get(adapter, {}).items():
+			cell = perinjector.setdefault(name, _cell())
+			cell.update(counts)
+	return report
+
+
+def formatreport(report, bytype=False):
+	lines = ['{:8s} {:12s} {:>8s} {:>9s} {:>7s} {:>6s} {:>10s} {:>8s}  {}'.format(
+		'Capture', 'Injector', 'Sent', 'Delivered', 'Ratio', 'Dup', 'Unexpected', 'Untagged', 'Latency ms p50/p95/p99/max')]
+	for adapter, perinjector in report.items():
+		for injector, cell in perinjector.items():
+			ratio = '{:6.1%}'.format(cell['delivered'] / cell['sent']) if cell['sent'] else '     -'
+			latency = cell['latency']
+			latencytext = '{:.2f}/{:.2f}/{:.2f}/{:.2f}'.format(latency['p50'], latency['p95'], latency['p99'], latency['max']) if latency else '-'
+			lines.append('{:8s} {:12s} {:8d} {:9d} {:>7s} {:6d} {:10d} {:8d}  {}'.format(adapter, injector, cell['sent'], cell['delivered'],
+				ratio, cell['duplicates'], cell['unexpected'], cell['untagged'], latencytext))
+			if bytype:
+				for ts, (sent, delivered) in cell['bytype'].items():
+					lines.append('{:>21s} [{}] {:8d} {:9d} {:6.1%}'.format('', ts, sent, delivered, delivered / sent))
+	return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Join injector send logs against captures: delivery, duplicates, unexpected frames, latency per adapter')
+	cliargs.add_argument('paths', nargs='+', help='Dataset directories and/or pcapng files')
+	cliargs.add_argument('-l', action='append', required=True, dest='logs', help='Send log written by CaptureTestV0.2.py -l (repeat for several runs/injectors)')
+	cliargs.add_argument('-a', action='store', default=pcapanalyze.injectmac, dest='addr', help='Injection MAC address default: ' + pcapanalyze.injectmac)
+	cliargs.add_argument('-t', action='store_true', default=False, dest='bytype', help='Also break delivery down per type_subtype')
+	cliargs.add_argument('-r', action='store_true', default=False, dest='rebuild', help='Rebuild the capture indexes')
+	cliargs.add_argument('-j', action='store_true', default=False, dest='json', help='JSON output')
+	clioptions = cliargs.parse_args()
+
+	sentframes = SentFrames([sendlog.read(path) for path in clioptions.logs])
+	report = correlate(sentframes, pcapbatch.capturefiles(clioptions.paths), clioptions.addr, clioptions.rebuild, clioptions.bytype)
+	if clioptions.json:
+		print(json.dumps(report, indent=1))
+	else:
+		print(formatreport(report, clioptions.bytype))
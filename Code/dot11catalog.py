@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+#
+#	Catalog of the 802.11 frame types injected by CaptureTestVx.py
+#
+#	Each frame type is described once, keyed by (type, subtype), with the body layer that follows
+#	the Dot11 header, the information elements it carries and an optional trailer layer.  The
+#	Dot11 part of each frame is built with Scapy once and shared by all injection interfaces; the
+#	RadioTap header is serialized once per modulation, the interface/modulation specific IEs are
+#	plain bytes, and the pieces are joined as bytes.  Build cost is then templates + modulations
+#	rather than templates x modulations.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import functools
+import glob
+import hashlib
+import importlib.util
+import os
+import struct
+
+import frametag
+
+
+#Hardcoded parameters to use throughout injection exercise
+srcmac = '01:23:45:67:89:ab'
+dot11id = 43210
+
+#Vendor Specific IE: 3Com OUI 00:01:02, OUI type 3, then ' ' + iface + '_' + modulation
+vsieprefix = b'\x00\x01\x02\x03 '
+vsieid = 221
+
+
+#RadioTap fields for the various modulations
+#	Modulation is one of:
+#		1. abg		--> 24Mbs
+#		2. HTxSS20	HT/xSS/20MHz/SGI --> x=1/72.2, x=2/144.4, x=3/216.7 	
+#		3. HTxSS40	HT/xSS/40MHz/SGI --> x=1/150, x=2/300, x=3/450
+#		4. VHT8		2SS/SGI/MCS8 --> 780Mbps
+#		5. VHT9		2SS/SGI/MCS9 --> 867Mbps
+#		6. HE		TBD
+radiomodulation = {
+	'abg': {'present': 'Rate', 'Rate': 24},
+	'HT1SS20': {'present': 'MCS', 'knownMCS': 7, 'MCS_index': 7, 'MCS_bandwidth': 0, 'guard_interval': 1},
+	'HT1SS20LDPC': {'present': 'MCS', 'knownMCS': 95, 'MCS_index': 7, 'MCS_bandwidth': 0, 'guard_interval': 1, 'FEC_type': 1},
+	'HT2SS20': {'present': 'MCS', 'knownMCS': 7, 'MCS_index': 15, 'MCS_bandwidth': 0, 'guard_interval': 1},
+	'HT3SS20': {'present': 'MCS', 'knownMCS': 7, 'MCS_index': 23, 'MCS_bandwidth': 0, 'guard_interval': 1},
+	'HT1SS40': {'present': 'MCS', 'knownMCS': 7, 'MCS_index': 7, 'MCS_bandwidth': 1, 'guard_interval': 1},
+	'HT2SS40': {'present': 'MCS', 'knownMCS': 7, 'MCS_index': 15, 'MCS_bandwidth': 1, 'guard_interval': 1},
+	'HT3SS40': {'present': 'MCS', 'knownMCS': 7, 'MCS_index': 23, 'MCS_bandwidth': 1, 'guard_interval': 1},
+	'HT2SS40LDPC': {'present': 'MCS', 'knownMCS': 95, 'MCS_index': 15, 'MCS_bandwidth': 1, 'guard_interval': 1, 'FEC_type': 1},
+	'HT3SS40LDPC': {'present': 'MCS', 'knownMCS': 95, 'MCS_index': 23, 'MCS_bandwidth': 1, 'guard_interval': 1, 'FEC_type': 1},
+	'VHT81SS': {'present': 'VHT', 'KnownVHT': 69, 'PresentVHT': 69, 'guard_interval': 1, 'VHT_bandwidth': 4, 'mcs_nss': b'\x81'},
+	'VHT91SS': {'present': 'VHT', 'KnownVHT': 69, 'PresentVHT': 69, 'guard_interval': 1, 'VHT_bandwidth': 4, 'mcs_nss': b'\x91'},
+	'VHT82SS': {'present': 'VHT', 'KnownVHT': 69, 'PresentVHT': 69, 'guard_interval': 1, 'VHT_bandwidth': 4, 'mcs_nss': b'\x82'},
+	'VHT92SS': {'present': 'VHT', 'KnownVHT': 69, 'PresentVHT': 69, 'guard_interval': 1, 'VHT_bandwidth': 4, 'mcs_nss': b'\x92'},
+	'VHT83SS': {'present': 'VHT', 'KnownVHT': 69, 'PresentVHT': 69, 'guard_interval': 1, 'VHT_bandwidth': 4, 'mcs_nss': b'\x83'},
+	'VHT93SS': {'present': 'VHT', 'KnownVHT': 69, 'PresentVHT': 69, 'guard_interval': 1, 'VHT_bandwidth': 4, 'mcs_nss': b'\x93'},
+	'HE': {'present': 'HE', 'he_data1': 51196, 'he_data2': 126, 'he_data3': 10587, 'he_data4': 0, 'he_data5': 8338, 'he_data6': 32514}
+}
+
+
+#Layers shared by several frame types
+#	ToDo: layout the Timing/Action/Control frames better, these reuse the Beacon body for now
+beaconbody = ('Dot11Beacon', {'cap': 'ESS+privacy'})
+llctrailer = ('LLC', {})
+defaultelements = ('SSID', 'Vendor Specific', 'Tag')
+
+
+#Frame types under test
+#	body:		layer placed after the Dot11 header (None for none)
+#	elements:	information elements placed after the body, see elementbuilders
+#	trailer:	layer placed after the elements (None for none)
+#	addr1:		receiver address when it is not srcmac
+dot11frames = {
+	#Management
+	(0, 0): {'name': 'assocreq', 'body': ('Dot11AssoReq', {'cap': 'ESS+privacy', 'listen_interval': 50})},
+	(0, 1): {'name': 'assocresp', 'body': ('Dot11AssoResp', {'cap': 'ESS+privacy', 'status': 1, 'AID': 1001})},
+	(0, 2): {'name': 'reassocreq', 'body': ('Dot11ReassoReq', {'cap': 'ESS+privacy', 'listen_interval': 50, 'current_AP': srcmac})},
+	(0, 3): {'name': 'reassocresp', 'body': ('Dot11ReassoResp', {'cap': 'ESS+privacy', 'status': 1, 'AID': 1001})},
+	(0, 4): {'name': 'probereq', 'body': ('Dot11ProbeReq', {})},
+	(0, 5): {'name': 'proberesp', 'body': ('Dot11ProbeResp', {'cap': 'ESS+privacy'})},
+	(0, 6): {'name': 'timingadv', 'body': beaconbody},
+		#No 0_7
+	(0, 8): {'name': 'beacon', 'body': beaconbody, 'addr1': 'ff:ff:ff:ff:ff:ff'},
+	(0, 9): {'name': 'atim', 'body': beaconbody},
+	(0, 10): {'name': 'disassociation', 'body': ('Dot11Disas', {'reason': 4})},
+	(0, 11): {'name': 'authentication', 'body': ('Dot11Auth', {'algo': 0, 'seqnum': 1, 'status': 2})},
+	(0, 12): {'name': 'deauthentication', 'body': ('Dot11Deauth', {'reason': 4})},
+	(0, 13): {'name': 'action', 'body': beaconbody},
+	(0, 14): {'name': 'actionnoack', 'body': beaconbody},
+	#Control
+	(1, 2): {'name': 'trigger', 'body': beaconbody},
+	(1, 3): {'name': 'tack', 'body': beaconbody},
+	(1, 4): {'name': 'beamreport', 'body': beaconbody},
+	(1, 5): {'name': 'vhtndp', 'body': beaconbody},
+	(1, 6): {'name': 'ctrlframeext', 'body': beaconbody},
+	(1, 7): {'name': 'ctrlwrapper', 'body': beaconbody},
+	(1, 8): {'name': 'blkackrqst', 'body': beaconbody},
+	(1, 9): {'name': 'blkack', 'body': beaconbody},
+	(1, 10): {'name': 'pspoll', 'body': beaconbody},
+	(1, 11): {'name': 'rts', 'body': beaconbody},
+	(1, 12): {'name': 'cts', 'body': beaconbody},
+	(1, 13): {'name': 'ack', 'body': ('Dot11Ack', {})},
+	(1, 14): {'name': 'cfend', 'body': beaconbody},
+	(1, 15): {'name': 'cfendack', 'body': beaconbody},
+	#Data
+	(2, 0): {'name': 'data', 'body': None, 'trailer': llctrailer},
+	(2, 1): {'name': 'datacfack', 'body': None, 'trailer': llctrailer},
+	(2, 2): {'name': 'datacfpoll', 'body': None, 'trailer': llctrailer},
+	(2, 3): {'name': 'datacfackpoll', 'body': None, 'trailer': llctrailer},
+	(2, 4): {'name': 'null', 'body': None, 'trailer': llctrailer},
+	(2, 5): {'name': 'cfack', 'body': None, 'trailer': llctrailer},
+	(2, 6): {'name': 'cfpoll', 'body': None, 'trailer': llctrailer},
+	(2, 7): {'name': 'cfackpoll', 'body': None, 'trailer': llctrailer},
+	(2, 8): {'name': 'qosdata', 'body': None, 'trailer': llctrailer},
+	(2, 9): {'name': 'qosdatacfack', 'body': None, 'trailer': llctrailer},
+	(2, 10): {'name': 'qosdatacfpoll', 'body': None, 'trailer': llctrailer},
+	(2, 11): {'name': 'qosdatacfackpoll', 'body': None, 'trailer': llctrailer},
+	(2, 12): {'name': 'qosnull', 'body': None, 'trailer': llctrailer},
+		#No 2_13
+	(2, 14): {'name': 'qoscfpoll', 'body': None, 'trailer': llctrailer},
+	(2, 15): {'name': 'qoscfackpoll', 'body': None, 'trailer': llctrailer},
+}
+
+
+#Scapy is only imported when frames are actually built, so listing the catalog or loading
+#cached frames does not pay for it
+def _layer(spec):
+	"""Instantiate a (layer name, fields) pair from the dot11/l2 Scapy layers"""
+	from scapy.layers import dot11, l2
+	name, fields = spec
+	layerclass = getattr(dot11, name, None) or getattr(l2, name)
+	return layerclass(**fields)
+
+
+@functools.lru_cache(maxsize=None)
+def scapyversion():
+	"""Installed Scapy version, from its dist-info directory name where possible instead of importing it"""
+	spec = importlib.util.find_spec('scapy')
+	if spec is not None and spec.submodule_search_locations:
+		sitedir = os.path.dirname(list(spec.submodule_search_locations)[0])
+		distinfo = glob.glob(os.path.join(sitedir, 'scapy-*.dist-info'))
+		if len(distinfo) == 1:
+			return os.path.basename(distinfo[0])[len('scapy-'):-len('.dist-info')]
+	import scapy
+	return scapy.__version__
+
+
+def ssidelement(iface, modSelected):
+	"""SSID IE carrying the injection interface name"""
+	ssid = iface.encode("utf-8")
+	return struct.pack('BB', 0, len(ssid)) + ssid
+
+
+def vendorelement(iface, modSelected):
+	"""Vendor Specific IE tagging the frame with injection interface and modulation"""
+	vsielocal = bytearray(vsieprefix)
+	vsielocal.extend(iface.encode("utf-8"))
+	vsielocal.extend(('_' + modSelected).encode("utf-8"))
+	return struct.pack('BB', vsieid, len(vsielocal)) + bytes(vsielocal)
+
+
+def parsevendorelement(frame, offset=0):
+	"""(iface, modulation) from the Vendor Specific IE of a received frame, searching from offset, or None"""
+	pos = frame.find(vsieprefix, offset)
+	if pos < 2 or frame[pos - 2] != vsieid:
+		return None
+	text = bytes(frame[pos + len(vsieprefix):pos + frame[pos - 1]]).decode("utf-8", "replace")
+	iface, sep, modSelected = text.rpartition('_')
+	return (iface, modSelected) if sep else (text, '')
+
+
+def modulationindex(modSelected):
+	"""Index of a modulation name in radiomodulation (255 if unknown), as carried in the frame tag"""
+	names = list(radiomodulation)
+	return names.index(modSelected) if modSelected in names else 255
+
+
+def tagelement(iface, modSelected):
+	"""Binary tag IE (see frametag), run id/sequence/timestamp are patched in at send time"""
+	return frametag.tagelement(modulationindex(modSelected))
+
+
+#Builders for the information elements named in the catalog, (iface, modulation) -> IE bytes
+elementbuilders = {
+	'SSID': ssidelement,
+	'Vendor Specific': vendorelement,
+	'Tag': tagelement,
+}
+
+
+def buildtemplate(key):
+	"""Serialize the interface independent parts of one frame type
+
+	Returns (head, elements, tail): head is the Dot11 header and body, elements the names of the
+	IEs that follow (built per interface/modulation) and tail the trailer layer after them
+	"""
+	from scapy.layers import dot11
+	frametype, subtype = key
+	entry = dot11frames[key]
+	dot11frame = dot11.Dot11(type=frametype, subtype=subtype,
+		addr1=entry.get('addr1', srcmac),
+		addr2=srcmac,
+		addr3=srcmac,
+		ID=dot11id)
+	if entry.get('body'):
+		dot11frame = dot11frame / _layer(entry['body'])
+	tail = bytes(_layer(entry['trailer'])) if entry.get('trailer') else b''
+	return bytes(dot11frame), tuple(entry.get('elements', defaultelements)), tail
+
+
+def buildtemplates(keys=None):
+	"""Build the templates for the requested frame types (default: all); shared by all interfaces"""
+	return {key: buildtemplate(key) for key in (keys or dot11frames)}
+
+
+def radiotap(modSelected):
+	"""Scapy RadioTap header for a modulation name from radiomodulation"""
+	from scapy.layers.dot11 import RadioTap
+	return RadioTap(**radiomodulation[modSelected])
+
+
+def catalogversion(modSelected):
+	"""Short hash of everything that shapes the frames sent for one modulation
+
+	Changes whenever a frame definition, the tagging constants, the modulation's RadioTap
+	fields or the Scapy version (which serializes the layers) change
+	"""
+	definition = repr((dot11frames, defaultelements, srcmac, dot11id, vsieprefix,
+		frametag.tagmarker, frametag.tagversion, modulationindex(modSelected),
+		radiomodulation[modSelected], scapyversion()))
+	return hashlib.sha1(definition.encode("utf-8")).hexdigest()[:12]
+
+
+def buildframes(iface, modulations, keys=None, templates=None):
+	"""Raw frames for every modulation name in modulations, modulation-major order
+
+	Returns a list of (modulation, (type, subtype), frame bytes)
+	"""
+	if templates is None:
+		templates = buildtemplates(keys)
+	frames = []
+	for modSelected in modulations:
+		rtheader = bytes(radiotap(modSelected))
+		elementbytes = {}
+		for key, (head, elements, tail) in templates.items():
+			if elements not in elementbytes:
+				elementbytes[elements] = b''.join(elementbuilders[element](iface, modSelected) for element in elements)
+			frames.append((modSelected, key, rtheader + head + elementbytes[elements] + tail))
+	return frames
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+#
+#	Dry-run injection sink: frames go to a pcapng file instead of a radio
+#
+#	Takes the place of rawinject.RawInjector when no monitor-mode adapter (or second machine) is
+#	at hand.  Every frame is written as it would be injected (RadioTap injection header + 802.11
+#	frame, linktype 127) with the timestamp its pacing schedule gives it: frame i of the run is
+#	stamped start + deadline i (see pacing.schedule), and the frame tag carries the same Tx time.
+#	Nothing waits on the clock, so a run of millions of frames takes as long as the writes
+#	(large buffered block writes through pcapngwriter) instead of the schedule.
+#
+#	The result reads like a loss-free capture on a receiver next to the injector: pcapanalyze,
+#	pcapindex, modcheck and correlate (with the send log of the same run) all take it, which makes
+#	it the reference "expected" capture of a run and a test input for the analysis side.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import os
+import time
+
+import pacing
+import pcapngwriter
+import rawinject
+
+
+flushsizedefault = 16 << 20
+
+
+def sinkpath(path, iface, ifaces):
+	"""Output file of iface: {iface} in path is replaced, else _iface is added when there are several interfaces"""
+	if '{iface}' in path:
+		return path.format(iface=iface)
+	if len(ifaces) < 2:
+		return path
+	stem, ext = os.path.splitext(path)
+	return '{}_{}{}'.format(stem, iface, ext or '.pcapng')
+
+
+class PcapngSink:
+	"""Write the frames of one injection interface to a pcapng file on a virtual timeline
+
+	deadlines is a generator from pacing.schedule() (seconds from start); start is the time of
+	the first frame in ns, default now.
+	"""
+
+	def __init__(self, path, iface, deadlines, start=None, flushsize=flushsizedefault):
+		self.path = path
+		self.iface = iface
+		self.deadlines = deadlines
+		self.start = time.time_ns() if start is None else start
+		self.writer = pcapngwriter.PcapngWriter(path, flushsize=flushsize, application='CaptureTest dry run')
+		self.ifid = self.writer.addinterface(iface)
+		self.last = self.start
+		#Same attributes as RawInjector, the dry run has no send errors
+		self.senderrors = 0
+		self.lasterror = None
+
+	def close(self):
+		self.writer.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def _next(self):
+		self.last = self.start + int(next(self.deadlines) * 1e9)
+		return self.last
+
+	def send(self, frame):
+		"""Write one frame at its next deadline"""
+		self.writer.write(self.ifid, self._next(), frame)
+		return True
+
+	def burst(self, frames, repeat=1, tagger=None, health=None):
+		"""Write frames repeat times; returns a DryRunStats (elapsed is the wall time of the writes)
+
+		With a frametag.FrameTagger, its buffers are written, each stamped with its deadline.
+		health is accepted for the RawInjector signature and ignored: there is no adapter.
+		"""
+		if tagger is not None:
+			frames = tagger.buffers
+		write = self.writer.write
+		ifid = self.ifid
+		stats = DryRunStats(self.path)
+		stats.start = time.perf_counter()
+		first = None
+		for x in range(repeat):
+			for i, frame in enumerate(frames):
+				timestamp = self._next()
+				if tagger is not None:
+					frame = tagger.tag(i, timestamp)
+				write(ifid, timestamp, frame)
+				stats.bytes += len(frame)
+				if first is None:
+					first = timestamp
+			stats.frames += len(frames)
+		self.writer.flush()
+		stats.end = time.perf_counter()
+		stats.span = (self.last - first) / 1e9 if first is not None else 0.0
+		return stats
+
+
+class DryRunStats(rawinject.BurstStats):
+	"""BurstStats of a dry run, plus the span of the virtual timeline written"""
+
+	def __init__(self, path):
+		super().__init__()
+		self.path = path
+		self.span = 0.0
+
+	def summary(self):
+		summary = super().summary()
+		summary.update(path=self.path, span=self.span, scheduledrate=(self.frames - 1) / self.span if self.span > 0 else 0.0)
+		return summary
+
+	def __str__(self):
+		return '{} frames, {} bytes written to {} in {:.3f}s ({:.1f} frames/s, {:.1f} MB/s), timestamps span {:.3f}s'.format(
+			self.frames, self.bytes, self.path, self.elapsed, self.framespersec, self.bytespersec / 1e6, self.span)
+
+
+def sink(path, iface, schedule='fixed', rate=20.0, depth=pacing.bucketdepthdefault, seed=None, start=None):
+	"""PcapngSink whose timestamps follow a pacing schedule at rate frames/s"""
+	return PcapngSink(path, iface, pacing.schedule(schedule, rate, depth=depth, seed=seed), start=start)
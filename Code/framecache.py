@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+#
+#	On-disk cache of pre-serialized injection frames
+#
+#	One file per (injection interface, modulation, catalog version) holds the raw bytes of every
+#	frame type in dot11catalog for that modulation.  Repeat runs load the byte blobs directly and
+#	skip Scapy layer building altogether; a change to the frame definitions, the modulation's
+#	RadioTap fields or the Scapy version changes the catalog version and forces a rebuild.
+#
+#	File layout: magic, then per frame <type u8><subtype u8><length u16 LE><frame bytes>
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import os
+import struct
+
+import dot11catalog
+
+
+cachedirdefault = os.path.join(os.path.expanduser('~'), '.cache', 'CaptureTest')
+cachemagic = b'PCFC0001'
+recordheader = struct.Struct('<BBH')
+
+
+def cachefile(cachedir, iface, modSelected):
+	"""Path of the cache file for one interface / modulation at the current catalog version"""
+	return os.path.join(cachedir, '{}_{}_{}.frames'.format(iface, modSelected, dot11catalog.catalogversion(modSelected)))
+
+
+def load(cachedir, iface, modSelected):
+	"""Frames cached for iface/modSelected as a list of ((type, subtype), bytes), or None on a miss"""
+	try:
+		with open(cachefile(cachedir, iface, modSelected), 'rb') as f:
+			blob = f.read()
+	except OSError:
+		return None
+	if not blob.startswith(cachemagic):
+		return None
+	frames = []
+	offset = len(cachemagic)
+	while offset < len(blob):
+		frametype, subtype, length = recordheader.unpack_from(blob, offset)
+		offset += recordheader.size
+		frames.append(((frametype, subtype), blob[offset:offset + length]))
+		offset += length
+	if offset != len(blob):
+		return None
+	return frames
+
+
+def store(cachedir, iface, modSelected, frames):
+	"""Write frames [((type, subtype), bytes), ...] for iface/modSelected; replaces atomically"""
+	os.makedirs(cachedir, exist_ok=True)
+	path = cachefile(cachedir, iface, modSelected)
+	blob = bytearray(cachemagic)
+	for (frametype, subtype), frame in frames:
+		blob += recordheader.pack(frametype, subtype, len(frame))
+		blob += frame
+	tmppath = '{}.{}.tmp'.format(path, os.getpid())
+	with open(tmppath, 'wb') as f:
+		f.write(blob)
+	os.replace(tmppath, path)
+
+
+def loadframes(iface, modulations, cachedir=cachedirdefault, rebuild=False, templates=None):
+	"""Frames for every modulation name in modulations, modulation-major order
+
+	Same result as dot11catalog.buildframes(); cached modulations are read from cachedir and
+	only the missing ones are built.  templates is an optional dict shared between calls (e.g.
+	one per interface): it is filled from dot11catalog.buildtemplates() the first time a build
+	is needed, so templates are built at most once.  Returns a list of
+	(modulation, (type, subtype), frame bytes) and the list of modulations that were rebuilt.
+	"""
+	if templates is None:
+		templates = {}
+	frames = []
+	rebuilt = []
+	for modSelected in modulations:
+		cached = None if rebuild else load(cachedir, iface, modSelected)
+		if cached is None:
+			if not templates:
+				templates.update(dot11catalog.buildtemplates())
+			built = dot11catalog.buildframes(iface, [modSelected], templates=templates)
+			cached = [(key, frame) for _, key, frame in built]
+			try:
+				store(cachedir, iface, modSelected, cached)
+			except OSError as e:
+				print('Frame cache not written ({}): {}'.format(cachedir, e))
+			rebuilt.append(modSelected)
+		frames.extend((modSelected, key, frame) for key, frame in cached)
+	return frames, rebuilt
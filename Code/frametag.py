@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#
+#	Binary per-frame tag carried in a second Vendor Specific IE
+#
+#	The text vendor IE (3Com OUI, OUI type 3, ' ' + iface + '_' + modulation) is the same on every
+#	repetition, so loss could only be inferred from counts.  Each frame now also carries a compact
+#	binary tag (3Com OUI, OUI type 4):
+#
+#		Offset	Size	Field
+#		0		3		OUI 00:01:02
+#		3		1		OUI type 4
+#		4		1		tag version
+#		5		1		modulation index into dot11catalog.radiomodulation
+#		6		4		run id (random per run)
+#		10		4		sequence number (per run and interface, from 0)
+#		14		8		transmit timestamp, ns since the epoch (time when queued to the socket)
+#		All fields big endian
+#
+#	Frames are built with a zeroed tag; run id, sequence number and timestamp are patched in place
+#	into the pre-built frame buffers just before each send, so no frame is rebuilt.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import array
+import os
+import struct
+import time
+
+
+tagid = 221
+tagoui = b'\x00\x01\x02'
+tagouitype = 4
+tagversion = 1
+#version, modulation index | run id, sequence, timestamp
+tagstatic = struct.Struct('>BB')
+tagdynamic = struct.Struct('>IIQ')
+taglen = len(tagoui) + 1 + tagstatic.size + tagdynamic.size
+#IE header + OUI + OUI type, used to find the tag in a frame
+tagmarker = struct.pack('BB', tagid, taglen) + tagoui + struct.pack('B', tagouitype)
+#Offset of the patched fields from the start of the IE
+dynamicoffset = len(tagmarker) + tagstatic.size
+
+
+def tagelement(modindex):
+	"""Tag IE with the static fields filled in and run id/sequence/timestamp zeroed"""
+	return tagmarker + tagstatic.pack(tagversion, modindex) + tagdynamic.pack(0, 0, 0)
+
+
+def newrunid():
+	"""Random 32 bit run id"""
+	return struct.unpack('>I', os.urandom(4))[0]
+
+
+def findtag(frame):
+	"""Offset of the tag IE in a frame, or -1"""
+	return frame.rfind(tagmarker)
+
+
+def parsetag(data, offset=0):
+	"""Decode the tag IE starting at offset (at its element ID)
+
+	Returns (modulation index, run id, sequence, timestamp ns) or None if there is no valid tag there
+	"""
+	if data[offset:offset + len(tagmarker)] != tagmarker or len(data) < offset + 2 + taglen:
+		return None
+	version, modindex = tagstatic.unpack_from(data, offset + len(tagmarker))
+	if version != tagversion:
+		return None
+	runid, seq, txtime = tagdynamic.unpack_from(data, offset + dynamicoffset)
+	return modindex, runid, seq, txtime
+
+
+class FrameTagger:
+	"""Mutable copies of a frame list whose tags are patched in place before each send
+
+	buffers[i] is the bytearray to send for frame i; tag(i) stamps it with the run id, the next
+	sequence number and the current time and returns it.  Buffers are never resized, so their
+	addresses stay valid (e.g. for sendmmsg vectors built once over them).
+
+	With log, every stamp is also recorded for the send log (see sendlog): sent[seq] is the frame
+	index stamped with sequence number seq and txtimes[seq] its timestamp.
+	"""
+
+	def __init__(self, frames, runid=None, log=False):
+		self.runid = newrunid() if runid is None else runid
+		self.buffers = [bytearray(frame) for frame in frames]
+		self.offsets = []
+		for buf in self.buffers:
+			offset = findtag(buf)
+			self.offsets.append(offset + dynamicoffset if offset >= 0 else -1)
+		self.seq = 0
+		self.log = log
+		self.sent = array.array('H')
+		self.txtimes = array.array('q')
+
+	def tag(self, i, txtime=None):
+		"""Stamp frame i (with txtime in ns, default now) and return its buffer"""
+		offset = self.offsets[i]
+		if txtime is None:
+			txtime = time.time_ns()
+		if offset >= 0:
+			tagdynamic.pack_into(self.buffers[i], offset, self.runid, self.seq, txtime)
+		if self.log:
+			self.sent.append(i)
+			self.txtimes.append(txtime)
+		self.seq += 1
+		return self.buffers[i]
+
+	def tagrange(self, start, end):
+		"""Stamp frames start..end-1 with consecutive sequence numbers"""
+		pack = tagdynamic.pack_into
+		runid = self.runid
+		for i in range(start, end):
+			offset = self.offsets[i]
+			txtime = time.time_ns()
+			if offset >= 0:
+				pack(self.buffers[i], offset, runid, self.seq, txtime)
+			if self.log:
+				self.sent.append(i)
+				self.txtimes.append(txtime)
+			self.seq += 1
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+#
+#	Protoype: ifstats.py [options]
+#
+#	Interface statistics sampler.  Replaces interfaces.sh -d (re-running the whole script a few
+#	seconds apart for a packet delta): the /sys/class/net/<iface>/statistics counters of all
+#	wireless interfaces are read every interval (0.2 s by default) through file descriptors opened
+#	once (one pread per counter, no open/close or process per sample) into a rolling NumPy series.
+#
+#	An rx/tx packet counter that has moved since sampling began and then stays unchanged for the
+#	stall period is flagged as stalled (hung capture adapter, wedged transmitter); an interface
+#	whose counters can no longer be read (adapter crashed / USB reset, netdev gone) is flagged as
+#	gone.  Sampler can run in a background thread (start/stop) and call back on flag changes, for
+#	use by the injector and the capture side.
+#
+#		Example:
+#		./ifstats.py						(all wireless interfaces, until Ctrl-C)
+#		./ifstats.py -i 'mon0,wlan*' -n 0.1 -s 2 -t 60 -j wlanstats.json
+#		./ifstats.py -d 3					(delta packets over 3 s, as interfaces.sh -d 3)
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy
+
+import multiinject
+
+
+countersdefault = ('rx_packets', 'tx_packets', 'rx_dropped', 'tx_errors', 'tx_dropped')
+#Counters watched for stalls
+stallcounters = ('rx_packets', 'tx_packets')
+intervaldefault = 0.2
+historydefault = 3000
+stalldefault = 3.0
+
+OK = 'ok'
+IDLE = 'idle'
+GONE = 'gone'
+
+
+def wirelessinterfaces(netdir=multiinject.netdir):
+	"""Names of the 802.11 interfaces (those with a phy80211 link), in natural order"""
+	return [iface for iface in multiinject.expandifaces('*', netdir) if os.path.exists(os.path.join(netdir, iface, 'phy80211'))]
+
+
+class Sampler:
+	"""Rolling series of statistics counters for a set of interfaces
+
+	values[i] is a (interfaces x counters) int64 sample taken at times[i] (time.monotonic()), the
+	last history samples kept in a ring.  A counter that cannot be read keeps its last value.
+	"""
+
+	def __init__(self, ifaces, counters=countersdefault, history=historydefault, stall=stalldefault, netdir=multiinject.netdir):
+		self.ifaces = list(ifaces)
+		self.counters = list(counters)
+		self.history = history
+		self.stall = stall
+		self.times = numpy.zeros(history)
+		self.values = numpy.zeros((history, len(self.ifaces), len(self.counters)), numpy.int64)
+		self.count = 0
+		self.lastchange = numpy.zeros((len(self.ifaces), len(self.counters)))
+		self.active = numpy.zeros((len(self.ifaces), len(self.counters)), bool)
+		self.readable = numpy.ones(len(self.ifaces), bool)
+		self.flags = {iface: IDLE for iface in self.ifaces}
+		self.watched = [self.counters.index(name) for name in stallcounters if name in self.counters]
+		self.lock = threading.Lock()
+		self.thread = None
+		self.stopping = threading.Event()
+		self.fds = []
+		for iface in self.ifaces:
+			row = []
+			for name in self.counters:
+				try:
+					row.append(os.open(os.path.join(netdir, iface, 'statistics', name), os.O_RDONLY))
+				except OSError:
+					row.append(-1)
+			self.fds.append(row)
+
+	def close(self):
+		self.stop()
+		for row in self.fds:
+			for fd in row:
+				if fd >= 0:
+					os.close(fd)
+		self.fds = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def sample(self):
+		"""Read every counter once; returns [(iface, new flag)] for the interfaces whose flag changed"""
+		with self.lock:
+			slot = self.count % self.history
+			previous = self.values[(self.count - 1) % self.history]
+			row = self.values[slot]
+			for i, fds in enumerate(self.fds):
+				for j, fd in enumerate(fds):
+					try:
+						row[i, j] = int(os.pread(fd, 32, 0))
+						continue
+					except (OSError, ValueError):
+						self.readable[i] = False
+					row[i, j] = previous[i, j] if self.count else 0
+			now = time.monotonic()
+			self.times[slot] = now
+			if self.count:
+				changed = row != previous
+				self.lastchange[changed] = now
+				self.active |= changed
+			else:
+				self.lastchange[:] = now
+			self.count += 1
+			return self._updateflags(now)
+
+	def _updateflags(self, now):
+		changes = []
+		silent = (now - self.lastchange >= self.stall) & self.active
+		for i, iface in enumerate(self.ifaces):
+			if not self.readable[i]:
+				flag = GONE
+			else:
+				stalled = [self.counters[j].split('_')[0] for j in self.watched if silent[i, j]]
+				flag = ' '.join(name + ' stall' for name in stalled) if stalled else OK if self.active[i].any() else IDLE
+			if flag != self.flags[iface]:
+				self.flags[iface] = flag
+				changes.append((iface, flag))
+		return changes
+
+	def stalled(self):
+		"""{iface: flag} of the interfaces currently flagged (stalled or gone)"""
+		return {iface: flag for iface, flag in self.flags.items() if flag not in (OK, IDLE)}
+
+	def _slots(self):
+		"""Ring slots of the kept samples, oldest first"""
+		kept = min(self.count, self.history)
+		return numpy.arange(self.count - kept, self.count) % self.history
+
+	def rates(self, window=1.0):
+		"""{iface: {counter: per second over the last window seconds}}"""
+		with self.lock:
+			if self.count < 2:
+				return {iface: {name: 0.0 for name in self.counters} for iface in self.ifaces}
+			slots = self._slots()
+			newest = slots[-1]
+			oldest = slots[min(numpy.searchsorted(self.times[slots], self.times[newest] - window), len(slots) - 2)]
+			elapsed = self.times[newest] - self.times[oldest]
+			delta = (self.values[newest] - self.values[oldest]) / elapsed if elapsed > 0 else numpy.zeros_like(self.values[newest], float)
+		return {iface: dict(zip(self.counters, delta[i].tolist())) for i, iface in enumerate(self.ifaces)}
+
+	def latest(self):
+		"""{iface: {counter: value}} of the newest sample"""
+		with self.lock:
+			row = self.values[(self.count - 1) % self.history].copy()
+		return {iface: dict(zip(self.counters, row[i].tolist())) for i, iface in enumerate(self.ifaces)}
+
+	def series(self, iface, counter):
+		"""(times, values) of one counter over the kept history, oldest first"""
+		with self.lock:
+			slots = self._slots()
+			return self.times[slots], self.values[slots, self.ifaces.index(iface), self.counters.index(counter)]
+
+	def start(self, interval=intervaldefault, onchange=None):
+		"""Sample every interval seconds in a background thread; onchange(iface, flag) on flag changes"""
+		self.stopping.clear()
+
+		def loop():
+			deadline = time.monotonic()
+			while not self.stopping.is_set():
+				for iface, flag in self.sample():
+					if onchange is not None:
+						onchange(iface, flag)
+				deadline += interval
+				self.stopping.wait(max(0.0, deadline - time.monotonic()))
+
+		self.thread = threading.Thread(target=loop, name='ifstats', daemon=True)
+		self.thread.start()
+
+	def stop(self):
+		if self.thread is not None:
+			self.stopping.set()
+			self.thread.join()
+			self.thread = None
+
+	def format(self, window=1.0):
+		rates = self.rates(window)
+		latest = self.latest()
+		lines = ['{:10s} {:>12s} {:>9s} {:>12s} {:>9s} {:>8s} {:>8s}  {}'.format('Iface', 'RX packets', 'RX/s', 'TX packets', 'TX/s', 'Drop/s', 'TxErr/s', 'Status')]
+		for iface in self.ifaces:
+			rate = rates[iface]
+			value = latest[iface]
+			lines.append('{:10s} {:12d} {:9.1f} {:12d} {:9.1f} {:8.1f} {:8.1f}  {}'.format(iface, value.get('rx_packets', 0), rate.get('rx_packets', 0.0),
+				value.get('tx_packets', 0), rate.get('tx_packets', 0.0), rate.get('rx_dropped', 0.0) + rate.get('tx_dropped', 0.0),
+				rate.get('tx_errors', 0.0), self.flags[iface]))
+		return '\n'.join(lines)
+
+	def tojson(self):
+		"""{'counters', 'interfaces': {iface: {'flag', 'times', counter: [values]}}} of the kept history"""
+		data = {'counters': self.counters, 'interfaces': {}}
+		for iface in self.ifaces:
+			entry = {'flag': self.flags[iface]}
+			for name in self.counters:
+				times, values = self.series(iface, name)
+				entry['times'] = times.tolist()
+				entry[name] = values.tolist()
+			data['interfaces'][iface] = entry
+		return data
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Sample interface statistics counters at sub-second intervals and flag stalled / vanished adapters')
+	cliargs.add_argument('-i', action='store', default=None, dest='iface', help='Interfaces: comma separated names and/or globs default: all wireless interfaces')
+	cliargs.add_argument('-n', action='store', type=float, default=intervaldefault, dest='interval', help='Sample interval in seconds default: {:g}'.format(intervaldefault))
+	cliargs.add_argument('-s', action='store', type=float, default=stalldefault, dest='stall', help='Flag rx/tx counters unchanged this many seconds default: {:g}'.format(stalldefault))
+	cliargs.add_argument('-t', action='store', type=float, default=None, dest='duration', help='Sampling duration in seconds default: until Ctrl-C')
+	cliargs.add_argument('-u', action='store', type=float, default=1.0, dest='refresh', help='Table refresh (and rate window) in seconds default: 1')
+	cliargs.add_argument('-d', action='store', type=float, default=None, dest='delta', help='Only print the delta packet counts over this many seconds (as interfaces.sh -d)')
+	cliargs.add_argument('-j', action='store', default=None, dest='json', help='Write the sampled series as JSON to this file')
+	clioptions = cliargs.parse_args()
+
+	ifaces = multiinject.expandifaces(clioptions.iface) if clioptions.iface else wirelessinterfaces()
+	if not ifaces:
+		sys.exit('No interface to sample')
+
+	clear = '\033[H\033[J' if sys.stdout.isatty() else ''
+	with Sampler(ifaces, stall=clioptions.stall) as sampler:
+		if clioptions.delta is not None:
+			sampler.sample()
+			before = sampler.latest()
+			time.sleep(clioptions.delta)
+			sampler.sample()
+			for iface, values in sampler.latest().items():
+				print('{:10s} rx {:10d} tx {:10d}  {}'.format(iface, values['rx_packets'] - before[iface]['rx_packets'],
+					values['tx_packets'] - before[iface]['tx_packets'], sampler.flags[iface]))
+			sys.exit(0)
+		started = time.monotonic()
+		sampler.start(clioptions.interval)
+		try:
+			while clioptions.duration is None or time.monotonic() - started < clioptions.duration:
+				time.sleep(clioptions.refresh if clioptions.duration is None else max(0.0, min(clioptions.refresh, started + clioptions.duration - time.monotonic())))
+				print(clear + sampler.format(clioptions.refresh), flush=True)
+		except KeyboardInterrupt:
+			pass
+		sampler.stop()
+		if clioptions.json:
+			with open(clioptions.json, 'w') as f:
+				json.dump(sampler.tojson(), f)
+		flagged = sampler.stalled()
+	for iface, flag in flagged.items():
+		print('{}: {}'.format(iface, flag))
+	sys.exit(1 if flagged else 0)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+#
+#	Protoype: sudo livecapture.py -i <monitor interfaces> [options]
+#
+#	Live per injector / capture interface / type_subtype counts on the capture system.  Replaces
+#	capturing every monitor interface to a pcapng and post-processing it with pcapfilter.sh: one
+#	AF_PACKET socket per monitor interface, all polled from one epoll loop; RadioTap + 802.11
+#	headers are parsed in-process and only frames to/from the injection MAC are counted and,
+#	optionally, written to a pcapng.  The matrix is redrawn every refresh interval.
+#
+#	The injector of a frame is read from its Vendor Specific IE (' ' + iface + '_' + modulation);
+#	frames without it (e.g. CTS/Ack) are counted under 'unattributed', or all frames under the name
+#	given with -n.
+#
+#	A capture interface that goes away (adapter crash, driver reset) is reported at once; with -A
+#	the capture stops there, with -s an interface that has seen nothing for that many seconds
+#	while others are receiving is reported as stalled (and aborts too with -A).
+#
+#		Example:
+#		sudo ./livecapture.py -i 'mon0,wlan*'
+#		sudo ./livecapture.py -i 'mon0,wlan*' -w DS3/sys1_wlan1.pcapng -n sys1_wlan1 -s 5 -A
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import errno
+import json
+import os
+import select
+import socket
+import struct
+import sys
+import time
+
+import dot11catalog
+import multiinject
+import pcapanalyze
+import pcapngwriter
+
+
+ETH_P_ALL = 0x0003
+PACKET_OUTGOING = 4
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+rcvbufdefault = 8 * 1024 * 1024
+snaplen = 65535
+unattributed = 'unattributed'
+_timespec = struct.Struct('@qq')
+_cmsgspace = socket.CMSG_SPACE(_timespec.size)
+
+#ARPHRD_* (/sys/class/net/<iface>/type) -> pcapng link type
+linktypes = {
+	803: pcapanalyze.LINKTYPE_IEEE802_11_RADIOTAP,
+	801: pcapanalyze.LINKTYPE_IEEE802_11,
+}
+
+#recv errors meaning the interface is gone or down
+_downerrors = (errno.ENETDOWN, errno.ENODEV, errno.ENXIO)
+
+
+def linktype(iface, netdir=multiinject.netdir):
+	"""pcapng link type of iface, from its ARPHRD type (None if not 802.11)"""
+	try:
+		with open(os.path.join(netdir, iface, 'type')) as f:
+			return linktypes.get(int(f.read()))
+	except (OSError, ValueError):
+		return None
+
+
+def injectorof(packet, offset):
+	"""Injection interface named in the frame's Vendor Specific IE, or None"""
+	parsed = dot11catalog.parsevendorelement(packet, offset)
+	return parsed[0] if parsed else None
+
+
+class LiveCounter:
+	"""injector x capture interface x type_subtype counts, fed one packet at a time"""
+
+	def __init__(self, addr=pcapanalyze.injectmac, injector=None, writer=None):
+		self.mac = pcapanalyze.macbytes(addr)
+		self.injector = injector
+		self.writer = writer
+		self.interfaces = []
+		self.counts = {}
+		self.packets = {}
+		self.matched = {}
+		self.lastseen = {}
+		self.down = {}
+		self.writerids = {}
+
+	def addinterface(self, name, linktype=pcapanalyze.LINKTYPE_IEEE802_11_RADIOTAP):
+		if name not in self.interfaces:
+			self.interfaces.append(name)
+			self.packets[name] = 0
+			self.matched[name] = 0
+			if self.writer is not None:
+				self.writerids[name] = self.writer.addinterface(name, linktype)
+
+	def feed(self, iface, linktype, timestamp, packet):
+		"""Count one packet captured on iface at timestamp (ns); True when it matched"""
+		self.packets[iface] += 1
+		self.lastseen[iface] = timestamp
+		offset = pcapanalyze.dot11offset(linktype, packet)
+		if offset < 0 or len(packet) < offset + 10:
+			return False
+		fc0 = packet[offset]
+		if self.mac not in pcapanalyze.frameaddresses(fc0, packet, offset):
+			return False
+		ts = ((fc0 >> 2) & 0x3) << 4 | (fc0 >> 4)
+		injector = self.injector or injectorof(packet, offset + 10) or unattributed
+		perinjector = self.counts.get(injector)
+		if perinjector is None:
+			perinjector = self.counts[injector] = {}
+		perinterface = perinjector.get(iface)
+		if perinterface is None:
+			perinterface = perinjector[iface] = {}
+		perinterface[ts] = perinterface.get(ts, 0) + 1
+		self.matched[iface] += 1
+		if self.writer is not None:
+			self.writer.write(self.writerids[iface], timestamp, packet)
+		return True
+
+	def result(self, injector):
+		"""pcapanalyze.analyze() style result for one injector"""
+		perinjector = self.counts.get(injector, {})
+		return {'file': 'live: ' + injector, 'packets': sum(self.packets.values()), 'matched': sum(sum(c.values()) for c in perinjector.values()),
+			'interfaces': self.interfaces, 'counts': {name: perinjector.get(name, {}) for name in self.interfaces}}
+
+	def status(self):
+		"""One line per capture interface: packets seen, matched, state"""
+		lines = []
+		for name in self.interfaces:
+			lines.append('{:8s} packets {:8d}  matched {:6d}  {}'.format(name, self.packets[name], self.matched[name],
+				'DOWN: ' + self.down[name] if name in self.down else 'up'))
+		return '\n'.join(lines)
+
+	def format(self):
+		blocks = [self.status()]
+		for injector in sorted(self.counts):
+			blocks.append(pcapanalyze.formatmatrix(self.result(injector)))
+		return '\n\n'.join(blocks)
+
+	def tojson(self):
+		return {'interfaces': self.interfaces, 'packets': self.packets, 'matched': self.matched, 'down': self.down,
+			'counts': {injector: pcapanalyze.tojson(self.result(injector))['counts'] for injector in self.counts}}
+
+
+def opensocket(iface, rcvbuf=rcvbufdefault):
+	"""Non-blocking AF_PACKET socket receiving everything on iface, with ns kernel timestamps"""
+	sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+	try:
+		sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+		sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+		sock.bind((iface, ETH_P_ALL))
+		sock.setblocking(False)
+	except OSError:
+		sock.close()
+		raise
+	return sock
+
+
+def _timestamp(ancdata):
+	for level, kind, data in ancdata:
+		if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(data) >= _timespec.size:
+			sec, nsec = _timespec.unpack_from(data)
+			return sec * 1000000000 + nsec
+	return time.time_ns()
+
+
+def capture(sockets, counter, duration=None, refresh=1.0, stall=None, abort=False, show=print, netdir=multiinject.netdir):
+	"""Poll {iface: (socket, linktype)} feeding counter until duration, Ctrl-C or (with abort) a failed interface
+
+	show(counter) is called every refresh seconds.  Returns the reason capture stopped.
+	"""
+	poller = select.epoll()
+	byfd = {}
+	for iface, (sock, ltype) in sockets.items():
+		poller.register(sock.fileno(), select.EPOLLIN | select.EPOLLERR)
+		byfd[sock.fileno()] = (iface, sock, ltype)
+	start = time.monotonic()
+	nextshow = start + refresh
+	#Last time each interface received a packet (monotonic)
+	lastactive = {iface: start for iface in sockets}
+	reason = 'done'
+	try:
+		while byfd:
+			now = time.monotonic()
+			if duration is not None and now - start >= duration:
+				break
+			timeout = nextshow - now
+			if duration is not None:
+				timeout = min(timeout, start + duration - now)
+			for fd, events in poller.poll(max(timeout, 0)):
+				iface, sock, ltype = byfd[fd]
+				while True:
+					try:
+						data, ancdata, flags, address = sock.recvmsg(snaplen, _cmsgspace)
+					except BlockingIOError:
+						break
+					except OSError as e:
+						if e.errno in _downerrors:
+							counter.down[iface] = os.strerror(e.errno)
+							poller.unregister(fd)
+							del byfd[fd]
+						break
+					if address[2] == PACKET_OUTGOING:
+						continue
+					counter.feed(iface, ltype, _timestamp(ancdata), data)
+					lastactive[iface] = time.monotonic()
+			now = time.monotonic()
+			if now >= nextshow:
+				for fd, (iface, sock, ltype) in list(byfd.items()):
+					if not os.path.exists(os.path.join(netdir, iface)):
+						counter.down[iface] = 'interface removed'
+						poller.unregister(fd)
+						del byfd[fd]
+					elif stall and now - lastactive[iface] >= stall:
+						if any(now - t < stall for other, t in lastactive.items() if other != iface):
+							counter.down[iface] = 'stalled, nothing for {:.0f}s'.format(now - lastactive[iface])
+					elif counter.down.get(iface, '').startswith('stalled'):
+						#Receiving again
+						del counter.down[iface]
+				show(counter)
+				nextshow = now + refresh
+			if abort and counter.down:
+				reason = 'aborted, ' + ', '.join('{}: {}'.format(iface, why) for iface, why in counter.down.items())
+				break
+	except KeyboardInterrupt:
+		reason = 'interrupted'
+	finally:
+		poller.close()
+	return reason
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Live per injector / capture interface / type-subtype counts from monitor interfaces')
+	cliargs.add_argument('-i', action='store', required=True, dest='iface', help='Monitor interfaces: comma separated names and/or globs (e.g. "mon0,wlan*")')
+	cliargs.add_argument('-a', action='store', default=pcapanalyze.injectmac, dest='addr', help='Injection MAC address default: ' + pcapanalyze.injectmac)
+	cliargs.add_argument('-n', action='store', default=None, dest='injector', help='Count every frame under this injector name (e.g. sys1_wlan1) instead of reading it from the frames')
+	cliargs.add_argument('-w', action='store', default=None, dest='pcapng', help='Write matching frames to this pcapng')
+	cliargs.add_argument('-t', action='store', type=float, default=None, dest='duration', help='Capture duration in seconds default: until Ctrl-C')
+	cliargs.add_argument('-u', action='store', type=float, default=1.0, dest='refresh', help='Refresh interval in seconds default: 1')
+	cliargs.add_argument('-s', action='store', type=float, default=None, dest='stall', help='Report an interface silent for this many seconds while others receive')
+	cliargs.add_argument('-A', action='store_true', default=False, dest='abort', help='Stop as soon as an interface goes down or stalls')
+	cliargs.add_argument('-j', action='store', default=None, dest='json', help='Write the final counts as JSON to this file')
+	clioptions = cliargs.parse_args()
+
+	writer = pcapngwriter.PcapngWriter(clioptions.pcapng) if clioptions.pcapng else None
+	counter = LiveCounter(clioptions.addr, clioptions.injector, writer)
+	sockets = {}
+	for iface in multiinject.expandifaces(clioptions.iface):
+		ltype = linktype(iface)
+		if ltype is None:
+			print('Skipping {}: not an 802.11 monitor interface'.format(iface))
+			continue
+		try:
+			sockets[iface] = (opensocket(iface), ltype)
+		except OSError as e:
+			print('Skipping {}: {}'.format(iface, e))
+			continue
+		counter.addinterface(iface, ltype)
+	if not sockets:
+		sys.exit('No monitor interface to capture on')
+
+	clear = '\033[H\033[J' if sys.stdout.isatty() else ''
+
+	def show(counter):
+		print(clear + counter.format(), flush=True)
+
+	reason = capture(sockets, counter, clioptions.duration, clioptions.refresh, clioptions.stall, clioptions.abort, show)
+	for sock, ltype in sockets.values():
+		sock.close()
+	if writer is not None:
+		writer.close()
+	print(clear + counter.format())
+	print('Capture stopped: {}'.format(reason))
+	if clioptions.json:
+		with open(clioptions.json, 'w') as f:
+			json.dump(counter.tojson(), f, indent=1)
+	sys.exit(1 if reason.startswith('aborted') else 0)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+#
+#	Protoype: modcheck.py [options] <dataset dir or pcapng> [...]
+#
+#	Requested vs. observed modulation, per injector and capture interface.  The requested
+#	modulation of each injected frame is the frametag modulation index (or, for captures taken
+#	before frames were tagged, the modulation named in the Vendor Specific IE); the observed one is
+#	what the capture side's RadioTap header reports (Rate, MCS, VHT or HE fields).  Frames whose
+#	PHY, MCS/rate, streams, bandwidth or guard interval differ from the radiomodulation entry are
+#	counted as mismatches, e.g. adapters that ignore the RadioTap header and send at 6 or 1 Mbps.
+#	Frames carrying neither the tag nor the Vendor Specific IE have no requested modulation and are
+#	left out.
+#
+#	Decoding runs on the pcapindex columns: one numpy.unique over the (interface, requested,
+#	observed) columns per capture, whatever the number of frames or modulations.
+#
+#		Example:
+#		./modcheck.py DS1/ DS2/
+#		./modcheck.py -m DS1/sys1_wlan1.pcapng		(mismatches only)
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+
+import numpy
+
+import dot11catalog
+import pcapanalyze
+import pcapbatch
+import pcapindex
+import radiotap
+
+
+#Columns that make up the observed modulation
+observedcolumns = ('phy', 'rate', 'mcs', 'nss', 'bw', 'gi')
+
+
+def requested(modSelected):
+	"""Modulation a radiomodulation entry asks for, as {column: value} in radiotap.decode() terms"""
+	entry = dot11catalog.radiomodulation[modSelected]
+	expected = dict(radiotap.absent)
+	if entry['present'] == 'Rate':
+		expected.update(phy=radiotap.PHY_LEGACY, rate=int(entry['Rate'] * 2))
+	elif entry['present'] == 'MCS':
+		expected.update(phy=radiotap.PHY_HT, mcs=entry['MCS_index'], nss=entry['MCS_index'] // 8 + 1,
+			bw=int(radiotap.htbandwidths[entry.get('MCS_bandwidth', 0) & radiotap.MCS_FLAG_BW]), gi=entry.get('guard_interval', 0))
+	elif entry['present'] == 'VHT':
+		mcsnss = entry['mcs_nss'][0]
+		expected.update(phy=radiotap.PHY_VHT, mcs=mcsnss >> 4, nss=mcsnss & 0x0f,
+			bw=int(radiotap.vhtbandwidths[entry.get('VHT_bandwidth', 0) & 0x1f]), gi=entry.get('guard_interval', 0))
+	elif entry['present'] == 'HE':
+		expected.update(phy=radiotap.PHY_HE, mcs=(entry['he_data3'] >> 8) & 0x0f, nss=entry['he_data6'] & 0x0f,
+			bw=int(radiotap.hebandwidths[entry['he_data5'] & 0x0f]), gi=(entry['he_data5'] >> 4) & 0x03)
+	return {name: expected[name] for name in observedcolumns}
+
+
+def label(observed):
+	"""Short text for an observed/requested modulation {column: value}"""
+	phy = observed['phy']
+	if phy == radiotap.PHY_NONE:
+		return 'none'
+	if phy == radiotap.PHY_LEGACY:
+		return 'legacy {:g}Mbps'.format(observed['rate'] / 2)
+	parts = [radiotap.phynames[phy], 'MCS{}'.format(observed['mcs'])]
+	if phy != radiotap.PHY_HT:
+		parts.append('NSS{}'.format(observed['nss']))
+	if observed['bw'] >= 0:
+		parts.append('{}MHz'.format(observed['bw']))
+	if phy == radiotap.PHY_HE and observed['gi'] >= 0:
+		parts.append('GI{}'.format((0.8, 1.6, 3.2, '?')[observed['gi']]))
+	elif observed['gi'] == 1:
+		parts.append('SGI')
+	return ' '.join(parts)
+
+
+def matches(expected, observed):
+	"""True when observed is the expected modulation (bandwidth/GI only compared when reported)"""
+	if observed['phy'] != expected['phy']:
+		return False
+	if expected['phy'] == radiotap.PHY_LEGACY:
+		return observed['rate'] == expected['rate']
+	for name in ('mcs', 'nss', 'bw', 'gi'):
+		if observed[name] >= 0 and observed[name] != expected[name]:
+			return False
+	return True
+
+
+def checkindex(index, addr=pcapanalyze.injectmac):
+	"""[(capture interface, requested modulation, observed {column: value}, frames)] for one capture index"""
+	mask = pcapindex.addrmask(index, addr)
+	wanted = numpy.where(index['tagmod'] >= 0, index['tagmod'], index['iemod'])
+	mask &= wanted >= 0
+	stacked = numpy.stack([index['ifid'][mask].astype(numpy.int32), wanted[mask].astype(numpy.int32)] +
+		[index[name][mask].astype(numpy.int32) for name in observedcolumns])
+	if not stacked.shape[1]:
+		return []
+	keys, n = numpy.unique(stacked, axis=1, return_counts=True)
+	names = list(dot11catalog.radiomodulation)
+	interfaces = [str(name) for name in index['interfaces']]
+	rows = []
+	for column, count in zip(keys.T.tolist(), n.tolist()):
+		ifid, modindex = column[:2]
+		modSelected = names[modindex] if modindex < len(names) else '#{}'.format(modindex)
+		rows.append((interfaces[ifid], modSelected, dict(zip(observedcolumns, column[2:])), count))
+	return rows
+
+
+def check(files, addr=pcapanalyze.injectmac, rebuild=False):
+	"""{injector: {capture interface: {requested: {'frames', 'matched', 'observed': {label: n}}}}} over files"""
+	report = {}
+	for path in files:
+		perinjector = report.setdefault(pcapbatch.injectorname(path), {})
+		for iface, modSelected, observed, count in checkindex(pcapindex.load(path, rebuild), addr):
+			cell = perinjector.setdefault(iface, {}).setdefault(modSelected, {'expected': '', 'frames': 0, 'matched': 0, 'observed': {}})
+			if modSelected in dot11catalog.radiomodulation:
+				expected = requested(modSelected)
+				cell['expected'] = label(expected)
+				if matches(expected, observed):
+					cell['matched'] += count
+			text = label(observed)
+			cell['frames'] += count
+			cell['observed'][text] = cell['observed'].get(text, 0) + count
+	return report
+
+
+def formatreport(report, mismatchonly=False):
+	lines = ['{:12s} {:8s} {:12s} {:26s} {:>7s} {:>7s}  {}'.format('Injector', 'Capture', 'Requested', 'Expected', 'Frames', 'Match%', 'Observed')]
+	for injector, perinjector in report.items():
+		for iface, perinterface in perinjector.items():
+			for modSelected, cell in perinterface.items():
+				if mismatchonly and cell['matched'] == cell['frames']:
+					continue
+				observed = ', '.join('{}: {}'.format(text, n) for text, n in sorted(cell['observed'].items(), key=lambda item: -item[1]))
+				lines.append('{:12s} {:8s} {:12s} {:26s} {:7d} {:6.1f}%  {}{}'.format(injector, iface, modSelected, cell['expected'],
+					cell['frames'], 100.0 * cell['matched'] / cell['frames'], observed,
+					'' if cell['matched'] == cell['frames'] else '  MISMATCH'))
+	return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Requested vs. observed modulation per injector and capture interface')
+	cliargs.add_argument('paths', nargs='+', help='Dataset directories (e.g. DS1/ DS2/) and/or pcapng files')
+	cliargs.add_argument('-a', action='store', default=pcapanalyze.injectmac, dest='addr', help='Injection MAC address default: ' + pcapanalyze.injectmac)
+	cliargs.add_argument('-m', action='store_true', default=False, dest='mismatchonly', help='Only list requested modulations that were not always honoured')
+	cliargs.add_argument('-r', action='store_true', default=False, dest='rebuild', help='Rebuild the capture indexes')
+	cliargs.add_argument('-j', action='store_true', default=False, dest='json', help='JSON output')
+	clioptions = cliargs.parse_args()
+
+	report = check(pcapbatch.capturefiles(clioptions.paths), clioptions.addr, clioptions.rebuild)
+	if clioptions.json:
+		print(json.dumps(report, indent=1))
+	else:
+		print(formatreport(report, clioptions.mismatchonly))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+#
+#	Parallel injection on several interfaces from one process
+#
+#	Replaces the shell loop
+#		for iface in $(ls /sys/class/net/ | grep -e wl -e mon); do ./CaptureTestV0.py -i $iface ...; done
+#	Interfaces are named by a comma separated list of names and/or globs ('wl*,mon*'); frame
+#	templates are built once for all of them and one worker thread per interface injects.  All
+#	workers set up (open their socket) first and then wait on a common barrier so injection starts
+#	at the same time everywhere; a run lasts about as long as the slowest adapter.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import fnmatch
+import os
+import re
+import threading
+
+
+netdir = '/sys/class/net'
+
+
+def _naturalkey(name):
+	"""Sort key that puts wlan10 after wlan9 (like sort -V)"""
+	return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def expandifaces(spec, netdir=netdir):
+	"""Interfaces named by spec, a comma separated list of interface names and/or globs
+
+	Globs are matched against netdir and expanded in natural order; plain names are kept as
+	given even if they do not exist (the socket open reports it).  Duplicates are dropped.
+	"""
+	try:
+		available = sorted(os.listdir(netdir), key=_naturalkey)
+	except OSError:
+		available = []
+	ifaces = []
+	for pattern in spec.split(','):
+		pattern = pattern.strip()
+		if not pattern:
+			continue
+		if any(c in pattern for c in '*?['):
+			matched = fnmatch.filter(available, pattern)
+		else:
+			matched = [pattern]
+		for iface in matched:
+			if iface not in ifaces:
+				ifaces.append(iface)
+	return ifaces
+
+
+class StartGate:
+	"""Start barrier handed to each worker; worker calls wait() once it is ready to inject"""
+
+	def __init__(self, parties):
+		self.barrier = threading.Barrier(parties)
+		self.local = threading.local()
+
+	def wait(self):
+		if not getattr(self.local, 'passed', False):
+			self.local.passed = True
+			self.barrier.wait()
+
+
+def injectall(ifaces, worker):
+	"""Run worker(iface, gate) on one thread per interface and wait for all of them
+
+	worker sets up, calls gate.wait() and then injects; a worker that fails before reaching the
+	gate is let through it anyway so the others are not held up.  Returns {iface: result}, with
+	the exception raised by the worker as result when it failed.
+	"""
+	gate = StartGate(len(ifaces))
+	results = {}
+
+	def run(iface):
+		try:
+			results[iface] = worker(iface, gate)
+		except Exception as e:
+			results[iface] = e
+		finally:
+			gate.wait()
+
+	threads = [threading.Thread(target=run, args=(iface,), name='inject-' + iface) for iface in ifaces]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	return {iface: results.get(iface) for iface in ifaces}
@@ -0,0 +1,855 @@
+#!/usr/bin/env python3
+#
+#	Protoype: sudo nl80211.py [options]
+#
+#	In-process nl80211 / rtnetlink control of the wireless interfaces.  Replaces the iw, ip, ethtool
+#	and airmon-ng calls of interfaces.sh and wifisetup.sh (several processes per interface per call)
+#	with netlink requests from this process:
+#		listing		one nl80211 interface dump + one rtnetlink link dump for all adapters
+#		monitor mode	link down / set type / link up, each step one batched send for all adapters
+#		channel		one batched send of SET_WIPHY (freq, width, center) for all adapters
+#	Listings are cached for cachettl seconds (phys until invalidated); successful set operations
+#	update the cache in place, so a channel sweep does not re-dump between steps.
+#
+#	The netlink socket is behind a transport (send(bytes) / recv() -> bytes), so the same code runs
+#	against the kernel (SocketTransport), a recorded session (RecordingTransport /
+#	ReplayTransport) or the FakeResponder, a stand-in kernel holding a table of phys and interfaces.
+#
+#	Channel specs are those of wifisetup.sh / iw:
+#		'<channel> [NOHT|HT20|HT40+|HT40-|5MHz|10MHz|80MHz|160MHz|320MHz] [6GHz]'	e.g. '149 80MHz', '11 HT20', '37 160MHz 6GHz'
+#		'<freq> [5|10|20|40|80|80+80|160|320] [<center1> [<center2>]]'		e.g. '6935 160 6985'
+#
+#		Example:
+#		sudo ./nl80211.py						(table, as interfaces.sh)
+#		sudo ./nl80211.py -i 'wlan*' -M -c '149 80MHz'
+#		sudo ./nl80211.py -A phy0 -c '6935 160 6985' -i mon0
+#		sudo ./nl80211.py -R lab1.nlrec ; ./nl80211.py -P lab1.nlrec	(record, replay offline)
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import collections
+import errno
+import json
+import os
+import socket
+import struct
+import sys
+import time
+
+import multiinject
+
+
+#Netlink
+NETLINK_ROUTE = 0
+NETLINK_GENERIC = 16
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_ACK = 0x4
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLA_TYPE_MASK = 0x3fff
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+
+#rtnetlink
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+IFLA_STATS64 = 23
+IFF_UP = 0x1
+
+#nl80211
+NL80211_CMD_GET_WIPHY = 1
+NL80211_CMD_SET_WIPHY = 2
+NL80211_CMD_NEW_WIPHY = 3
+NL80211_CMD_GET_INTERFACE = 5
+NL80211_CMD_SET_INTERFACE = 6
+NL80211_CMD_NEW_INTERFACE = 7
+NL80211_ATTR_WIPHY = 1
+NL80211_ATTR_WIPHY_NAME = 2
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_IFNAME = 4
+NL80211_ATTR_IFTYPE = 5
+NL80211_ATTR_MAC = 6
+NL80211_ATTR_WIPHY_BANDS = 22
+NL80211_ATTR_WIPHY_FREQ = 38
+NL80211_ATTR_WIPHY_CHANNEL_TYPE = 39
+NL80211_ATTR_WIPHY_TX_POWER_LEVEL = 98
+NL80211_ATTR_CHANNEL_WIDTH = 159
+NL80211_ATTR_CENTER_FREQ1 = 160
+NL80211_ATTR_CENTER_FREQ2 = 161
+NL80211_ATTR_SPLIT_WIPHY_DUMP = 174
+NL80211_BAND_ATTR_FREQS = 1
+NL80211_FREQUENCY_ATTR_FREQ = 1
+NL80211_FREQUENCY_ATTR_DISABLED = 2
+
+IFTYPE_MANAGED = 2
+IFTYPE_MONITOR = 6
+iftypes = {0: 'unspecified', 1: 'ibss', 2: 'managed', 3: 'AP', 4: 'AP/VLAN', 5: 'WDS', 6: 'monitor', 7: 'mesh',
+	8: 'P2P-client', 9: 'P2P-GO', 10: 'P2P-device', 11: 'OCB', 12: 'NAN'}
+
+#NL80211_CHAN_WIDTH_* -> MHz, and the legacy NL80211_ATTR_WIPHY_CHANNEL_TYPE values
+CHAN_WIDTH_20_NOHT, CHAN_WIDTH_20, CHAN_WIDTH_40, CHAN_WIDTH_80, CHAN_WIDTH_80P80, CHAN_WIDTH_160, CHAN_WIDTH_5, CHAN_WIDTH_10 = range(8)
+CHAN_WIDTH_320 = 13
+widthmhz = {CHAN_WIDTH_20_NOHT: 20, CHAN_WIDTH_20: 20, CHAN_WIDTH_40: 40, CHAN_WIDTH_80: 80, CHAN_WIDTH_80P80: 80,
+	CHAN_WIDTH_160: 160, CHAN_WIDTH_5: 5, CHAN_WIDTH_10: 10, CHAN_WIDTH_320: 320}
+CHAN_NO_HT, CHAN_HT20, CHAN_HT40MINUS, CHAN_HT40PLUS = range(4)
+
+cachettldefault = 1.0
+recvsize = 1 << 16
+timeoutdefault = 2.0
+
+_nlmsghdr = struct.Struct('=IHHII')
+_genlmsghdr = struct.Struct('=BBH')
+_nlattr = struct.Struct('=HH')
+_ifinfomsg = struct.Struct('=BxHiII')
+_int = struct.Struct('=i')
+_u32 = struct.Struct('=I')
+_u64pair = struct.Struct('=QQ')
+
+
+class NetlinkError(OSError):
+	"""Error reply of a netlink request (errno set)"""
+
+
+########################################################################
+#Message encoding
+
+def _align(n):
+	return (n + 3) & ~3
+
+
+def packattrs(attrs):
+	"""Netlink attributes from [(type, payload bytes)]"""
+	blob = bytearray()
+	for attrtype, payload in attrs:
+		blob += _nlattr.pack(_nlattr.size + len(payload), attrtype) + payload
+		blob += bytes(_align(len(payload)) - len(payload))
+	return bytes(blob)
+
+
+def parseattrs(blob, offset=0):
+	"""{type: payload} of the attributes in blob[offset:], nested / byte order flags masked off"""
+	attrs = {}
+	while offset + _nlattr.size <= len(blob):
+		length, attrtype = _nlattr.unpack_from(blob, offset)
+		if length < _nlattr.size:
+			break
+		attrs[attrtype & NLA_TYPE_MASK] = bytes(blob[offset + _nlattr.size:offset + length])
+		offset += _align(length)
+	return attrs
+
+
+def u32attr(attrtype, value):
+	return (attrtype, _u32.pack(value))
+
+
+def strattr(attrtype, value):
+	return (attrtype, value.encode('utf-8') + b'\0')
+
+
+def u32(payload):
+	return _u32.unpack_from(payload)[0]
+
+
+def string(payload):
+	return payload.split(b'\0', 1)[0].decode('utf-8', 'replace')
+
+
+def packmessage(msgtype, flags, seq, payload, pid=0):
+	padding = bytes(_align(len(payload)) - len(payload))
+	return _nlmsghdr.pack(_nlmsghdr.size + len(payload), msgtype, flags, seq, pid) + payload + padding
+
+
+def parsemessages(data):
+	"""[(type, flags, seq, payload)] of the netlink messages in one datagram"""
+	messages = []
+	offset = 0
+	while offset + _nlmsghdr.size <= len(data):
+		length, msgtype, flags, seq, pid = _nlmsghdr.unpack_from(data, offset)
+		if length < _nlmsghdr.size:
+			break
+		messages.append((msgtype, flags, seq, bytes(data[offset + _nlmsghdr.size:offset + length])))
+		offset += _align(length)
+	return messages
+
+
+def genlpayload(cmd, attrs=()):
+	return _genlmsghdr.pack(cmd, 0, 0) + packattrs(attrs)
+
+
+########################################################################
+#Transports
+
+class SocketTransport:
+	"""Kernel netlink socket of one protocol (NETLINK_GENERIC, NETLINK_ROUTE)"""
+
+	def __init__(self, protocol, timeout=timeoutdefault):
+		self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, protocol)
+		self.sock.settimeout(timeout)
+		self.sock.bind((0, 0))
+
+	def send(self, data):
+		self.sock.send(data)
+
+	def recv(self):
+		return self.sock.recv(recvsize)
+
+	def close(self):
+		self.sock.close()
+
+
+class RecordingTransport:
+	"""Wraps a transport and keeps every exchange (request datagram, reply datagrams) for ReplayTransport"""
+
+	def __init__(self, transport, exchanges):
+		self.transport = transport
+		self.exchanges = exchanges
+
+	def send(self, data):
+		self.exchanges.append({'send': data.hex(), 'recv': []})
+		self.transport.send(data)
+
+	def recv(self):
+		data = self.transport.recv()
+		self.exchanges[-1]['recv'].append(data.hex())
+		return data
+
+	def close(self):
+		self.transport.close()
+
+
+class ReplayTransport:
+	"""Answers from a recorded session; requests must come in the recorded order"""
+
+	def __init__(self, exchanges):
+		self.exchanges = collections.deque(exchanges)
+		self.pending = collections.deque()
+
+	def send(self, data):
+		if not self.exchanges:
+			raise NetlinkError(errno.ENODATA, 'Replay: no more recorded exchanges')
+		exchange = self.exchanges.popleft()
+		if bytes.fromhex(exchange['send']) != data:
+			raise NetlinkError(errno.EPROTO, 'Replay: request differs from the recording')
+		self.pending.extend(bytes.fromhex(reply) for reply in exchange['recv'])
+
+	def recv(self):
+		if not self.pending:
+			raise NetlinkError(errno.EAGAIN, 'Replay: no recorded reply')
+		return self.pending.popleft()
+
+	def close(self):
+		pass
+
+
+class FakeTransport:
+	"""Transport of one protocol onto a FakeResponder"""
+
+	def __init__(self, responder, protocol):
+		self.responder = responder
+		self.protocol = protocol
+		self.pending = collections.deque()
+
+	def send(self, data):
+		self.responder.sends += 1
+		replies = bytearray()
+		for msgtype, flags, seq, payload in parsemessages(data):
+			replies += b''.join(self.responder.handle(self.protocol, msgtype, flags, seq, payload))
+		self.pending.append(bytes(replies))
+
+	def recv(self):
+		if not self.pending:
+			raise NetlinkError(errno.EAGAIN, 'Fake: no reply pending')
+		return self.pending.popleft()
+
+	def close(self):
+		pass
+
+
+########################################################################
+#Request / reply
+
+class Netlink:
+	"""Requests over one transport; a list of requests goes out in a single send"""
+
+	def __init__(self, transport):
+		self.transport = transport
+		self.seq = 1
+		self.roundtrips = 0
+
+	def exchange(self, requests):
+		"""Send [(type, flags, payload)] at once; returns ([[(type, payload)] replies per request], [NetlinkError or None])
+
+		Dump requests (NLM_F_DUMP) end at NLMSG_DONE, the others are sent with NLM_F_ACK and end at
+		their acknowledgement.
+		"""
+		first = self.seq
+		blob = bytearray()
+		for msgtype, flags, payload in requests:
+			flags |= NLM_F_REQUEST if flags & NLM_F_DUMP else NLM_F_REQUEST | NLM_F_ACK
+			blob += packmessage(msgtype, flags, self.seq, payload)
+			self.seq = (self.seq + 1) & 0xffffffff or 1
+		self.transport.send(bytes(blob))
+		self.roundtrips += 1
+		replies = [[] for _ in requests]
+		errors = [None] * len(requests)
+		pending = set(range(len(requests)))
+		while pending:
+			for msgtype, flags, seq, payload in parsemessages(self.transport.recv()):
+				n = (seq - first) & 0xffffffff
+				if n not in pending:
+					continue
+				if msgtype in (NLMSG_ERROR, NLMSG_DONE):
+					code = _int.unpack_from(payload)[0] if len(payload) >= _int.size else 0
+					if code < 0:
+						errors[n] = NetlinkError(-code, os.strerror(-code))
+					pending.discard(n)
+				else:
+					replies[n].append((msgtype, payload))
+		return replies, errors
+
+	def request(self, msgtype, flags, payload):
+		"""Replies of one request; raises NetlinkError"""
+		replies, errors = self.exchange([(msgtype, flags, payload)])
+		if errors[0]:
+			raise errors[0]
+		return replies[0]
+
+	def close(self):
+		self.transport.close()
+
+
+########################################################################
+#Channels
+
+def channelfreq(channel, band=None):
+	"""Centre frequency (MHz) of an IEEE channel number; band 6 for 6 GHz, else 2.4 GHz up to 14, 5 GHz above"""
+	if band == 6:
+		return 5935 if channel == 2 else 5950 + 5 * channel
+	if channel == 14:
+		return 2484
+	if channel < 14:
+		return 2407 + 5 * channel
+	return 5000 + 5 * channel
+
+
+def freqchannel(freq):
+	"""IEEE channel number of a frequency (MHz), 0 when none"""
+	if freq == 2484:
+		return 14
+	if 2412 <= freq < 2484:
+		return (freq - 2407) // 5
+	if freq == 5935:
+		return 2
+	if 5955 <= freq <= 7115:
+		return (freq - 5950) // 5
+	if 4910 <= freq <= 5895:
+		return (freq - 5000) // 5
+	return 0
+
+
+#Start (lowest 20 MHz channel) of the 5 GHz 80 / 160 MHz blocks
+_blocks5ghz = {80: (5180, 5260, 5500, 5580, 5660, 5745, 5825), 160: (5180, 5500, 5745)}
+
+
+def centerfreq(freq, width):
+	"""center1 of a 40/80/160/320 MHz channel holding the 20 MHz channel at freq"""
+	if freq >= 5955:
+		start = 5955 + (freq - 5955) // width * width
+	elif freq >= 5180:
+		blocks = _blocks5ghz[160 if width >= 160 else 80]
+		start = max([block for block in blocks if block <= freq] or [blocks[0]])
+		if width == 40:
+			start += (freq - start) // 40 * 40
+	else:
+		return freq + 10 if width == 40 and freq < 2447 else freq - 10 if width == 40 else freq
+	return start + width // 2 - 10
+
+
+_htmodes = {'NOHT': (CHAN_WIDTH_20_NOHT, CHAN_NO_HT, 0), 'HT20': (CHAN_WIDTH_20, CHAN_HT20, 0),
+	'HT40+': (CHAN_WIDTH_40, CHAN_HT40PLUS, 10), 'HT40-': (CHAN_WIDTH_40, CHAN_HT40MINUS, -10)}
+_widthwords = {'5': CHAN_WIDTH_5, '10': CHAN_WIDTH_10, '20': CHAN_WIDTH_20, '40': CHAN_WIDTH_40, '80': CHAN_WIDTH_80,
+	'80+80': CHAN_WIDTH_80P80, '160': CHAN_WIDTH_160, '320': CHAN_WIDTH_320}
+
+
+def chandef(spec):
+	"""{'freq', 'width', 'center1', 'center2', 'channeltype'} (nl80211 values) of a channel spec (see header)"""
+	words = spec.split()
+	band = None
+	for word in list(words):
+		if word.upper().endswith('GHZ'):
+			band = 6 if word.upper().startswith('6') else None
+			words.remove(word)
+	if not words or not words[0].isdigit():
+		raise ValueError('Bad channel spec: {!r}'.format(spec))
+	number = int(words[0])
+	freq = number if number >= 1000 else channelfreq(number, band)
+	mode = words[1].upper() if len(words) > 1 else 'HT20' if number < 1000 else '20'
+	centers = [int(word) for word in words[2:]]
+	channeltype = None
+	if mode in _htmodes:
+		width, channeltype, offset = _htmodes[mode]
+		center1 = freq + offset
+	else:
+		word = mode[:-3] if mode.endswith('MHZ') else mode
+		if word not in _widthwords:
+			raise ValueError('Bad channel width in {!r}'.format(spec))
+		width = _widthwords[word]
+		if width == CHAN_WIDTH_20:
+			channeltype = CHAN_HT20
+		center1 = centers[0] if centers else freq if widthmhz[width] <= 20 else centerfreq(freq, widthmhz[width])
+	center2 = centers[1] if len(centers) > 1 else 0
+	if width == CHAN_WIDTH_80P80 and not center2:
+		raise ValueError('80+80 needs center1 and center2: {!r}'.format(spec))
+	return {'freq': freq, 'width': width, 'center1': center1, 'center2': center2, 'channeltype': channeltype}
+
+
+def chanattrs(definition):
+	"""SET_WIPHY attributes of a chandef() (legacy channel type too, as iw does, for HT20/40 drivers)"""
+	attrs = [u32attr(NL80211_ATTR_WIPHY_FREQ, definition['freq'])]
+	if definition['channeltype'] is not None:
+		attrs.append(u32attr(NL80211_ATTR_WIPHY_CHANNEL_TYPE, definition['channeltype']))
+	attrs.append(u32attr(NL80211_ATTR_CHANNEL_WIDTH, definition['width']))
+	attrs.append(u32attr(NL80211_ATTR_CENTER_FREQ1, definition['center1']))
+	if definition['center2']:
+		attrs.append(u32attr(NL80211_ATTR_CENTER_FREQ2, definition['center2']))
+	return attrs
+
+
+########################################################################
+#Interface control
+
+def _macstr(payload):
+	return ':'.join('{:02x}'.format(b) for b in payload)
+
+
+def devicedetails(ifname, netdir=multiinject.netdir):
+	"""(driver, adapter) of an interface from sysfs, instead of ethtool -i / airmon-ng"""
+	device = os.path.join(netdir, ifname, 'device')
+	try:
+		driver = os.path.basename(os.readlink(os.path.join(device, 'driver')))
+	except OSError:
+		driver = '-'
+	details = {}
+	for name, path in (('manufacturer', '../manufacturer'), ('product', '../product'), ('vendor', 'vendor'), ('device', 'device')):
+		try:
+			with open(os.path.join(device, path)) as f:
+				details[name] = f.read().strip()
+		except OSError:
+			pass
+	if 'product' in details:
+		adapter = ' '.join(details[name] for name in ('manufacturer', 'product') if name in details)
+	elif 'vendor' in details and 'device' in details:
+		adapter = 'PCI {}:{}'.format(details['vendor'][2:], details['device'][2:])
+	else:
+		adapter = ''
+	return driver, adapter
+
+
+class Nl80211:
+	"""nl80211 + rtnetlink control of the wireless interfaces, batched and cached
+
+	generic / route are transports (SocketTransport by default).  Batch operations take interface
+	names and return {name: NetlinkError} for the ones that failed.
+	"""
+
+	def __init__(self, generic=None, route=None, cachettl=cachettldefault):
+		self.generic = Netlink(generic or SocketTransport(NETLINK_GENERIC))
+		self.route = Netlink(route or SocketTransport(NETLINK_ROUTE))
+		self.cachettl = cachettl
+		self._family = None
+		self._phys = None
+		self._interfaces = None
+		self._cachetime = 0.0
+
+	def close(self):
+		self.generic.close()
+		self.route.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	@property
+	def roundtrips(self):
+		return self.generic.roundtrips + self.route.roundtrips
+
+	def invalidate(self):
+		self._phys = None
+		self._interfaces = None
+
+	def family(self):
+		"""Generic netlink family id of nl80211 (resolved once)"""
+		if self._family is None:
+			try:
+				replies = self.generic.request(GENL_ID_CTRL, 0, genlpayload(CTRL_CMD_GETFAMILY, [strattr(CTRL_ATTR_FAMILY_NAME, 'nl80211')]))
+			except NetlinkError as e:
+				if e.errno == errno.ENOENT:
+					raise NetlinkError(errno.ENOENT, 'nl80211 family not found (cfg80211 not loaded?)')
+				raise
+			self._family = struct.unpack_from('=H', parseattrs(replies[0][1], _genlmsghdr.size)[CTRL_ATTR_FAMILY_ID])[0]
+		return self._family
+
+	def phys(self, refresh=False):
+		"""{phy index: {'name', 'freqs': [enabled MHz]}} in one split wiphy dump"""
+		if self._phys is None or refresh:
+			phys = {}
+			for msgtype, payload in self.generic.request(self.family(), NLM_F_DUMP,
+					genlpayload(NL80211_CMD_GET_WIPHY, [(NL80211_ATTR_SPLIT_WIPHY_DUMP, b'')])):
+				attrs = parseattrs(payload, _genlmsghdr.size)
+				if NL80211_ATTR_WIPHY not in attrs:
+					continue
+				phy = phys.setdefault(u32(attrs[NL80211_ATTR_WIPHY]), {'name': '', 'freqs': set()})
+				if NL80211_ATTR_WIPHY_NAME in attrs:
+					phy['name'] = string(attrs[NL80211_ATTR_WIPHY_NAME])
+				for band in parseattrs(attrs.get(NL80211_ATTR_WIPHY_BANDS, b'')).values():
+					for channel in parseattrs(parseattrs(band).get(NL80211_BAND_ATTR_FREQS, b'')).values():
+						channel = parseattrs(channel)
+						if NL80211_FREQUENCY_ATTR_FREQ in channel and NL80211_FREQUENCY_ATTR_DISABLED not in channel:
+							phy['freqs'].add(u32(channel[NL80211_FREQUENCY_ATTR_FREQ]))
+			for phy in phys.values():
+				phy['freqs'] = sorted(phy['freqs'])
+			self._phys = phys
+		return self._phys
+
+	def links(self):
+		"""{ifname: {'ifindex', 'up', 'operstate', 'mac', 'rx_packets', 'tx_packets'}} of every link, one dump"""
+		links = {}
+		for msgtype, payload in self.route.request(RTM_GETLINK, NLM_F_DUMP, _ifinfomsg.pack(socket.AF_UNSPEC, 0, 0, 0, 0)):
+			if msgtype != RTM_NEWLINK:
+				continue
+			family, linktype, ifindex, flags, change = _ifinfomsg.unpack_from(payload)
+			attrs = parseattrs(payload, _ifinfomsg.size)
+			rx, tx = _u64pair.unpack_from(attrs[IFLA_STATS64]) if len(attrs.get(IFLA_STATS64, b'')) >= _u64pair.size else (0, 0)
+			links[string(attrs.get(IFLA_IFNAME, b''))] = {'ifindex': ifindex, 'up': bool(flags & IFF_UP),
+				'operstate': attrs.get(IFLA_OPERSTATE, b'\0')[0], 'mac': _macstr(attrs.get(IFLA_ADDRESS, b'')),
+				'rx_packets': rx, 'tx_packets': tx}
+		return links
+
+	def interfaces(self, refresh=False):
+		"""{ifname: {'ifindex', 'phy', 'wiphy', 'iftype', 'mode', 'mac', 'freq', 'channel', 'width', 'center1', 'center2',
+		'txpower', 'up', 'rx_packets', 'tx_packets'}} of the nl80211 interfaces, cached for cachettl seconds"""
+		if self._interfaces is not None and not refresh and time.monotonic() - self._cachetime < self.cachettl:
+			return self._interfaces
+		phys = self.phys()
+		links = self.links()
+		interfaces = {}
+		for msgtype, payload in self.generic.request(self.family(), NLM_F_DUMP, genlpayload(NL80211_CMD_GET_INTERFACE)):
+			attrs = parseattrs(payload, _genlmsghdr.size)
+			if NL80211_ATTR_IFNAME not in attrs:
+				continue
+			ifname = string(attrs[NL80211_ATTR_IFNAME])
+			wiphy = u32(attrs[NL80211_ATTR_WIPHY]) if NL80211_ATTR_WIPHY in attrs else -1
+			iftype = u32(attrs.get(NL80211_ATTR_IFTYPE, bytes(4)))
+			freq = u32(attrs[NL80211_ATTR_WIPHY_FREQ]) if NL80211_ATTR_WIPHY_FREQ in attrs else 0
+			entry = {'ifindex': u32(attrs[NL80211_ATTR_IFINDEX]) if NL80211_ATTR_IFINDEX in attrs else 0,
+				'phy': phys.get(wiphy, {}).get('name', 'phy{}'.format(wiphy)), 'wiphy': wiphy,
+				'iftype': iftype, 'mode': iftypes.get(iftype, str(iftype)), 'mac': _macstr(attrs.get(NL80211_ATTR_MAC, b'')),
+				'freq': freq, 'channel': freqchannel(freq),
+				'width': u32(attrs[NL80211_ATTR_CHANNEL_WIDTH]) if NL80211_ATTR_CHANNEL_WIDTH in attrs else -1,
+				'center1': u32(attrs[NL80211_ATTR_CENTER_FREQ1]) if NL80211_ATTR_CENTER_FREQ1 in attrs else 0,
+				'center2': u32(attrs[NL80211_ATTR_CENTER_FREQ2]) if NL80211_ATTR_CENTER_FREQ2 in attrs else 0,
+				'txpower': u32(attrs[NL80211_ATTR_WIPHY_TX_POWER_LEVEL]) / 100 if NL80211_ATTR_WIPHY_TX_POWER_LEVEL in attrs else None}
+			link = links.get(ifname, {})
+			entry.update(up=link.get('up', False), rx_packets=link.get('rx_packets', 0), tx_packets=link.get('tx_packets', 0))
+			interfaces[ifname] = entry
+		self._interfaces = dict(sorted(interfaces.items(), key=lambda item: item[1]['ifindex']))
+		self._cachetime = time.monotonic()
+		return self._interfaces
+
+	def _batch(self, netlink, ifnames, build):
+		"""One send of build(name, interface entry) per interface; (succeeded names, {name: NetlinkError})"""
+		interfaces = self.interfaces()
+		failed = {}
+		names = []
+		requests = []
+		for ifname in ifnames:
+			if ifname not in interfaces:
+				failed[ifname] = NetlinkError(errno.ENODEV, 'No such wireless interface')
+				continue
+			names.append(ifname)
+			requests.append(build(ifname, interfaces[ifname]))
+		if requests:
+			replies, errors = netlink.exchange(requests)
+			for ifname, error in zip(names, errors):
+				if error:
+					failed[ifname] = error
+		return [ifname for ifname in names if ifname not in failed], failed
+
+	def setlink(self, ifnames, up):
+		"""Bring interfaces up or down (ip link set up/down)"""
+		flags = IFF_UP if up else 0
+		done, failed = self._batch(self.route, ifnames,
+			lambda ifname, entry: (RTM_NEWLINK, 0, _ifinfomsg.pack(socket.AF_UNSPEC, 0, entry['ifindex'], flags, IFF_UP)))
+		for ifname in done:
+			self._interfaces[ifname]['up'] = up
+		return failed
+
+	def rename(self, ifname, newname):
+		"""Rename a (down) interface (ip link set name)"""
+		done, failed = self._batch(self.route, [ifname],
+			lambda ifname, entry: (RTM_NEWLINK, 0, _ifinfomsg.pack(socket.AF_UNSPEC, 0, entry['ifindex'], 0, 0) + packattrs([strattr(IFLA_IFNAME, newname)])))
+		if done:
+			self._interfaces[newname] = self._interfaces.pop(ifname)
+		return failed
+
+	def settype(self, ifnames, iftype=IFTYPE_MONITOR):
+		"""Set the interface type: links down, type, links up (one send each for all interfaces)"""
+		wasup = [ifname for ifname in ifnames if self.interfaces().get(ifname, {}).get('up')]
+		failed = self.setlink(wasup, False)
+		done, typefailed = self._batch(self.generic, [ifname for ifname in ifnames if ifname not in failed],
+			lambda ifname, entry: (self.family(), 0, genlpayload(NL80211_CMD_SET_INTERFACE, [u32attr(NL80211_ATTR_IFINDEX, entry['ifindex']), u32attr(NL80211_ATTR_IFTYPE, iftype)])))
+		failed.update(typefailed)
+		for ifname in done:
+			self._interfaces[ifname].update(iftype=iftype, mode=iftypes.get(iftype, str(iftype)))
+		failed.update(self.setlink([ifname for ifname in ifnames if ifname not in failed], True))
+		return failed
+
+	def setmonitor(self, ifnames):
+		return self.settype(ifnames, IFTYPE_MONITOR)
+
+	def addinterface(self, phy, ifname, iftype=IFTYPE_MONITOR, up=True):
+		"""New interface on a phy (iw phy <phy> interface add <ifname> type monitor); phy is its name or index"""
+		wiphy = phy if isinstance(phy, int) else next((index for index, entry in self.phys().items() if entry['name'] == phy), None)
+		if wiphy is None:
+			raise NetlinkError(errno.ENODEV, 'No such phy: {}'.format(phy))
+		self.generic.request(self.family(), 0, genlpayload(NL80211_CMD_NEW_INTERFACE,
+			[u32attr(NL80211_ATTR_WIPHY, wiphy), strattr(NL80211_ATTR_IFNAME, ifname), u32attr(NL80211_ATTR_IFTYPE, iftype)]))
+		self.interfaces(refresh=True)
+		return self.setlink([ifname], True) if up else {}
+
+	def setchannel(self, channels):
+		"""Set {ifname: channel spec or chandef()} in one send (iw dev <ifname> set channel/freq)"""
+		definitions = {ifname: chandef(spec) if isinstance(spec, str) else spec for ifname, spec in channels.items()}
+		done, failed = self._batch(self.generic, list(definitions),
+			lambda ifname, entry: (self.family(), 0, genlpayload(NL80211_CMD_SET_WIPHY, [u32attr(NL80211_ATTR_IFINDEX, entry['ifindex'])] + chanattrs(definitions[ifname]))))
+		for ifname in done:
+			definition = definitions[ifname]
+			self._interfaces[ifname].update(freq=definition['freq'], channel=freqchannel(definition['freq']), width=definition['width'],
+				center1=definition['center1'], center2=definition['center2'])
+		return failed
+
+
+
+def formattable(interfaces, netdir=multiinject.netdir):
+	"""interfaces.sh style table of interfaces()"""
+	lines = ['{:>3s} {:>10s} {:>5s} {:>12s} {:>9s} {:>5s} {:>13s} {:>6s} {:>9s} {:>10s}  {}'.format(
+		'Ndx', 'Iface', 'Phy', 'Driver', 'Mode', 'Up?', 'Channel', 'Width', 'Center', 'Packets', 'Adapter')]
+	for ndx, (ifname, entry) in enumerate(interfaces.items()):
+		driver, adapter = devicedetails(ifname, netdir)
+		channel = '{} ({}MHz)'.format(entry['channel'], entry['freq']) if entry['freq'] else ''
+		width = '{}MHz'.format(widthmhz[entry['width']]) if entry['freq'] and entry['width'] in widthmhz else ''
+		center = '{} MHz'.format(entry['center1']) if entry['freq'] and entry['center1'] else ''
+		lines.append('{:3d} {:>10s} {:>5s} {:>12s} {:>9s} {:>5s} {:>13s} {:>6s} {:>9s} {:10d}  {}'.format(ndx, ifname, entry['phy'],
+			driver, entry['mode'], 'Y' if entry['up'] else 'N', channel, width, center, entry['rx_packets'], adapter))
+	return '\n'.join(lines)
+
+
+########################################################################
+#Fake kernel
+
+class FakeResponder:
+	"""Stand-in for the kernel side of nl80211 / rtnetlink, for tests and dry runs
+
+	phys is {index: {'name', 'freqs'}}, interfaces {ifname: {'ifindex', 'wiphy', 'iftype', 'up', ...}}
+	(missing fields default).  Like cfg80211 it refuses a type change on an interface that is up
+	(EBUSY) and a frequency the phy does not have (EINVAL).  sends counts the datagrams received.
+	"""
+
+	familyid = 0x1c
+
+	def __init__(self, phys, interfaces):
+		self.phys = phys
+		self.interfaces = {}
+		self.sends = 0
+		for ifname, entry in interfaces.items():
+			self._add(ifname, entry)
+
+	@classmethod
+	def example(cls):
+		"""Two phys as on a capture system: phy0 with mon0 + wlan0, phy1 with wlan1"""
+		freqs = [channelfreq(ch) for ch in list(range(1, 14)) + list(range(36, 65, 4)) + list(range(100, 145, 4)) + list(range(149, 178, 4))]
+		return cls({0: {'name': 'phy0', 'freqs': freqs + [channelfreq(ch, 6) for ch in range(1, 234, 4)]}, 1: {'name': 'phy1', 'freqs': freqs}},
+			{'mon0': {'ifindex': 3, 'wiphy': 0, 'iftype': IFTYPE_MONITOR, 'up': True, 'freq': 5745, 'width': CHAN_WIDTH_80, 'center1': 5775},
+			'wlan0': {'ifindex': 4, 'wiphy': 0},
+			'wlan1': {'ifindex': 5, 'wiphy': 1, 'up': True}})
+
+	def transport(self, protocol):
+		return FakeTransport(self, protocol)
+
+	def _add(self, ifname, entry):
+		full = {'ifindex': max([other['ifindex'] for other in self.interfaces.values()] + [1]) + 1, 'wiphy': 0, 'iftype': IFTYPE_MANAGED,
+			'up': False, 'freq': 0, 'width': CHAN_WIDTH_20_NOHT, 'center1': 0, 'center2': 0, 'rx_packets': 0, 'tx_packets': 0,
+			'mac': bytes([0x02, 0, 0, 0, 0, len(self.interfaces)])}
+		full.update(entry)
+		self.interfaces[ifname] = full
+
+	def _byindex(self, ifindex):
+		for ifname, entry in self.interfaces.items():
+			if entry['ifindex'] == ifindex:
+				return ifname, entry
+		raise NetlinkError(errno.ENODEV, os.strerror(errno.ENODEV))
+
+	def handle(self, protocol, msgtype, flags, seq, payload):
+		"""Reply messages (bytes) to one request"""
+		try:
+			if protocol == NETLINK_ROUTE:
+				replies = self._route(msgtype, payload)
+			elif msgtype == GENL_ID_CTRL:
+				replies = self._ctrl(payload)
+			elif msgtype == self.familyid:
+				replies = self._nl80211(payload)
+			else:
+				raise NetlinkError(errno.ENOENT, os.strerror(errno.ENOENT))
+		except NetlinkError as e:
+			return [packmessage(NLMSG_ERROR, 0, seq, _int.pack(-e.errno) + packmessage(msgtype, flags, seq, b'')[:_nlmsghdr.size])]
+		if flags & NLM_F_DUMP:
+			return [packmessage(replytype, NLM_F_MULTI, seq, reply) for replytype, reply in replies] + [packmessage(NLMSG_DONE, NLM_F_MULTI, seq, _int.pack(0))]
+		messages = [packmessage(replytype, 0, seq, reply) for replytype, reply in replies]
+		if flags & NLM_F_ACK:
+			messages.append(packmessage(NLMSG_ERROR, 0, seq, _int.pack(0) + packmessage(msgtype, flags, seq, b'')[:_nlmsghdr.size]))
+		return messages
+
+	def _ctrl(self, payload):
+		if string(parseattrs(payload, _genlmsghdr.size).get(CTRL_ATTR_FAMILY_NAME, b'')) != 'nl80211':
+			raise NetlinkError(errno.ENOENT, os.strerror(errno.ENOENT))
+		return [(GENL_ID_CTRL, genlpayload(1, [(CTRL_ATTR_FAMILY_ID, struct.pack('=H', self.familyid)), strattr(CTRL_ATTR_FAMILY_NAME, 'nl80211')]))]
+
+	def _nl80211(self, payload):
+		cmd = payload[0]
+		attrs = parseattrs(payload, _genlmsghdr.size)
+		if cmd == NL80211_CMD_GET_WIPHY:
+			replies = []
+			for index, phy in self.phys.items():
+				channels = packattrs([(n, packattrs([u32attr(NL80211_FREQUENCY_ATTR_FREQ, freq)])) for n, freq in enumerate(phy['freqs'])])
+				bands = packattrs([(0, packattrs([(NL80211_BAND_ATTR_FREQS, channels)]))])
+				replies.append((self.familyid, genlpayload(NL80211_CMD_NEW_WIPHY, [u32attr(NL80211_ATTR_WIPHY, index),
+					strattr(NL80211_ATTR_WIPHY_NAME, phy['name']), (NL80211_ATTR_WIPHY_BANDS, bands)])))
+			return replies
+		if cmd == NL80211_CMD_GET_INTERFACE:
+			replies = []
+			for ifname, entry in self.interfaces.items():
+				reply = [u32attr(NL80211_ATTR_IFINDEX, entry['ifindex']), strattr(NL80211_ATTR_IFNAME, ifname), u32attr(NL80211_ATTR_WIPHY, entry['wiphy']),
+					u32attr(NL80211_ATTR_IFTYPE, entry['iftype']), (NL80211_ATTR_MAC, entry['mac'])]
+				if entry['freq'] and entry['up']:
+					reply += [u32attr(NL80211_ATTR_WIPHY_FREQ, entry['freq']), u32attr(NL80211_ATTR_CHANNEL_WIDTH, entry['width']),
+						u32attr(NL80211_ATTR_CENTER_FREQ1, entry['center1'])]
+					if entry['center2']:
+						reply.append(u32attr(NL80211_ATTR_CENTER_FREQ2, entry['center2']))
+				replies.append((self.familyid, genlpayload(NL80211_CMD_NEW_INTERFACE, reply)))
+			return replies
+		if cmd == NL80211_CMD_SET_INTERFACE:
+			ifname, entry = self._byindex(u32(attrs[NL80211_ATTR_IFINDEX]))
+			if entry['up']:
+				raise NetlinkError(errno.EBUSY, os.strerror(errno.EBUSY))
+			entry['iftype'] = u32(attrs[NL80211_ATTR_IFTYPE])
+			return []
+		if cmd == NL80211_CMD_SET_WIPHY:
+			ifname, entry = self._byindex(u32(attrs[NL80211_ATTR_IFINDEX]))
+			freq = u32(attrs[NL80211_ATTR_WIPHY_FREQ])
+			if freq not in self.phys[entry['wiphy']]['freqs']:
+				raise NetlinkError(errno.EINVAL, os.strerror(errno.EINVAL))
+			entry.update(freq=freq, width=u32(attrs.get(NL80211_ATTR_CHANNEL_WIDTH, bytes(4))),
+				center1=u32(attrs.get(NL80211_ATTR_CENTER_FREQ1, _u32.pack(freq))), center2=u32(attrs.get(NL80211_ATTR_CENTER_FREQ2, bytes(4))))
+			return []
+		if cmd == NL80211_CMD_NEW_INTERFACE:
+			ifname = string(attrs[NL80211_ATTR_IFNAME])
+			if ifname in self.interfaces:
+				raise NetlinkError(errno.EEXIST, os.strerror(errno.EEXIST))
+			self._add(ifname, {'wiphy': u32(attrs[NL80211_ATTR_WIPHY]), 'iftype': u32(attrs[NL80211_ATTR_IFTYPE])})
+			return []
+		raise NetlinkError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+
+	def _route(self, msgtype, payload):
+		if msgtype == RTM_GETLINK:
+			links = [('lo', {'ifindex': 1, 'up': True, 'mac': bytes(6), 'rx_packets': 0, 'tx_packets': 0})] + list(self.interfaces.items())
+			return [(RTM_NEWLINK, _ifinfomsg.pack(socket.AF_UNSPEC, 0, entry['ifindex'], IFF_UP if entry['up'] else 0, 0) +
+				packattrs([strattr(IFLA_IFNAME, ifname), (IFLA_ADDRESS, entry['mac']), (IFLA_OPERSTATE, bytes([6 if entry['up'] else 2])),
+				(IFLA_STATS64, _u64pair.pack(entry['rx_packets'], entry['tx_packets']) + bytes(8 * 22))])) for ifname, entry in links]
+		if msgtype == RTM_NEWLINK:
+			family, linktype, ifindex, flags, change = _ifinfomsg.unpack_from(payload)
+			ifname, entry = self._byindex(ifindex)
+			newname = parseattrs(payload, _ifinfomsg.size).get(IFLA_IFNAME)
+			if newname:
+				if entry['up']:
+					raise NetlinkError(errno.EBUSY, os.strerror(errno.EBUSY))
+				self.interfaces[string(newname)] = self.interfaces.pop(ifname)
+			if change & IFF_UP:
+				entry['up'] = bool(flags & IFF_UP)
+			return []
+		raise NetlinkError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+
+
+########################################################################
+#Main Routine
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='List and configure wireless interfaces over nl80211/rtnetlink (no iw/ip/ethtool/airmon-ng)')
+	cliargs.add_argument('-i', action='store', default=None, dest='iface', help='Interfaces to configure: comma separated names and/or globs')
+	cliargs.add_argument('-M', action='store_true', default=False, dest='monitor', help='Set monitor mode')
+	cliargs.add_argument('-c', action='store', default=None, dest='channel', help="Channel spec, e.g. '149 80MHz', '11 HT20' or '6935 160 6985'")
+	cliargs.add_argument('-A', action='store', default=None, dest='addmonitor', help='Add a monitor interface mon<N> on these phys (comma separated, e.g. phy0)')
+	cliargs.add_argument('-p', action='store_true', default=False, dest='phys', help='List phys and their enabled frequencies')
+	cliargs.add_argument('-j', action='store_true', default=False, dest='json', help='JSON output')
+	cliargs.add_argument('-R', action='store', default=None, dest='record', help='Record the netlink session to this file')
+	cliargs.add_argument('-P', action='store', default=None, dest='replay', help='Replay a recorded netlink session instead of the kernel')
+	clioptions = cliargs.parse_args()
+
+	try:
+		definition = chandef(clioptions.channel) if clioptions.channel else None
+	except ValueError as e:
+		sys.exit(str(e))
+	if clioptions.replay:
+		with open(clioptions.replay) as f:
+			recorded = json.load(f)
+		generic, route = ReplayTransport(recorded['generic']), ReplayTransport(recorded['route'])
+	else:
+		generic, route = SocketTransport(NETLINK_GENERIC), SocketTransport(NETLINK_ROUTE)
+		if clioptions.record:
+			recording = {'generic': [], 'route': []}
+			generic, route = RecordingTransport(generic, recording['generic']), RecordingTransport(route, recording['route'])
+
+	started = time.monotonic()
+	failures = {}
+	try:
+		with Nl80211(generic, route) as nl:
+			if clioptions.addmonitor:
+				for phy in clioptions.addmonitor.split(','):
+					index = next((index for index, entry in nl.phys().items() if entry['name'] == phy), None)
+					name = 'mon{}'.format(index)
+					failures.update(nl.addinterface(phy, name) if index is not None else {name: NetlinkError(errno.ENODEV, 'No such phy: ' + phy)})
+			ifaces = multiinject.expandifaces(clioptions.iface) if clioptions.iface else []
+			if clioptions.monitor:
+				failures.update(nl.setmonitor(ifaces))
+			if clioptions.channel:
+				failures.update(nl.setchannel({iface: definition for iface in ifaces if iface not in failures}))
+			if clioptions.phys:
+				phys = nl.phys()
+				output = json.dumps(phys, indent=1) if clioptions.json else '\n'.join('{:6s} {} frequencies: {}'.format(phy['name'], len(phy['freqs']),
+					' '.join(str(freq) for freq in phy['freqs'])) for phy in phys.values())
+			else:
+				interfaces = nl.interfaces(refresh=True)
+				output = json.dumps(interfaces, indent=1) if clioptions.json else formattable(interfaces)
+			roundtrips = nl.roundtrips
+	except NetlinkError as e:
+		sys.exit('nl80211: {}'.format(e.strerror))
+	finally:
+		if clioptions.record and not clioptions.replay:
+			with open(clioptions.record, 'w') as f:
+				json.dump(recording, f)
+
+	print(output)
+	for iface, error in failures.items():
+		print('{}: {}'.format(iface, error.strerror))
+	print('{} netlink round trips, {:.1f} ms'.format(roundtrips, 1000 * (time.monotonic() - started)), file=sys.stderr)
+	sys.exit(1 if failures else 0)
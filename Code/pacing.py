@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+#
+#	Pacing engine for frame injection
+#
+#	Frames are sent against an absolute timeline (deadline of frame i measured from the start of
+#	the run) instead of sleeping between frames, so scheduling error does not accumulate.  Waits
+#	sleep until just before the deadline and spin for the rest.  Every send time is recorded and a
+#	run ends with requested vs. achieved rate, inter-frame gap percentiles and missed deadlines.
+#
+#	Schedules
+#		fixed		frame i at i / rate
+#		bucket		token bucket: up to depth frames back to back, then refilled at rate
+#		poisson		exponential inter-frame gaps with mean 1 / rate
+#		airtime		each frame followed by its own channel time / target airtime share (see airtime)
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import math
+import random
+import time
+from array import array
+
+
+schedules = ('fixed', 'bucket', 'poisson', 'airtime')
+#Wake up this long before a deadline and spin the rest of the way
+spinthreshold = 0.002
+#A frame sent later than this after its deadline counts as a missed deadline
+missedthreshold = 0.001
+bucketdepthdefault = 8
+
+
+def fixedrate(rate):
+	"""Deadlines (seconds from start) for a fixed frame rate"""
+	interval = 1.0 / rate
+	i = 0
+	while True:
+		yield i * interval
+		i += 1
+
+
+def tokenbucket(rate, depth=bucketdepthdefault):
+	"""Deadlines for a token bucket holding depth tokens, refilled at rate tokens/s, one token per frame"""
+	interval = 1.0 / rate
+	i = 0
+	while True:
+		yield max(0, i - depth + 1) * interval
+		i += 1
+
+
+def poisson(rate, seed=None):
+	"""Deadlines of a Poisson process with rate frames/s"""
+	rng = random.Random(seed)
+	deadline = 0.0
+	while True:
+		yield deadline
+		deadline += rng.expovariate(rate)
+
+
+def airtimeshare(durations, target):
+	"""Deadlines giving frame i its channel time durations[i] (us, cycled per repeat) in target % of the time"""
+	scale = 1e-6 * 100.0 / target
+	deadline = 0.0
+	while True:
+		for duration in durations:
+			yield deadline
+			deadline += duration * scale
+
+
+def schedule(name, rate, depth=bucketdepthdefault, seed=None, durations=None, target=None):
+	"""Deadline generator for one of schedules; airtime needs durations and target"""
+	if name != 'airtime' and not rate > 0:
+		raise ValueError('The {} schedule needs a rate above 0 frames/s, got {}'.format(name, rate))
+	if name == 'fixed':
+		return fixedrate(rate)
+	if name == 'bucket':
+		return tokenbucket(rate, depth)
+	if name == 'poisson':
+		return poisson(rate, seed)
+	if name == 'airtime':
+		if not durations or not target:
+			raise ValueError('The airtime schedule needs frame durations and a target airtime')
+		return airtimeshare(durations, target)
+	raise ValueError('Unknown schedule {}, expected one of {}'.format(name, ', '.join(schedules)))
+
+
+def waituntil(deadline, clock=time.perf_counter):
+	"""Sleep, then spin, until clock() reaches deadline"""
+	remaining = deadline - clock()
+	if remaining > spinthreshold:
+		time.sleep(remaining - spinthreshold)
+	while clock() < deadline:
+		#sleep(0) drops the GIL so spinning workers on other interfaces are not starved
+		time.sleep(0)
+
+
+def percentile(sortedvalues, pct):
+	"""Nearest-rank percentile of an already sorted sequence"""
+	if not sortedvalues:
+		return 0.0
+	rank = max(0, min(len(sortedvalues) - 1, math.ceil(pct / 100.0 * len(sortedvalues)) - 1))
+	return sortedvalues[rank]
+
+
+def run(frames, send, deadlines, rate, repeat=1, tagger=None, health=None):
+	"""Send frames repeat times through send(frame) following deadlines; returns a PacingStats
+
+	send returns True when the frame was accepted; deadlines is a generator from schedule().
+	With a frametag.FrameTagger, frame i is stamped in place right after its deadline and its
+	buffer is sent instead.  With an adapterhealth.AdapterMonitor, it is checked after every
+	frame: its back-off pauses shift the timeline (no catch-up burst afterwards) and the run ends
+	early when it says to skip.
+	"""
+	stats = PacingStats(rate)
+	clock = time.perf_counter
+	start = clock()
+	for x in range(repeat):
+		for i, frame in enumerate(frames):
+			deadline = start + next(deadlines)
+			waituntil(deadline, clock)
+			sent = clock()
+			if tagger is not None:
+				frame = tagger.tag(i)
+			if send(frame):
+				stats.frames += 1
+				stats.bytes += len(frame)
+			else:
+				stats.errors += 1
+			stats.sendtimes.append(sent - start)
+			stats.lateness.append(sent - deadline)
+			if health is not None:
+				paused = health.paused
+				if not health.check(stats.frames, stats.errors):
+					stats.skipped = True
+					break
+				start += health.paused - paused
+		if stats.skipped:
+			break
+	stats.elapsed = clock() - start
+	return stats
+
+
+class PacingStats:
+	"""Send timeline of one paced run and the summary derived from it"""
+
+	def __init__(self, rate):
+		self.requestedrate = rate
+		self.frames = 0
+		self.bytes = 0
+		self.errors = 0
+		self.skipped = False
+		self.elapsed = 0.0
+		self.sendtimes = array('d')
+		self.lateness = array('d')
+
+	@property
+	def achievedrate(self):
+		"""Frames/s over the span from the first to the last send"""
+		if len(self.sendtimes) < 2:
+			return 0.0
+		span = self.sendtimes[-1] - self.sendtimes[0]
+		return (len(self.sendtimes) - 1) / span if span > 0 else 0.0
+
+	def gaps(self):
+		"""Sorted inter-frame gaps in seconds"""
+		return sorted(b - a for a, b in zip(self.sendtimes, self.sendtimes[1:]))
+
+	def misseddeadlines(self, threshold=missedthreshold):
+		return sum(1 for late in self.lateness if late > threshold)
+
+	def summary(self):
+		"""Dict of the end of run figures"""
+		gaps = self.gaps()
+		lateness = sorted(self.lateness)
+		return {
+			'frames': self.frames,
+			'bytes': self.bytes,
+			'errors': self.errors,
+			'skipped': self.skipped,
+			'elapsed': self.elapsed,
+			'requestedrate': self.requestedrate,
+			'achievedrate': self.achievedrate,
+			'gap_p50': percentile(gaps, 50),
+			'gap_p90': percentile(gaps, 90),
+			'gap_p99': percentile(gaps, 99),
+			'gap_max': gaps[-1] if gaps else 0.0,
+			'late_p50': percentile(lateness, 50),
+			'late_p99': percentile(lateness, 99),
+			'late_max': lateness[-1] if lateness else 0.0,
+			'missed': self.misseddeadlines(),
+		}
+
+	def __str__(self):
+		s = self.summary()
+		return ('{frames} frames ({errors} send errors) in {elapsed:.3f}s\n'
+			'  Rate      requested {requestedrate:.1f} frames/s, achieved {achievedrate:.1f} frames/s\n'
+			'  Gap (ms)  p50 {p50:.3f}  p90 {p90:.3f}  p99 {p99:.3f}  max {max:.3f}\n'
+			'  Late (ms) p50 {l50:.3f}  p99 {l99:.3f}  max {lmax:.3f}\n'
+			'  Missed deadlines (> {thr:.1f} ms late): {missed}{skip}').format(
+				p50=s['gap_p50'] * 1e3, p90=s['gap_p90'] * 1e3, p99=s['gap_p99'] * 1e3, max=s['gap_max'] * 1e3,
+				l50=s['late_p50'] * 1e3, l99=s['late_p99'] * 1e3, lmax=s['late_max'] * 1e3,
+				thr=missedthreshold * 1e3, skip='\n  Rest skipped (adapter health)' if self.skipped else '', **s)
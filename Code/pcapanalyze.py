@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+#
+#	Protoype: pcapanalyze.py [options] <pcapng file> [<pcapng file> ...]
+#
+#	Rollup per capture interface / per type-subtype counts of the injected frames, in one pass.
+#	Replaces pcapfilter.sh, which runs editcap | tshark | tshark once for each of the 43
+#	type_subtype values.  pcapng blocks are read directly: interface names come from the
+#	Interface Description Blocks (no hardcoded mon0/wlan1..4), frames are kept when any of their
+#	addresses is the injection MAC (same as the wlan.addr == 01:23:45:67:89:ab display filter),
+#	and every (interface, type_subtype) count is collected at once.
+#
+#	Counts are by the outer frame control only: a Control Wrapper (0x17) is counted as 0x17, not
+#	also as the frame type it carries (Wireshark matches both).
+#
+#		Example:
+#		./pcapanalyze.py DS1/sys1_wlan1.pcapng
+#		./pcapanalyze.py -j DS1/sys1_wlan1.pcapng DS2/sys1_wlan9.pcapng > counts.json
+#
+#		References
+#		1. https://www.ietf.org/archive/id/draft-ietf-opsawg-pcapng-01.html
+#		2. https://www.radiotap.org/
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+
+injectmac = '01:23:45:67:89:ab'
+#Bumped whenever analyze() would count differently (invalidates cached results)
+analyzerversion = 1
+
+#Type/subtype values under test, same list as pcapfilter.sh
+type_subtype = [
+	0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x08, 0x09, 0x0a, 0x0b, 0x0c, 0x0d, 0x0e,
+	0x12, 0x13, 0x14, 0x15, 0x16, 0x17, 0x18, 0x19, 0x1a, 0x1b, 0x1c, 0x1d, 0x1e, 0x1f,
+	0x20, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x29, 0x2a, 0x2b, 0x2c, 0x2e, 0x2f,
+]
+
+#pcapng block types
+BT_SHB = 0x0A0D0D0A
+BT_IDB = 0x00000001
+BT_PB = 0x00000002
+BT_SPB = 0x00000003
+BT_EPB = 0x00000006
+BYTEORDER_MAGIC = 0x1A2B3C4D
+OPT_ENDOFOPT = 0
+OPT_IF_NAME = 2
+OPT_IF_TSRESOL = 9
+
+#Link types carrying 802.11
+LINKTYPE_IEEE802_11 = 105
+LINKTYPE_IEEE802_11_RADIOTAP = 127
+LINKTYPE_PPI = 192
+
+#Control subtypes that carry only a receiver address (CTS, Ack, Control Wrapper)
+_addr1only = (0x1c, 0x1d, 0x17)
+
+
+class Interface:
+	"""One capture interface from an Interface Description Block"""
+
+	def __init__(self, index, linktype, name, tsresol):
+		self.index = index
+		self.linktype = linktype
+		self.name = name
+		#Timestamp units per second
+		self.tsresol = tsresol
+
+
+def _tsresol(value):
+	"""if_tsresol option byte -> units per second"""
+	if value & 0x80:
+		return 2 ** (value & 0x7f)
+	return 10 ** value
+
+
+class PcapngReader:
+	"""Single pass over the blocks of a pcapng file
+
+	Iterating yields (Interface, timestamp units, packet bytes) for every packet block;
+	interfaces lists every interface seen so far (across all sections, in file order).
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self.interfaces = []
+
+	def __iter__(self):
+		with open(self.path, 'rb') as f:
+			try:
+				data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+			except ValueError:
+				#Empty file
+				return
+			try:
+				yield from self._blocks(data)
+			finally:
+				data.close()
+
+	def _blocks(self, data):
+		offset = 0
+		end = len(data)
+		endian = '<'
+		section = []
+		u32 = struct.Struct('<I')
+		epbheader = struct.Struct('<IIIII')
+		while offset + 12 <= end:
+			blocktype = u32.unpack_from(data, offset)[0]
+			if blocktype == BT_SHB:
+				#Byte order applies to the whole section, including this block's length
+				magic = struct.unpack_from('<I', data, offset + 8)[0]
+				endian = '<' if magic == BYTEORDER_MAGIC else '>'
+				u32 = struct.Struct(endian + 'I')
+				epbheader = struct.Struct(endian + 'IIIII')
+				section = []
+			blocklen = u32.unpack_from(data, offset + 4)[0]
+			if blocklen < 12 or offset + blocklen > end:
+				#Truncated capture: stop at the last complete block
+				break
+			if blocktype == BT_EPB:
+				ifid, tshigh, tslow, caplen, origlen = epbheader.unpack_from(data, offset + 8)
+				if ifid < len(section):
+					yield section[ifid], (tshigh << 32) | tslow, data[offset + 28:offset + 28 + caplen]
+			elif blocktype == BT_IDB:
+				interface = self._interface(data, offset, blocklen, endian)
+				section.append(interface)
+				self.interfaces.append(interface)
+			elif blocktype == BT_SPB:
+				if section:
+					origlen = u32.unpack_from(data, offset + 8)[0]
+					caplen = min(origlen, blocklen - 16)
+					yield section[0], 0, data[offset + 12:offset + 12 + caplen]
+			elif blocktype == BT_PB:
+				ifid, drops, tshigh, tslow, caplen, origlen = struct.unpack_from(endian + 'HHIIII', data, offset + 8)
+				if ifid < len(section):
+					yield section[ifid], (tshigh << 32) | tslow, data[offset + 28:offset + 28 + caplen]
+			offset += blocklen
+
+	def _interface(self, data, offset, blocklen, endian):
+		linktype, reserved, snaplen = struct.unpack_from(endian + 'HHI', data, offset + 8)
+		name = None
+		tsresol = 10 ** 6
+		optoffset = offset + 16
+		optend = offset + blocklen - 4
+		while optoffset + 4 <= optend:
+			code, length = struct.unpack_from(endian + 'HH', data, optoffset)
+			if code == OPT_ENDOFOPT:
+				break
+			value = data[optoffset + 4:optoffset + 4 + length]
+			if code == OPT_IF_NAME:
+				name = value.decode('utf-8', 'replace').rstrip('\x00')
+			elif code == OPT_IF_TSRESOL and length >= 1:
+				tsresol = _tsresol(value[0])
+			optoffset += 4 + ((length + 3) & ~3)
+		index = len(self.interfaces)
+		return Interface(index, linktype, name or 'if{}'.format(index), tsresol)
+
+
+def dot11offset(linktype, packet):
+	"""Offset of the 802.11 header in a packet of the given link type, or -1 if not 802.11"""
+	if linktype == LINKTYPE_IEEE802_11_RADIOTAP or linktype == LINKTYPE_PPI:
+		if len(packet) < 4:
+			return -1
+		return packet[2] | (packet[3] << 8)
+	if linktype == LINKTYPE_IEEE802_11:
+		return 0
+	return -1
+
+
+def frameaddresses(fc0, packet, offset):
+	"""Address fields present in an 802.11 frame (as Wireshark dissects them), as byte slices"""
+	frametype = (fc0 >> 2) & 0x3
+	ts = ((fc0 >> 2) & 0x3) << 4 | (fc0 >> 4)
+	addresses = [packet[offset + 4:offset + 10]]
+	if frametype == 1 and ts in _addr1only:
+		return addresses
+	addresses.append(packet[offset + 10:offset + 16])
+	if frametype != 1:
+		addresses.append(packet[offset + 16:offset + 22])
+	return addresses
+
+
+def macbytes(mac):
+	return bytes(int(octet, 16) for octet in mac.split(':'))
+
+
+def analyze(path, addr=injectmac):
+	"""Count frames to/from addr per capture interface and type_subtype in one pass over path
+
+	Returns {'file', 'packets', 'matched', 'interfaces': [names], 'counts': {name: {type_subtype: n}}}
+	"""
+	mac = macbytes(addr)
+	reader = PcapngReader(path)
+	counts = {}
+	packets = 0
+	matched = 0
+	for interface, timestamp, packet in reader:
+		packets += 1
+		offset = dot11offset(interface.linktype, packet)
+		if offset < 0 or len(packet) < offset + 10:
+			continue
+		fc0 = packet[offset]
+		if mac not in frameaddresses(fc0, packet, offset):
+			continue
+		ts = ((fc0 >> 2) & 0x3) << 4 | (fc0 >> 4)
+		perinterface = counts.setdefault(interface.name, {})
+		perinterface[ts] = perinterface.get(ts, 0) + 1
+		matched += 1
+	names = []
+	for interface in reader.interfaces:
+		if interface.name not in names:
+			names.append(interface.name)
+	return {'file': path, 'packets': packets, 'matched': matched, 'interfaces': names,
+		'counts': {name: counts.get(name, {}) for name in names}}
+
+
+def formatmatrix(result):
+	"""Text rollup in the layout of pcapfilter.sh output"""
+	names = result['interfaces']
+	widths = [max(6, len(name)) for name in names]
+	lines = []
+	lines.append('Frame counts per Type/Subtype and capture device')
+	lines.append('File: [{}] with Total Number of packets: {}'.format(result['file'], result['packets']))
+	lines.append('Type/Subtype | {:>6s} | '.format('Total') + ''.join('{:>{}s} | '.format(name, width) for name, width in zip(names, widths)))
+	seen = set()
+	for perinterface in result['counts'].values():
+		seen.update(perinterface)
+	for ts in type_subtype + sorted(seen - set(type_subtype)):
+		row = [result['counts'][name].get(ts, 0) for name in names]
+		lines.append(' [{:>8s}] | {:6d} | '.format('0x{:02x}'.format(ts), sum(row)) + ''.join('{:{}d} | '.format(n, width) for n, width in zip(row, widths)))
+	return '\n'.join(lines)
+
+
+def tojson(result):
+	"""JSON-safe copy of an analyze() result (type_subtype keys as '0x..' strings)"""
+	copy = dict(result)
+	copy['counts'] = {name: {'0x{:02x}'.format(ts): n for ts, n in sorted(perinterface.items())}
+		for name, perinterface in result['counts'].items()}
+	return copy
+
+
+def fromjson(data):
+	"""analyze() result from its tojson() form"""
+	copy = dict(data)
+	copy['counts'] = {name: {int(ts, 16): n for ts, n in perinterface.items()}
+		for name, perinterface in data['counts'].items()}
+	return copy
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Per capture interface / type-subtype counts of injected frames in pcapng files')
+	cliargs.add_argument('files', nargs='+', help='pcapng capture file(s)')
+	cliargs.add_argument('-a', action='store', default=injectmac, dest='addr', help='Injection MAC address default: ' + injectmac)
+	cliargs.add_argument('-j', action='store_true', default=False, dest='json', help='JSON output')
+	clioptions = cliargs.parse_args()
+
+	results = [analyze(path, clioptions.addr) for path in clioptions.files]
+	if clioptions.json:
+		json.dump([tojson(result) for result in results], sys.stdout, indent=1)
+		print()
+	else:
+		for result in results:
+			print(formatmatrix(result))
+			print()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+#
+#	Protoype: pcapbatch.py [options] <dataset dir or pcapng> [...]
+#
+#	Analyze every pcapng capture of one or more dataset directories (DS1/, DS2/, ...) in parallel
+#	on all cores with pcapanalyze, and merge the per-file matrices into one
+#	injector x capture interface x type_subtype result.  Replaces
+#		for file in $(ls DS1/); do ./pcapfilter.sh DS1/${file}; done | tee ...
+#	followed by grep/cut on the text.
+#
+#	Per-file results are cached next to the captures (see analysiscache), so re-running after a
+#	capture was added only parses that one.
+#
+#	The injector is the capture file name without extension (sys1_wlan1.pcapng -> sys1_wlan1); the
+#	captures of one injector across datasets/bands are summed, as in Analysis_DS1_DS2_abg.md.
+#
+#		Example:
+#		./pcapbatch.py DS1/ DS2/
+#		./pcapbatch.py -j -o DS1_DS2.json DS1/ DS2/
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import concurrent.futures
+import functools
+import json
+import os
+import sys
+
+import analysiscache
+import pcapanalyze
+
+
+def capturefiles(paths):
+	"""pcapng files named by paths: files as given, directories listed (not recursive), sorted"""
+	files = []
+	for path in paths:
+		if os.path.isdir(path):
+			files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+				if name.endswith('.pcapng') and os.path.isfile(os.path.join(path, name))))
+		else:
+			files.append(path)
+	return files
+
+
+def injectorname(path):
+	"""Injection interface a capture belongs to, from its file name"""
+	return os.path.basename(path).split('.')[0]
+
+
+def analyzeall(files, addr=pcapanalyze.injectmac, workers=None, cache=True):
+	"""pcapanalyze.analyze() every file on a process pool; returns the results in files order
+
+	With cache, results are taken from / added to the analysiscache of each capture's directory
+	and only new or changed captures are parsed.  Returns (results, number of cached results).
+	"""
+	if not files:
+		return [], 0
+	results = [None] * len(files)
+	caches = analysiscache.cachesfor(files) if cache else {}
+	pending = []
+	for i, path in enumerate(files):
+		if cache:
+			results[i] = caches[os.path.dirname(os.path.abspath(path))].lookup(path, addr)
+		if results[i] is None:
+			pending.append(i)
+	workers = min(workers or os.cpu_count() or 1, max(len(pending), 1))
+	analyzefile = functools.partial(analysiscache.analyzestamped, addr=addr)
+	if workers == 1:
+		analyzed = [analyzefile(files[i]) for i in pending]
+	else:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+			analyzed = list(pool.map(analyzefile, [files[i] for i in pending]))
+	for i, (result, stamp) in zip(pending, analyzed):
+		results[i] = result
+		if cache:
+			caches[os.path.dirname(os.path.abspath(files[i]))].store(files[i], addr, result, stamp)
+	for directorycache in caches.values():
+		directorycache.save()
+	return results, len(files) - len(pending)
+
+
+def merge(results):
+	"""Merge per-file results into {'injectors', 'interfaces', 'files', 'counts': {injector: {iface: {ts: n}}}}"""
+	injectors = []
+	interfaces = []
+	counts = {}
+	files = {}
+	for result in results:
+		injector = injectorname(result['file'])
+		if injector not in injectors:
+			injectors.append(injector)
+		files.setdefault(injector, []).append(result['file'])
+		perinjector = counts.setdefault(injector, {})
+		for iface in result['interfaces']:
+			if iface not in interfaces:
+				interfaces.append(iface)
+			periface = perinjector.setdefault(iface, {})
+			for ts, n in result['counts'][iface].items():
+				periface[ts] = periface.get(ts, 0) + n
+	for perinjector in counts.values():
+		for iface in interfaces:
+			perinjector.setdefault(iface, {})
+	return {'injectors': injectors, 'interfaces': interfaces, 'files': files, 'counts': counts}
+
+
+def formatmerged(merged, results):
+	"""One pcapanalyze text matrix per injector"""
+	packets = {}
+	for result in results:
+		injector = injectorname(result['file'])
+		packets[injector] = packets.get(injector, 0) + result['packets']
+	blocks = []
+	for injector in merged['injectors']:
+		blocks.append(pcapanalyze.formatmatrix({
+			'file': '{} ({} file(s): {})'.format(injector, len(merged['files'][injector]), ', '.join(merged['files'][injector])),
+			'packets': packets[injector],
+			'interfaces': merged['interfaces'],
+			'counts': merged['counts'][injector],
+		}))
+	return '\n\n'.join(blocks)
+
+
+def tojson(merged, results):
+	"""JSON-safe merged result plus the per-file results"""
+	return {
+		'injectors': merged['injectors'],
+		'interfaces': merged['interfaces'],
+		'files': merged['files'],
+		'counts': {injector: {iface: {'0x{:02x}'.format(ts): n for ts, n in sorted(periface.items())}
+			for iface, periface in perinjector.items()} for injector, perinjector in merged['counts'].items()},
+		'perfile': [pcapanalyze.tojson(result) for result in results],
+	}
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Parallel per injector / capture interface / type-subtype counts over dataset directories')
+	cliargs.add_argument('paths', nargs='+', help='Dataset directories (e.g. DS1/ DS2/) and/or pcapng files')
+	cliargs.add_argument('-a', action='store', default=pcapanalyze.injectmac, dest='addr', help='Injection MAC address default: ' + pcapanalyze.injectmac)
+	cliargs.add_argument('-w', action='store', type=int, default=None, dest='workers', help='Worker processes default: all cores')
+	cliargs.add_argument('-n', action='store_false', default=True, dest='cache', help='Do not use/update the per-directory analysis cache')
+	cliargs.add_argument('-j', action='store_true', default=False, dest='json', help='JSON output')
+	cliargs.add_argument('-o', action='store', default=None, dest='output', help='Write output to this file instead of stdout')
+	clioptions = cliargs.parse_args()
+
+	files = capturefiles(clioptions.paths)
+	results, cached = analyzeall(files, clioptions.addr, clioptions.workers, clioptions.cache)
+	print('{} capture(s): {} from cache, {} analyzed'.format(len(files), cached, len(files) - cached), file=sys.stderr)
+	merged = merge(results)
+	out = open(clioptions.output, 'w') if clioptions.output else sys.stdout
+	if clioptions.json:
+		json.dump(tojson(merged, results), out, indent=1)
+		out.write('\n')
+	else:
+		out.write(formatmerged(merged, results) + '\n')
+	if clioptions.output:
+		out.close()
@@ -1,5 +1,8 @@
 #!/bin/bash +x
 
+#
+#	Superseded by pcapanalyze.py (single pass, no tshark, interface names from the capture):
+#		./pcapanalyze.py <pcap file>
 #
 #	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 
@@ -34,6 +37,7 @@ done
 echo
 
 
+#Whole datasets in parallel, merged per injector: ./pcapbatch.py DS1/ DS2/
 #for file in $(ls DS1/); do echo $file; ./pcapfilter.sh DS1/${file};  done | tee DS1_5GHz_abg_2.txt
 #for file in $(ls DS2/); do echo $file; ./pcapfilter.sh DS2/${file};  done | tee DS2_24GHz_abg_2.txt
 
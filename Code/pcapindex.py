@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+#
+#	Protoype: pcapindex.py [options] <pcapng file> [<pcapng file> ...]
+#
+#	Columnar per-frame index of a capture.  The pcapng is decoded once into NumPy arrays, one
+#	value per packet, saved next to it as <capture>.idx.npz; later questions (which rates, which
+#	interface, which tags) are answered with vectorized operations on the arrays instead of another
+#	tshark/pcapanalyze pass over mostly background traffic.  The index is rebuilt when the capture's
+#	size or mtime changes, or when the column set (indexversion) changes.
+#
+#	Columns
+#		time		uint64	capture timestamp, ns since the epoch
+#		ifid		uint16	capture interface (index into interfaces)
+#		type_subtype	uint8	(type << 4) | subtype, 0xff when not 802.11
+#		addr1..addr3	uint64	addresses as 48 bit integers, 0 when the frame does not carry it
+#		length		uint32	802.11 frame length (after RadioTap)
+#		rate		uint8	RadioTap Rate, 500 kbit/s units, 0 absent
+#		antsignal	int8	RadioTap dBm antenna signal, -128 absent
+#		freq		uint16	RadioTap channel MHz, 0 absent
+#		flags		uint8	RadioTap flags
+#		phy, mcs, nss, bw, gi	observed PHY / MCS / streams / MHz / guard interval (see radiotap.decode)
+#		iemod		int16	modulation index named in the Vendor Specific IE, -1 none
+#		ieiface		int16	injection interface named in the Vendor Specific IE (index into injectors), -1 none
+#		tagmod		int16	frametag modulation index, -1 when the frame carries no tag
+#		runid, seq	uint32	frametag run id and sequence number
+#		txtime		uint64	frametag transmit timestamp, ns
+#
+#		Example:
+#		./pcapindex.py DS1/sys1_wlan1.pcapng
+#		./pcapindex.py -r DS1/*.pcapng
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import os
+import time
+
+import numpy
+
+import dot11catalog
+import frametag
+import pcapanalyze
+import radiotap
+
+
+indexversion = 3
+indexsuffix = '.idx.npz'
+notdot11 = 0xff
+
+columns = {
+	'time': numpy.uint64,
+	'ifid': numpy.uint16,
+	'type_subtype': numpy.uint8,
+	'addr1': numpy.uint64,
+	'addr2': numpy.uint64,
+	'addr3': numpy.uint64,
+	'length': numpy.uint32,
+	'iemod': numpy.int16,
+	'ieiface': numpy.int16,
+	'tagmod': numpy.int16,
+	'runid': numpy.uint32,
+	'seq': numpy.uint32,
+	'txtime': numpy.uint64,
+}
+
+
+def indexfile(path):
+	"""Path of the index of capture path"""
+	return path + indexsuffix
+
+
+def macint(mac):
+	"""'01:23:45:67:89:ab' -> 48 bit integer as stored in the addr columns"""
+	return int.from_bytes(pcapanalyze.macbytes(mac), 'big')
+
+
+def _stamp(path):
+	st = os.stat(path)
+	return numpy.array([indexversion, st.st_size, st.st_mtime_ns], numpy.int64)
+
+
+def build(path):
+	"""Decode capture path into {column: array}, plus 'interfaces', 'injectors' (names) and 'stamp'"""
+	rows = {name: [] for name in columns}
+	injectors = {}
+	headers = []
+	reader = pcapanalyze.PcapngReader(path)
+	for interface, timestamp, packet in reader:
+		rows['time'].append(timestamp * 1000000000 // interface.tsresol)
+		rows['ifid'].append(interface.index)
+		offset = pcapanalyze.dot11offset(interface.linktype, packet)
+		headers.append(packet[:offset] if interface.linktype == pcapanalyze.LINKTYPE_IEEE802_11_RADIOTAP and offset > 0 else b'')
+		tag = None
+		iemod = -1
+		ieiface = -1
+		if offset < 0 or len(packet) < offset + 10:
+			rows['type_subtype'].append(notdot11)
+			addresses = []
+			rows['length'].append(0)
+		else:
+			fc0 = packet[offset]
+			rows['type_subtype'].append(((fc0 >> 2) & 0x3) << 4 | (fc0 >> 4))
+			addresses = pcapanalyze.frameaddresses(fc0, packet, offset)
+			rows['length'].append(len(packet) - offset)
+			vendor = dot11catalog.parsevendorelement(packet, offset + 10)
+			if vendor:
+				ieiface = injectors.setdefault(vendor[0], len(injectors))
+				if vendor[1] in dot11catalog.radiomodulation:
+					iemod = dot11catalog.modulationindex(vendor[1])
+			tagoffset = frametag.findtag(packet)
+			if tagoffset > offset:
+				tag = frametag.parsetag(packet, tagoffset)
+		for i, name in enumerate(('addr1', 'addr2', 'addr3')):
+			rows[name].append(int.from_bytes(addresses[i], 'big') if i < len(addresses) and len(addresses[i]) == 6 else 0)
+		rows['iemod'].append(iemod)
+		rows['ieiface'].append(ieiface)
+		modindex, runid, seq, txtime = tag if tag else (-1, 0, 0, 0)
+		rows['tagmod'].append(modindex)
+		rows['runid'].append(runid)
+		rows['seq'].append(seq)
+		rows['txtime'].append(txtime)
+	index = {name: numpy.array(values, dtype) for (name, values), dtype in zip(rows.items(), columns.values())}
+	index.update(radiotap.decode(headers))
+	index['interfaces'] = numpy.array([interface.name for interface in reader.interfaces] or [''])
+	index['injectors'] = numpy.array(list(injectors) or [''])
+	index['stamp'] = _stamp(path)
+	return index
+
+
+def save(path, index):
+	"""Write index of capture path next to it; replaces atomically"""
+	target = indexfile(path)
+	tmppath = '{}.{}.tmp.npz'.format(target, os.getpid())
+	numpy.savez(tmppath, **index)
+	os.replace(tmppath, target)
+
+
+def load(path, rebuild=False):
+	"""Index of capture path, from its .idx.npz when current, else built (and saved when possible)"""
+	if not rebuild:
+		try:
+			with numpy.load(indexfile(path)) as stored:
+				if numpy.array_equal(stored['stamp'], _stamp(path)):
+					return {name: stored[name] for name in stored.files}
+		except (OSError, KeyError, ValueError):
+			pass
+	index = build(path)
+	try:
+		save(path, index)
+	except OSError as e:
+		print('Index not written ({}): {}'.format(indexfile(path), e))
+	return index
+
+
+def addrmask(index, addr=pcapanalyze.injectmac):
+	"""Frames carrying addr in any address field (as the wlan.addr filter)"""
+	mac = numpy.uint64(macint(addr))
+	return (index['addr1'] == mac) | (index['addr2'] == mac) | (index['addr3'] == mac)
+
+
+def counts(index, mask=None):
+	"""{interface name: {type_subtype: n}} of the frames selected by mask (all frames when None)"""
+	key = index['ifid'].astype(numpy.uint32) << 8 | index['type_subtype']
+	if mask is not None:
+		key = key[mask]
+	keys, n = numpy.unique(key, return_counts=True)
+	names = [str(name) for name in index['interfaces']]
+	result = {name: {} for name in names}
+	for k, c in zip(keys.tolist(), n.tolist()):
+		result[names[k >> 8]][k & 0xff] = c
+	return result
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Build/refresh the columnar per-frame index (.idx.npz) of pcapng captures')
+	cliargs.add_argument('files', nargs='+', help='pcapng capture file(s)')
+	cliargs.add_argument('-r', action='store_true', default=False, dest='rebuild', help='Rebuild even if the index is current')
+	cliargs.add_argument('-a', action='store', default=pcapanalyze.injectmac, dest='addr', help='Injection MAC address for the summary default: ' + pcapanalyze.injectmac)
+	clioptions = cliargs.parse_args()
+
+	for path in clioptions.files:
+		start = time.perf_counter()
+		index = load(path, clioptions.rebuild)
+		elapsed = time.perf_counter() - start
+		mask = addrmask(index, clioptions.addr)
+		print('{}: {} frames, {} to/from {}, {} tagged  ({:.3f}s)'.format(
+			path, len(index['time']), int(mask.sum()), clioptions.addr, int((index['tagmod'] >= 0).sum()), elapsed))
+		for ifid, name in enumerate(index['interfaces']):
+			selected = mask & (index['ifid'] == ifid)
+			if not selected.any():
+				continue
+			rates, n = numpy.unique(index['rate'][selected], return_counts=True)
+			signal = index['antsignal'][selected]
+			signal = signal[signal != radiotap.absent['antsignal']]
+			print('  {:8s} {:5d} frames  rates(Mbps) {}  signal(dBm) {}'.format(
+				str(name), int(selected.sum()),
+				' '.join('{:g}:{}'.format(r / 2, c) for r, c in zip(rates.tolist(), n.tolist())),
+				'{}..{}'.format(signal.min(), signal.max()) if len(signal) else '-'))
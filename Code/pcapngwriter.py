@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+#
+#	Minimal buffered pcapng writer
+#
+#	One Section Header Block, one Interface Description Block per interface (if_name, and
+#	if_tsresol = 9 so timestamps are in ns), then Enhanced Packet Blocks.  Blocks are accumulated
+#	in memory and written in large chunks.  Output opens in Wireshark/tshark and in
+#	pcapanalyze.PcapngReader.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import struct
+
+import pcapanalyze
+
+
+flushsizedefault = 1 << 20
+_blockheader = struct.Struct('<II')
+_epbheader = struct.Struct('<IIIIIII')
+
+
+def _option(code, value):
+	return struct.pack('<HH', code, len(value)) + value + b'\x00' * (-len(value) % 4)
+
+
+def _block(blocktype, body):
+	length = 12 + len(body)
+	return _blockheader.pack(blocktype, length) + body + struct.pack('<I', length)
+
+
+class PcapngWriter:
+	"""Write packets of several interfaces to one pcapng file
+
+	addinterface(name, linktype) returns the interface id to pass to write(); timestamps are ns.
+	"""
+
+	def __init__(self, path, flushsize=flushsizedefault, application='CaptureTest'):
+		self.path = path
+		self.flushsize = flushsize
+		self.file = open(path, 'wb')
+		self.buffer = bytearray()
+		self.interfaces = {}
+		self.packets = 0
+		shbopts = _option(4, application.encode('utf-8')) + _option(pcapanalyze.OPT_ENDOFOPT, b'')
+		self.buffer += _block(pcapanalyze.BT_SHB, struct.pack('<IHHq', pcapanalyze.BYTEORDER_MAGIC, 1, 0, -1) + shbopts)
+
+	def addinterface(self, name, linktype=pcapanalyze.LINKTYPE_IEEE802_11_RADIOTAP, snaplen=65535):
+		"""Interface id for name, writing its Interface Description Block the first time"""
+		if name not in self.interfaces:
+			options = _option(pcapanalyze.OPT_IF_NAME, name.encode('utf-8')) + _option(pcapanalyze.OPT_IF_TSRESOL, b'\x09') + _option(pcapanalyze.OPT_ENDOFOPT, b'')
+			self.buffer += _block(pcapanalyze.BT_IDB, struct.pack('<HHI', linktype, 0, snaplen) + options)
+			self.interfaces[name] = len(self.interfaces)
+		return self.interfaces[name]
+
+	def write(self, ifid, timestamp, packet):
+		"""Append one packet of interface ifid captured/sent at timestamp (ns)"""
+		caplen = len(packet)
+		pad = -caplen % 4
+		length = 32 + caplen + pad
+		buffer = self.buffer
+		buffer += _epbheader.pack(pcapanalyze.BT_EPB, length, ifid, timestamp >> 32, timestamp & 0xffffffff, caplen, caplen)
+		buffer += packet
+		buffer += b'\x00' * pad
+		buffer += struct.pack('<I', length)
+		self.packets += 1
+		if len(buffer) >= self.flushsize:
+			self.flush()
+
+	def flush(self):
+		if self.buffer:
+			self.file.write(self.buffer)
+			self.buffer = bytearray()
+		self.file.flush()
+
+	def close(self):
+		if not self.file.closed:
+			self.flush()
+			self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+#
+#	Bulk RadioTap header decoder: Rate, MCS, VHT and HE fields, signal and channel
+#
+#	The position of every RadioTap field only depends on the present bitmask words (fields are
+#	packed in bit order, each aligned to its natural size, from the end of the present words).
+#	A capture interface therefore produces a handful of distinct layouts: field offsets are worked
+#	out once per layout, the headers sharing a layout are stacked into one 2D byte array and each
+#	field is read as a column for all of them at once.
+#
+#	Only the first (default) radiotap namespace is decoded; per-chain fields in the extra
+#	namespaces (Linux adds one per antenna) are skipped.
+#
+#		References
+#		1. https://www.radiotap.org/fields/defined
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import functools
+import struct
+
+import numpy
+
+
+#Present bit: (name, alignment, size)
+fields = {
+	0: ('tsft', 8, 8),
+	1: ('flags', 1, 1),
+	2: ('rate', 1, 1),
+	3: ('channel', 2, 4),
+	4: ('fhss', 1, 2),
+	5: ('antsignal', 1, 1),
+	6: ('antnoise', 1, 1),
+	7: ('lockquality', 2, 2),
+	8: ('txattenuation', 2, 2),
+	9: ('dbtxattenuation', 2, 2),
+	10: ('dbmtxpower', 1, 1),
+	11: ('antenna', 1, 1),
+	12: ('dbantsignal', 1, 1),
+	13: ('dbantnoise', 1, 1),
+	14: ('rxflags', 2, 2),
+	15: ('txflags', 2, 2),
+	16: ('rtsretries', 1, 1),
+	17: ('dataretries', 1, 1),
+	18: ('xchannel', 4, 8),
+	19: ('mcs', 1, 3),
+	20: ('ampdu', 4, 8),
+	21: ('vht', 2, 12),
+	22: ('timestamp', 8, 12),
+	23: ('he', 2, 12),
+	24: ('hemu', 2, 12),
+	25: ('hemuuser', 2, 6),
+	26: ('zerolenpsdu', 1, 1),
+	27: ('lsig', 2, 4),
+}
+BIT_RADIOTAP_NS = 29
+BIT_VENDOR_NS = 30
+BIT_EXT = 31
+
+#Flags field
+FLAG_FCS = 0x10
+
+#MCS field: known bits, flags
+MCS_KNOWN_BW = 0x01
+MCS_KNOWN_MCS = 0x02
+MCS_KNOWN_GI = 0x04
+MCS_FLAG_BW = 0x03
+MCS_FLAG_SGI = 0x04
+
+#VHT field: known bits, flags
+VHT_KNOWN_GI = 0x0004
+VHT_KNOWN_BW = 0x0040
+VHT_FLAG_SGI = 0x04
+
+#HE field: known bits (data1, data2) and value positions (data3, data5, data6)
+HE_DATA1_MCS_KNOWN = 0x0020
+HE_DATA1_BW_KNOWN = 0x4000
+HE_DATA2_GI_KNOWN = 0x0002
+
+#PHY of the frame, from the most specific field present
+PHY_NONE = 0
+PHY_LEGACY = 1
+PHY_HT = 2
+PHY_VHT = 3
+PHY_HE = 4
+phynames = ('none', 'legacy', 'HT', 'VHT', 'HE')
+
+#Bandwidth MHz by code: MCS flags (20L/20U are 20), VHT bandwidth, HE data5
+htbandwidths = numpy.array([20, 40, 20, 20], numpy.int16)
+vhtbandwidths = numpy.array([20, 40, 40, 40, 80, 80, 80, 80, 80, 80, 80] + [160] * 15 + [-1] * 6, numpy.int16)
+hebandwidths = numpy.array([20, 40, 80, 160] + [-1] * 12, numpy.int16)
+
+#Values for absent fields
+absent = {'rate': 0, 'antsignal': -128, 'freq': 0, 'flags': 0, 'phy': PHY_NONE, 'mcs': -1, 'nss': -1, 'bw': -1, 'gi': -1}
+dtypes = {'rate': numpy.uint8, 'antsignal': numpy.int8, 'freq': numpy.uint16, 'flags': numpy.uint8,
+	'phy': numpy.uint8, 'mcs': numpy.int8, 'nss': numpy.int8, 'bw': numpy.int16, 'gi': numpy.int8}
+
+_u32 = struct.Struct('<I')
+
+
+def presentwords(header):
+	"""Present bitmask words of a RadioTap header, as a tuple"""
+	words = []
+	offset = 4
+	while offset + 4 <= len(header):
+		word = _u32.unpack_from(header, offset)[0]
+		words.append(word)
+		offset += 4
+		if not word & (1 << BIT_EXT):
+			break
+	return tuple(words)
+
+
+@functools.lru_cache(maxsize=None)
+def layout(words):
+	"""{field name: offset} of the default namespace fields for the given present words, and the end offset
+
+	Fields after an unknown present bit cannot be located and are left out.
+	"""
+	offset = 4 + 4 * len(words)
+	offsets = {}
+	for bit in range(BIT_RADIOTAP_NS):
+		if not words or not words[0] & (1 << bit):
+			continue
+		if bit not in fields:
+			break
+		name, align, size = fields[bit]
+		offset = (offset + align - 1) & ~(align - 1)
+		offsets[name] = offset
+		offset += size
+	return offsets, offset
+
+
+def _column(block, offset, size, dtype):
+	"""Little endian field at offset of every row of a 2D uint8 array"""
+	return numpy.ascontiguousarray(block[:, offset:offset + size]).view('<' + dtype).reshape(-1)
+
+
+def _decodeblock(block, offsets):
+	"""{column: values} for the rows of block, all sharing the field offsets"""
+	rows = len(block)
+	out = {name: numpy.full(rows, value, dtypes[name]) for name, value in absent.items()}
+	if 'flags' in offsets:
+		out['flags'] = block[:, offsets['flags']]
+	if 'antsignal' in offsets:
+		out['antsignal'] = block[:, offsets['antsignal']].view(numpy.int8)
+	if 'channel' in offsets:
+		out['freq'] = _column(block, offsets['channel'], 2, 'u2')
+	#From the least to the most specific PHY field: a later one overrides
+	if 'rate' in offsets:
+		out['rate'] = block[:, offsets['rate']]
+		out['phy'][:] = numpy.where(out['rate'] != 0, PHY_LEGACY, PHY_NONE)
+	if 'mcs' in offsets:
+		known = block[:, offsets['mcs']]
+		flags = block[:, offsets['mcs'] + 1]
+		index = block[:, offsets['mcs'] + 2]
+		present = (known & MCS_KNOWN_MCS) != 0
+		out['phy'][present] = PHY_HT
+		out['mcs'][present] = index[present]
+		out['nss'][present] = index[present] // 8 + 1
+		bwknown = present & ((known & MCS_KNOWN_BW) != 0)
+		out['bw'][bwknown] = htbandwidths[flags[bwknown] & MCS_FLAG_BW]
+		giknown = present & ((known & MCS_KNOWN_GI) != 0)
+		out['gi'][giknown] = (flags[giknown] & MCS_FLAG_SGI) != 0
+	if 'vht' in offsets:
+		offset = offsets['vht']
+		known = _column(block, offset, 2, 'u2')
+		flags = block[:, offset + 2]
+		bandwidth = block[:, offset + 3]
+		mcsnss = block[:, offset + 4]
+		#User 0 only: a single user PPDU carries its rate there
+		present = (mcsnss & 0x0f) != 0
+		out['phy'][present] = PHY_VHT
+		out['mcs'][present] = mcsnss[present] >> 4
+		out['nss'][present] = mcsnss[present] & 0x0f
+		out['bw'][present] = -1
+		bwknown = present & ((known & VHT_KNOWN_BW) != 0)
+		out['bw'][bwknown] = vhtbandwidths[bandwidth[bwknown] & 0x1f]
+		out['gi'][present] = -1
+		giknown = present & ((known & VHT_KNOWN_GI) != 0)
+		out['gi'][giknown] = (flags[giknown] & VHT_FLAG_SGI) != 0
+	if 'he' in offsets:
+		offset = offsets['he']
+		data1 = _column(block, offset, 2, 'u2')
+		data2 = _column(block, offset + 2, 2, 'u2')
+		data3 = _column(block, offset + 4, 2, 'u2')
+		data5 = _column(block, offset + 8, 2, 'u2')
+		data6 = _column(block, offset + 10, 2, 'u2')
+		present = (data1 & HE_DATA1_MCS_KNOWN) != 0
+		out['phy'][present] = PHY_HE
+		out['mcs'][present] = (data3[present] >> 8) & 0x0f
+		out['nss'][present] = data6[present] & 0x0f
+		out['bw'][present] = -1
+		bwknown = present & ((data1 & HE_DATA1_BW_KNOWN) != 0)
+		out['bw'][bwknown] = hebandwidths[data5[bwknown] & 0x0f]
+		out['gi'][present] = -1
+		giknown = present & ((data2 & HE_DATA2_GI_KNOWN) != 0)
+		out['gi'][giknown] = (data5[giknown] >> 4) & 0x03
+	return out
+
+
+def decode(headers):
+	"""Decode a sequence of RadioTap headers (bytes, b'' for none) in bulk
+
+	Returns numpy arrays, one value per header:
+		rate		Rate field, 500 kbit/s units
+		antsignal	dBm antenna signal
+		freq		channel MHz
+		flags		RadioTap flags
+		phy		PHY_NONE/LEGACY/HT/VHT/HE, from the most specific of Rate/MCS/VHT/HE present
+		mcs		HT MCS index (0..31), VHT/HE MCS (user 0)
+		nss		spatial streams (HE: NSTS)
+		bw		bandwidth MHz
+		gi		HT/VHT: 1 short GI, 0 long; HE: 0 0.8us, 1 1.6us, 2 3.2us
+	Absent fields hold the values in absent.
+	"""
+	n = len(headers)
+	out = {name: numpy.full(n, value, dtypes[name]) for name, value in absent.items()}
+	groups = {}
+	for i, header in enumerate(headers):
+		if len(header) >= 8:
+			groups.setdefault(presentwords(header), []).append(i)
+	for words, rows in groups.items():
+		offsets, end = layout(words)
+		rows = numpy.array(rows)
+		rows = rows[numpy.fromiter((len(headers[i]) >= end for i in rows), bool, len(rows))]
+		if not len(rows) or not offsets:
+			continue
+		block = numpy.frombuffer(b''.join(bytes(headers[i][:end]) for i in rows), numpy.uint8).reshape(len(rows), end)
+		for name, values in _decodeblock(block, offsets).items():
+			out[name][rows] = values
+	return out
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+#
+#	Burst injection of pre-serialized frames over one persistent raw AF_PACKET socket
+#
+#	Frames (RadioTap + 802.11 bytes, as built by dot11catalog/framecache) are written straight to
+#	the monitor interface.  Batches go out with one sendmmsg() call where libc provides it, else
+#	with one send() per frame; either way nothing is kept per sent frame.  mac80211 takes the
+#	RadioTap header on a monitor interface as injection parameters.
+#
+#	Requires
+#		1. Linux, run as root or with CAP_NET_RAW
+#		2. Injection adapter in monitor mode
+#
+#		References
+#		1. https://docs.kernel.org/networking/mac80211-injection.html
+#		2. man 2 sendmmsg, man 7 packet
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import socket
+import time
+
+
+ETH_P_ALL = 0x0003
+SOL_PACKET = 263
+PACKET_QDISC_BYPASS = 20
+batchsizedefault = 64
+sndbufdefault = 4 * 1024 * 1024
+#Back off this long when the driver queue is full (ENOBUFS/EAGAIN)
+queuefullsleep = 0.0005
+
+
+class _iovec(ctypes.Structure):
+	_fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _msghdr(ctypes.Structure):
+	_fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+		('msg_iov', ctypes.POINTER(_iovec)), ('msg_iovlen', ctypes.c_size_t),
+		('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+		('msg_flags', ctypes.c_int)]
+
+
+class _mmsghdr(ctypes.Structure):
+	_fields_ = [('msg_hdr', _msghdr), ('msg_len', ctypes.c_uint)]
+
+
+def _libcsendmmsg():
+	"""libc sendmmsg() via ctypes, or None when it is not available"""
+	try:
+		libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+		sendmmsg = libc.sendmmsg
+	except (OSError, AttributeError, TypeError):
+		return None
+	sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+	sendmmsg.restype = ctypes.c_int
+	return sendmmsg
+
+
+class Batch:
+	"""A fixed list of frames (bytes or bytearray) laid out once as an mmsghdr vector for sendmmsg()"""
+
+	def __init__(self, frames):
+		self.frames = list(frames)
+		self.nbytes = sum(len(frame) for frame in self.frames)
+		count = len(self.frames)
+		self._iov = (_iovec * count)()
+		self._msgs = (_mmsghdr * count)()
+		self._views = []
+		for i, frame in enumerate(self.frames):
+			if isinstance(frame, bytearray):
+				#Tagged frames are patched in place, so point straight at the bytearray's memory
+				view = (ctypes.c_char * len(frame)).from_buffer(frame)
+				self._views.append(view)
+				self._iov[i].iov_base = ctypes.addressof(view)
+			else:
+				self._iov[i].iov_base = ctypes.cast(ctypes.c_char_p(frame), ctypes.c_void_p)
+			self._iov[i].iov_len = len(frame)
+			self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iov[i])
+			self._msgs[i].msg_hdr.msg_iovlen = 1
+
+	def __len__(self):
+		return len(self.frames)
+
+
+class RawInjector:
+	"""Persistent raw packet socket bound to one (monitor mode) interface"""
+
+	def __init__(self, iface, sndbuf=sndbufdefault, qdiscbypass=False, queuefulltimeout=None):
+		self.iface = iface
+		#None: wait for a full driver queue forever, else give up on the frame after this many seconds
+		self.queuefulltimeout = queuefulltimeout
+		self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+		self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+		if qdiscbypass:
+			self.sock.setsockopt(SOL_PACKET, PACKET_QDISC_BYPASS, 1)
+		self.sock.bind((iface, 0))
+		self._sendmmsg = _libcsendmmsg()
+		self.senderrors = 0
+		self.lasterror = None
+
+	def close(self):
+		self.sock.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def fileno(self):
+		return self.sock.fileno()
+
+	def _queuefull(self, since):
+		"""Wait for room in the driver queue; False once it has been full for queuefulltimeout"""
+		if self.queuefulltimeout is not None and time.monotonic() - since > self.queuefulltimeout:
+			self.senderrors += 1
+			self.lasterror = OSError(errno.ENOBUFS, 'Driver queue full for {:g}s'.format(self.queuefulltimeout))
+			return False
+		time.sleep(queuefullsleep)
+		return True
+
+	def send(self, frame):
+		"""Send one frame, retrying while the queue is full; returns True once it was accepted"""
+		since = time.monotonic()
+		while True:
+			try:
+				self.sock.send(frame)
+				return True
+			except OSError as e:
+				if e.errno in (errno.ENOBUFS, errno.EAGAIN):
+					if self._queuefull(since):
+						continue
+					return False
+				self.senderrors += 1
+				self.lasterror = e
+				return False
+
+	def sendbatch(self, batch):
+		"""Send every frame of a Batch; returns (frames, bytes) the kernel accepted"""
+		if self._sendmmsg is None:
+			accepted = [frame for frame in batch.frames if self.send(frame)]
+			return len(accepted), sum(len(frame) for frame in accepted)
+		done = 0
+		accepted = len(batch)
+		acceptedbytes = batch.nbytes
+		fd = self.sock.fileno()
+		base = ctypes.addressof(batch._msgs)
+		since = time.monotonic()
+		while done < len(batch):
+			rc = self._sendmmsg(fd, base + done * ctypes.sizeof(_mmsghdr), len(batch) - done, 0)
+			if rc >= 0:
+				done += rc
+				since = time.monotonic()
+				continue
+			err = ctypes.get_errno()
+			if err == errno.EINTR or (err in (errno.ENOBUFS, errno.EAGAIN) and self._queuefull(since)):
+				continue
+			if err not in (errno.ENOBUFS, errno.EAGAIN):
+				self.senderrors += 1
+				self.lasterror = OSError(err, os.strerror(err))
+			#Frame at the head of the remaining batch was refused: count it and carry on with the rest
+			since = time.monotonic()
+			accepted -= 1
+			acceptedbytes -= len(batch.frames[done])
+			done += 1
+		return accepted, acceptedbytes
+
+	def burst(self, frames, repeat=1, batchsize=batchsizedefault, tagger=None, health=None):
+		"""Inject frames repeat times in batches of batchsize; returns a BurstStats
+
+		With a frametag.FrameTagger, its buffers are sent instead of frames and each batch is
+		stamped in place just before it goes out.  With an adapterhealth.AdapterMonitor, it is
+		checked after every batch and the burst ends early when it says to skip.
+		"""
+		if tagger is not None:
+			frames = tagger.buffers
+		batches = [(i, Batch(frames[i:i + batchsize])) for i in range(0, len(frames), batchsize)]
+		stats = BurstStats()
+		errorsbefore = self.senderrors
+		stats.start = time.perf_counter()
+		for x in range(repeat):
+			for first, batch in batches:
+				if tagger is not None:
+					tagger.tagrange(first, first + len(batch))
+				accepted, acceptedbytes = self.sendbatch(batch)
+				stats.frames += accepted
+				stats.bytes += acceptedbytes
+				if health is not None and not health.check(stats.frames, self.senderrors):
+					stats.skipped = True
+					break
+			if stats.skipped:
+				break
+		stats.end = time.perf_counter()
+		stats.errors = self.senderrors - errorsbefore
+		return stats
+
+
+class BurstStats:
+	"""Achieved throughput of one burst"""
+
+	def __init__(self):
+		self.frames = 0
+		self.bytes = 0
+		self.errors = 0
+		self.skipped = False
+		self.start = 0.0
+		self.end = 0.0
+
+	@property
+	def elapsed(self):
+		return self.end - self.start
+
+	@property
+	def framespersec(self):
+		return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+	@property
+	def bytespersec(self):
+		return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+	def summary(self):
+		"""Dict of the end of run figures"""
+		return {
+			'frames': self.frames,
+			'bytes': self.bytes,
+			'errors': self.errors,
+			'skipped': self.skipped,
+			'elapsed': self.elapsed,
+			'framespersec': self.framespersec,
+			'bytespersec': self.bytespersec,
+		}
+
+	def __str__(self):
+		return '{} frames, {} bytes in {:.3f}s --> {:.1f} frames/s, {:.1f} bytes/s ({:.3f} Mbps), {} send errors{}'.format(
+			self.frames, self.bytes, self.elapsed, self.framespersec, self.bytespersec, self.bytespersec * 8 / 1e6, self.errors,
+			', rest skipped (adapter health)' if self.skipped else '')
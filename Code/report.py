@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+#
+#	Protoype: report.py [options] [dataset dirs / files to import]
+#
+#	Capability report straight from the results store (see resultsdb), instead of building the
+#	tables of Analysis_DS1_DS2_abg.md by hand from pcapfilter.sh output:
+#		pivot		type_subtype x capture adapter frame counts, summed over the selected runs
+#		chart		the same counts in long form (type_subtype, capture, frames): the data of the
+#				stacked bar chart, one stack per frame type, one segment per capture adapter
+#		verdicts	per injector and band: frame types delivered, observed rate, missing types
+#				and a Yes/No verdict (every band injected, nothing missing, requested rate)
+#	Frame types no injector got through in the selection (e.g. 0x16) are left out of the missing
+#	types and listed once, as are the types given with -I; capture adapters given with -X (e.g. the
+#	crashed sys3_wlan4) are left out of the verdicts.
+#
+#	All counts are read with one query into NumPy columns and grouped with bincount on combined
+#	keys, so the report stays interactive as datasets grow to every modulation and band.
+#	Dataset paths given on the command line are imported first (into -d, or a database in memory).
+#
+#		Example:
+#		./report.py DS1/ DS2/ -m abg -X sys3_wlan4 -I 0x16
+#		./report.py -d results.db -m abg -o report/		(pivot.csv, chart.csv, verdicts.csv)
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy
+
+import dot11catalog
+import pcapanalyze
+import resultsdb
+
+
+def load(db, band=None, modulation=None, kernel=None):
+	"""Counts of the selected runs as NumPy columns plus the name tables the codes index
+
+	Returns {'injector', 'capture', 'band', 'ts', 'frames': arrays, 'injectors', 'captures', 'bands': names}
+	"""
+	where = ["r.kind != 'summary'"]
+	args = []
+	for column, value in (('r.band', band), ('r.modulation', modulation), ('r.kernel', kernel)):
+		if value is not None:
+			where.append(column + ' = ?')
+			args.append(value)
+	rows = db.execute('''select i.system || '_' || i.iface, k.system || '_' || k.iface, coalesce(r.band, ''), c.type_subtype, c.frames
+		from counts c join captureruns r on r.id = c.run join adapters i on i.id = r.injector join adapters k on k.id = c.capture
+		where {}'''.format(' and '.join(where)), args).fetchall()
+	columns = list(zip(*rows)) if rows else [(), (), (), (), ()]
+	data = {}
+	for name, values in zip(('injector', 'capture', 'band'), columns[:3]):
+		names, codes = numpy.unique(numpy.array(values, dtype=str), return_inverse=True)
+		data[name + 's'] = [str(value) for value in names]
+		data[name] = codes.astype(numpy.int64)
+	data['ts'] = numpy.array(columns[3], dtype=numpy.int64)
+	data['frames'] = numpy.array(columns[4], dtype=numpy.int64)
+	return data
+
+
+def groupsum(keys, sizes, weights):
+	"""Sum of weights grouped by the combined key columns, as an array of shape sizes"""
+	flat = numpy.ravel_multi_index(keys, sizes) if len(weights) else numpy.zeros(0, numpy.int64)
+	return numpy.bincount(flat, weights=weights, minlength=int(numpy.prod(sizes))).reshape(sizes).astype(numpy.int64)
+
+
+def typesof(data):
+	"""Frame types of the report: the type_subtype values under test plus any other seen"""
+	return sorted(set(pcapanalyze.type_subtype) | set(numpy.unique(data['ts']).tolist()))
+
+
+def pivot(data, types):
+	"""(types x captures) frame counts"""
+	index = numpy.searchsorted(types, data['ts'])
+	return groupsum((index, data['capture']), (len(types), len(data['captures'])), data['frames'])
+
+
+def chart(table, types, captures):
+	"""Stacked bar chart data: [(type_subtype, capture, frames)], one segment per capture adapter per type"""
+	return [('0x{:02x}'.format(ts), capture, int(table[i, j])) for i, ts in enumerate(types) for j, capture in enumerate(captures)]
+
+
+def requestedrate(modulation):
+	"""Legacy rate (Mbps) a modulation asks for, None for HT/VHT/HE"""
+	entry = dot11catalog.radiomodulation.get(modulation, {})
+	return entry.get('Rate') if entry.get('present') == 'Rate' else None
+
+
+def verdicts(db, data, types, excluded=(), modulation=None, ignored=()):
+	"""[{injector, verdict, reason, bands: {band: {'types', 'missing', 'rate', 'notes'}}}] and the types not held against anyone"""
+	notes = {}
+	for injector, band, verdict, rate, text in db.execute('''select a.system || '_' || a.iface, v.band, v.verdict, v.rate, v.notes
+			from verdicts v join adapters a on a.id = v.injector''' + (' where v.modulation = ?' if modulation else ''), (modulation,) if modulation else ()):
+		if band in data['bands']:
+			notes[(injector, band)] = (verdict, rate, text)
+	#Injectors with a summary verdict but no frames captured at all
+	injectors = data['injectors'] + sorted({injector for injector, band in notes} - set(data['injectors']))
+	keep = ~numpy.isin(numpy.array(data['captures'])[data['capture']], list(excluded)) if len(data['capture']) else numpy.zeros(0, bool)
+	index = numpy.searchsorted(types, data['ts'])
+	delivered = groupsum((data['injector'][keep], data['band'][keep], index[keep]), (len(injectors), len(data['bands']), len(types)), data['frames'][keep]) > 0
+	#Frame types nobody got through are not held against any injector
+	counted = ~numpy.isin(types, list(ignored))
+	considered = delivered.any(axis=(0, 1)) & counted
+	requested = requestedrate(modulation) if modulation else None
+	table = []
+	for i, injector in enumerate(injectors):
+		entry = {'injector': injector, 'bands': {}}
+		reasons = []
+		for b, band in enumerate(data['bands']):
+			missing = [types[t] for t in numpy.flatnonzero(considered & ~delivered[i, b])]
+			verdict, rate, text = notes.get((injector, band), (None, None, None))
+			count = int((delivered[i, b] & counted).sum())
+			entry['bands'][band] = {'types': count, 'missing': ['0x{:02x}'.format(ts) for ts in missing], 'rate': rate, 'verdict': verdict, 'notes': text}
+			if count == 0 or verdict in ('none', 'n/a'):
+				reasons.append('No frames injected on ' + band)
+				continue
+			if verdict == 'partial':
+				reasons.append('Only some frames injected on {} ({})'.format(band, (text or '').splitlines()[0] if text else 'partial'))
+			if missing:
+				reasons.append('Cannot inject {} on {}'.format(', '.join('0x{:02x}'.format(ts) for ts in missing[:6]) + (' ...' if len(missing) > 6 else ''), band))
+			if requested is not None and rate is not None and rate != requested:
+				reasons.append('Only {:g}Mbps on {}'.format(rate, band))
+		entry['verdict'] = 'No' if reasons else 'Yes'
+		rates = sorted({band['rate'] for band in entry['bands'].values() if band['rate'] is not None})
+		entry['reason'] = '; '.join(reasons) if reasons else ('Uses ' + '/'.join('{:g}Mbps'.format(rate) for rate in rates) if rates else 'All frame types delivered')
+		table.append(entry)
+	return table, ['0x{:02x}'.format(ts) for ts, seen in zip(types, considered) if not seen]
+
+
+def formatpivot(table, types, captures):
+	widths = [max(6, len(name)) for name in captures]
+	lines = ['Type/Subtype | {:>7s} | '.format('Total') + ''.join('{:>{}s} | '.format(name, width) for name, width in zip(captures, widths))]
+	for ts, row in zip(types, table):
+		lines.append(' [{:>8s}] | {:7d} | '.format('0x{:02x}'.format(ts), int(row.sum())) + ''.join('{:{}d} | '.format(int(n), width) for n, width in zip(row, widths)))
+	return '\n'.join(lines)
+
+
+def formatverdicts(table, undelivered, bands):
+	lines = ['{:15s} {:7s} {:12s} {}'.format('Adapter', 'Verdict', 'Types ' + '/'.join(bands), 'Reason')]
+	for entry in table:
+		types = '/'.join(str(band['types']) for band in entry['bands'].values())
+		lines.append('{:15s} {:7s} {:12s} {}'.format(entry['injector'], entry['verdict'], types, entry['reason']))
+	if undelivered:
+		lines.append('Ignored (not delivered by any injector, or -I): ' + ', '.join(undelivered))
+	return '\n'.join(lines)
+
+
+def writecsv(path, header, rows):
+	with open(path, 'w', newline='') as f:
+		writer = csv.writer(f)
+		writer.writerow(header)
+		writer.writerows(rows)
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Frame type x capture adapter pivot, stacked chart data and injector verdicts from the results store')
+	cliargs.add_argument('paths', nargs='*', help='Dataset directories / files to import first (see resultsdb.py)')
+	cliargs.add_argument('-d', action='store', default=None, dest='db', help='Results database default: in memory when paths are given, else ' + resultsdb.dbdefault)
+	cliargs.add_argument('-b', action='store', default=None, dest='band', help='Only this band (e.g. 5GHz)')
+	cliargs.add_argument('-m', action='store', default=None, dest='modulation', help='Only this modulation (also sets the requested rate checked in the verdicts)')
+	cliargs.add_argument('-k', action='store', default=None, dest='kernel', help='Only runs of this kernel')
+	cliargs.add_argument('-X', action='store', default='', dest='exclude', help='Capture adapters left out of the verdicts, comma separated (e.g. sys3_wlan4)')
+	cliargs.add_argument('-I', action='store', default='', dest='ignore', help='Frame types not held against any injector, comma separated (e.g. 0x16)')
+	cliargs.add_argument('-o', action='store', default=None, dest='output', help='Write pivot.csv, chart.csv and verdicts.csv to this directory')
+	cliargs.add_argument('-j', action='store', default=None, dest='json', help='Write the whole report as JSON to this file')
+	clioptions = cliargs.parse_args()
+
+	started = time.perf_counter()
+	db = resultsdb.connect(clioptions.db or (':memory:' if clioptions.paths else resultsdb.dbdefault))
+	if clioptions.paths:
+		resultsdb.importpaths(db, clioptions.paths, show=lambda line: None)
+	data = load(db, clioptions.band, clioptions.modulation, clioptions.kernel)
+	if not len(data['frames']):
+		sys.exit('No counts in the selection')
+	types = typesof(data)
+	table = pivot(data, types)
+	verdicttable, undelivered = verdicts(db, data, types, [name for name in clioptions.exclude.split(',') if name], clioptions.modulation,
+		[int(ts, 16) for ts in clioptions.ignore.split(',') if ts.strip()])
+	elapsed = time.perf_counter() - started
+
+	print('Frame counts per Type/Subtype and capture adapter ({} injector(s), band(s): {})'.format(len(data['injectors']), ', '.join(data['bands']) or '-'))
+	print(formatpivot(table, types, data['captures']))
+	print()
+	print(formatverdicts(verdicttable, undelivered, data['bands']))
+	print('\nReport in {:.1f} ms'.format(elapsed * 1e3))
+	if clioptions.output:
+		os.makedirs(clioptions.output, exist_ok=True)
+		writecsv(os.path.join(clioptions.output, 'pivot.csv'), ['type_subtype'] + data['captures'],
+			[['0x{:02x}'.format(ts)] + row.tolist() for ts, row in zip(types, table)])
+		writecsv(os.path.join(clioptions.output, 'chart.csv'), ['type_subtype', 'capture', 'frames'], chart(table, types, data['captures']))
+		writecsv(os.path.join(clioptions.output, 'verdicts.csv'), ['injector', 'verdict', 'reason'] + ['{}_{}'.format(band, field) for band in data['bands'] for field in ('types', 'rate', 'missing')],
+			[[entry['injector'], entry['verdict'], entry['reason']] + [value for band in data['bands'] for value in (entry['bands'][band]['types'],
+				entry['bands'][band]['rate'], ' '.join(entry['bands'][band]['missing']))] for entry in verdicttable])
+		print('Written: ' + ', '.join(os.path.join(clioptions.output, name) for name in ('pivot.csv', 'chart.csv', 'verdicts.csv')))
+	if clioptions.json:
+		with open(clioptions.json, 'w') as f:
+			json.dump({'types': ['0x{:02x}'.format(ts) for ts in types], 'captures': data['captures'], 'pivot': table.tolist(),
+				'chart': chart(table, types, data['captures']), 'verdicts': verdicttable, 'undelivered': undelivered}, f, indent=1)
+	db.close()
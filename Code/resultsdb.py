@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+#
+#	Protoype: resultsdb.py [-d results.db] [import paths] [query options]
+#
+#	Indexed results store (SQLite) replacing the free-form DSx_<band>_<mod>.txt and
+#	Results_<band>_<mod>.summary files.  Tables:
+#		adapters	system, interface, driver, adapter (injectors sys1_/sys2_..., capture sys3_...)
+#		runs		one capture of one injector: dataset, band, channel, modulation, kernel, packets,
+#				capture <dataset>/<capture file>, kind text (from the DSx_*.txt output) or pcapng;
+#				a capture imported again replaces its earlier run of the same kind
+#		captureruns	view, one run per capture: the text run where there is one (the whole capture,
+#				with type time spans), else the pcapng run (the DS pcapng files are samples)
+#		counts		run x capture interface x type_subtype: frames, time span of the type
+#		verdicts	per dataset injector verdict from the .summary notes (ok, partial, none, n/a),
+#				observed rate and the notes themselves
+#	Import paths may be dataset directories or files:
+#		DSx_*.txt	pcapfilter.sh output, one section per capture file
+#		*.summary	verdict notes and the interfaces.sh tables of the systems (driver, adapter)
+#		*.pcapng	counted with pcapanalyze (through the analysis cache, see pcapbatch)
+#	Band and modulation come from the file names (DS1_5GHz_abg.txt, Results_24GHz_abg.summary); a
+#	capture takes them from the Results_*.summary next to it, or -b / -m.  The kernel is not in the
+#	old outputs: give it with -k when importing.
+#
+#	Query options select the injectors that got a type_subtype through to the capture side, e.g.
+#	"which adapters inject 0x18 at HT2SS40 on 5 GHz across all kernels":
+#		./resultsdb.py -t 0x18 -m HT2SS40 -b 5GHz
+#
+#		Example:
+#		./resultsdb.py -d results.db DS1/ DS2/			(import)
+#		./resultsdb.py -d results.db -k 6.1.0-rpi7 DS3/		(import a new dataset, kernel noted)
+#		./resultsdb.py -d results.db -t 0x1c -b 24GHz
+#		./resultsdb.py -d results.db -s "select verdict, count(*) from verdicts group by verdict"
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import pcapbatch
+
+
+dbdefault = 'results.db'
+#Capture system of the DS text outputs ("[System3]") and of imported captures
+capturesystem = 'sys3'
+
+schema = '''
+create table if not exists adapters (
+	id integer primary key,
+	system text not null,
+	iface text not null,
+	driver text,
+	adapter text,
+	unique (system, iface)
+);
+create table if not exists runs (
+	id integer primary key,
+	source text not null unique,
+	kind text not null,
+	capture text,
+	dataset text,
+	band text,
+	channel integer,
+	modulation text,
+	kernel text,
+	injector integer references adapters (id),
+	packets integer,
+	imported real
+);
+create table if not exists counts (
+	run integer not null references runs (id) on delete cascade,
+	capture integer not null references adapters (id),
+	type_subtype integer not null,
+	frames integer not null,
+	tstart real,
+	tend real
+);
+create table if not exists verdicts (
+	id integer primary key,
+	source text not null,
+	dataset text,
+	band text,
+	modulation text,
+	injector integer references adapters (id),
+	verdict text,
+	rate real,
+	notes text,
+	unique (source, injector)
+);
+create index if not exists counts_type on counts (type_subtype, frames);
+create index if not exists counts_run on counts (run);
+create index if not exists runs_selection on runs (band, modulation, kernel);
+create index if not exists runs_injector on runs (injector);
+'''
+#After the runs.capture migration in connect()
+views = '''
+create index if not exists runs_capture on runs (capture, kind);
+create view if not exists captureruns as select * from runs r where r.kind = 'text'
+	or (r.kind = 'pcapng' and not exists (select 1 from runs t where t.kind = 'text' and t.capture = r.capture));
+'''
+
+_datasetname = re.compile(r'^(?:DS\d+|Results)_([0-9.]+GHz)_(\w+?)\.(?:txt|summary)$')
+_section = re.compile(r'^(\S+)\.pcapng\s*$')
+_header = re.compile(r'^Type/Subtype\s+Time\s+Total\s+(.*)$')
+_packets = re.compile(r'Total Number of packets:\s*([\d,.]+)(k?)')
+_row = re.compile(r'^\s*\[\s*(0x[0-9a-fA-F]+)\]\s*(?:\|\s*([\d.]+)\s*<>\s*([\d.]+)\s*\|\s*(\d+)\s*\|(.*))?$')
+_systemtable = re.compile(r'^system(\d+) \[(\w+)\]:')
+_interfacerow = re.compile(r'^\s*\d+\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+[YN]\s+(?:(\d+) \(\d+MHz\)\s+\d+MHz\s+)?(?:\d+ MHz\s+)?\d+\s+(.*?)\s*$')
+_rate = re.compile(r'at ([\d.]+)\s*mbps', re.IGNORECASE)
+
+
+def connect(path=dbdefault):
+	"""Open (creating if needed) the results database"""
+	db = sqlite3.connect(path)
+	db.execute('pragma foreign_keys = on')
+	db.executescript(schema)
+	if 'capture' not in [row[1] for row in db.execute('pragma table_info(runs)')]:
+		#Store from before runs.capture: the source of a text / pcapng run was its capture
+		db.execute('alter table runs add column capture text')
+		db.execute("update runs set capture = source where kind != 'summary'")
+		db.commit()
+	db.executescript(views)
+	return db
+
+
+def splitname(name):
+	"""(system, iface) of an injector / capture name: sys1_wlan1 -> (sys1, wlan1)"""
+	system, sep, iface = name.partition('_')
+	return (system, iface) if sep else ('', name)
+
+
+def adapterid(db, system, iface, driver=None, adapter=None):
+	"""Row id of an adapter, adding it or filling in driver / adapter when given"""
+	db.execute('insert or ignore into adapters (system, iface) values (?, ?)', (system, iface))
+	if driver or adapter:
+		db.execute('update adapters set driver = coalesce(?, driver), adapter = coalesce(?, adapter) where system = ? and iface = ?',
+			(driver, adapter, system, iface))
+	return db.execute('select id from adapters where system = ? and iface = ?', (system, iface)).fetchone()[0]
+
+
+def datasetinfo(path):
+	"""(band, modulation) from a DS text / summary file name, or from the summary in a capture's directory"""
+	match = _datasetname.match(os.path.basename(path))
+	if match:
+		return match.group(1), match.group(2)
+	directory = path if os.path.isdir(path) else os.path.dirname(path)
+	for name in sorted(os.listdir(directory or '.')):
+		if name.endswith('.summary'):
+			match = _datasetname.match(name)
+			if match:
+				return match.group(1), match.group(2)
+	return None, None
+
+
+def capturesource(dataset, filename):
+	"""Source key of the run of one capture file"""
+	return dataset + '/' + filename
+
+
+def _newrun(db, source, kind, dataset, band, modulation, kernel, injector, packets, channel=None, capture=None):
+	"""Replace the run imported from source (or the run of the same kind of capture); returns its id"""
+	db.execute('delete from runs where source = ? or (kind = ? and capture = ?)', (source, kind, capture))
+	cursor = db.execute('insert into runs (source, kind, capture, dataset, band, channel, modulation, kernel, injector, packets, imported) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+		(source, kind, capture, dataset, band, channel, modulation, kernel, injector, packets, time.time()))
+	return cursor.lastrowid
+
+
+def _packetcount(text):
+	match = _packets.search(text)
+	if not match:
+		return None
+	return int(float(match.group(1).replace(',', '')) * (1000 if match.group(2) else 1))
+
+
+def importtext(db, path, kernel=None, band=None, modulation=None):
+	"""Import a pcapfilter.sh output file (DSx_<band>_<mod>.txt); returns the number of runs"""
+	fileband, filemodulation = datasetinfo(path)
+	band = band or fileband
+	modulation = modulation or filemodulation
+	dataset = os.path.basename(os.path.dirname(os.path.abspath(path)))
+	channels = _summarychannels(db, dataset, band)
+	runs = 0
+	run = None
+	captures = []
+	rows = []
+	packets = None
+	with open(path, errors='replace') as f:
+		for line in f:
+			match = _section.match(line)
+			if match:
+				run = (match.group(1), capturesource(dataset, line.strip()))
+				source = capturesource(dataset, os.path.basename(path)) + ':' + line.strip()
+				captures = []
+				packets = None
+				continue
+			if run is None:
+				continue
+			if 'Total Number of packets' in line:
+				packets = _packetcount(line)
+				continue
+			match = _header.match(line)
+			if match:
+				system, iface = splitname(run[0])
+				runid = _newrun(db, source, 'text', dataset, band, modulation, kernel, adapterid(db, system, iface), packets, channels.get(band), run[1])
+				captures = [adapterid(db, capturesystem, name) for name in match.group(1).split()]
+				runs += 1
+				continue
+			match = _row.match(line)
+			if match and captures and match.group(4) is not None:
+				values = [int(value) for value in re.findall(r'\d+', match.group(5))]
+				for capture, frames in zip(captures, values):
+					rows.append((runid, capture, int(match.group(1), 16), frames, float(match.group(2)), float(match.group(3))))
+	db.executemany('insert into counts (run, capture, type_subtype, frames, tstart, tend) values (?, ?, ?, ?, ?, ?)', rows)
+	return runs
+
+
+def _summarychannels(db, dataset, band):
+	"""{band: channel} of the capture system recorded for dataset (from its summary), if any"""
+	row = db.execute("select channel from runs where kind = 'summary' and dataset = ? and band is ?", (dataset, band)).fetchone()
+	return {band: row[0]} if row and row[0] is not None else {}
+
+
+def verdict(notes):
+	"""(verdict, observed rate Mbps) from the notes of one injector in a .summary"""
+	text = ' '.join(notes).lower()
+	match = _rate.search(text)
+	rate = float(match.group(1)) if match else None
+	if text.startswith('n/a'):
+		return 'n/a', rate
+	if 'no injection' in text:
+		return 'none', rate
+	if 'some' in text or 'crash' in text:
+		return 'partial', rate
+	return 'ok', rate
+
+
+def importsummary(db, path):
+	"""Import a Results_<band>_<mod>.summary: injector verdicts and the systems' interface tables; returns the number of verdicts"""
+	band, modulation = datasetinfo(path)
+	dataset = os.path.basename(os.path.dirname(os.path.abspath(path)))
+	source = capturesource(dataset, os.path.basename(path))
+	with open(path, errors='replace') as f:
+		lines = f.read().splitlines()
+	sections = []
+	system = None
+	channel = None
+	for i, line in enumerate(lines):
+		if line.startswith('-----') and i + 1 < len(lines):
+			sections.append([lines[i + 1].strip(), []])
+			continue
+		match = _systemtable.match(line)
+		if match:
+			system = ('sys' + match.group(1), match.group(2))
+			sections.append(None)
+			continue
+		if sections and sections[-1] is not None and line.startswith('\t') and line.strip():
+			sections[-1][1].append(line.strip())
+		elif system is not None:
+			match = _interfacerow.match(line)
+			if match:
+				iface, phy, driver, mode, ifchannel, adapter = match.groups()
+				adapterid(db, system[0], iface, driver, adapter)
+				if system[1] == 'capture' and mode == 'monitor' and ifchannel:
+					channel = int(ifchannel)
+	db.execute('delete from verdicts where source = ?', (source,))
+	count = 0
+	for section in sections:
+		if section is None or not section[0] or not section[1]:
+			continue
+		name, notes = section
+		result, rate = verdict(notes)
+		db.execute('insert into verdicts (source, dataset, band, modulation, injector, verdict, rate, notes) values (?, ?, ?, ?, ?, ?, ?, ?)',
+			(source, dataset, band, modulation, adapterid(db, *splitname(name)), result, rate, '\n'.join(notes)))
+		count += 1
+	#Capture channel of the dataset, picked up by the text / capture imports that follow
+	_newrun(db, source, 'summary', dataset, band, modulation, None, None, None, channel)
+	db.execute("update runs set channel = ? where dataset = ? and band is ? and kind != 'summary' and channel is null", (channel, dataset, band))
+	return count
+
+
+def importcaptures(db, files, kernel=None, band=None, modulation=None, show=print):
+	"""Count pcapng captures with pcapanalyze (cached) and import them, one run per file; returns the number of runs"""
+	rows = []
+	results, cached = pcapbatch.analyzeall(files)
+	for path, result in zip(files, results):
+		fileband, filemodulation = datasetinfo(path)
+		dataset = os.path.basename(os.path.dirname(os.path.abspath(path)))
+		system, iface = splitname(pcapbatch.injectorname(path))
+		capture = capturesource(dataset, os.path.basename(path))
+		text = db.execute("select packets from runs where kind = 'text' and capture = ?", (capture,)).fetchone()
+		if text and text[0] is not None and text[0] != result['packets']:
+			show('{}: {} packets, the text output counted {}; queries keep using the text run'.format(path, result['packets'], text[0]))
+		runid = _newrun(db, capture, 'pcapng', dataset, band or fileband, modulation or filemodulation, kernel,
+			adapterid(db, system, iface), result['packets'], _summarychannels(db, dataset, band or fileband).get(band or fileband), capture)
+		for name, perinterface in result['counts'].items():
+			capture = adapterid(db, capturesystem, name)
+			rows += [(runid, capture, ts, frames) for ts, frames in perinterface.items()]
+	db.executemany('insert into counts (run, capture, type_subtype, frames) values (?, ?, ?, ?)', rows)
+	return len(files)
+
+
+def importpaths(db, paths, kernel=None, band=None, modulation=None, show=print):
+	"""Import dataset directories / files; summaries first so their channels reach the counts"""
+	files = []
+	for path in paths:
+		if os.path.isdir(path):
+			files += sorted(os.path.join(path, name) for name in os.listdir(path))
+		else:
+			files.append(path)
+	with db:
+		for path in files:
+			if path.endswith('.summary'):
+				show('{}: {} verdicts'.format(path, importsummary(db, path)))
+		for path in files:
+			if path.endswith('.txt') and _datasetname.match(os.path.basename(path)):
+				show('{}: {} runs'.format(path, importtext(db, path, kernel, band, modulation)))
+		captures = [path for path in files if path.endswith('.pcapng')]
+		if captures:
+			show('{} capture(s): {} runs'.format(len(captures), importcaptures(db, captures, kernel, band, modulation, show)))
+
+
+def injectorsfor(db, type_subtype=None, modulation=None, band=None, kernel=None, injector=None, capture=None):
+	"""[(injector, band, modulation, kernel, capture interfaces, frames)] of the runs where frames got through"""
+	where = ['c.frames > 0']
+	args = []
+	for column, value in (('c.type_subtype', type_subtype), ('r.modulation', modulation), ('r.band', band), ('r.kernel', kernel)):
+		if value is not None:
+			where.append(column + ' = ?')
+			args.append(value)
+	if injector is not None:
+		where.append("i.system || '_' || i.iface = ?")
+		args.append(injector)
+	if capture is not None:
+		where.append('k.iface = ?')
+		args.append(capture)
+	sql = '''select i.system || '_' || i.iface, r.band, r.modulation, coalesce(r.kernel, ''), group_concat(distinct k.iface), sum(c.frames)
+		from counts c join captureruns r on r.id = c.run join adapters i on i.id = r.injector join adapters k on k.id = c.capture
+		where {} group by r.injector, r.band, r.modulation, r.kernel order by i.system, i.iface, r.band'''.format(' and '.join(where))
+	return db.execute(sql, args).fetchall()
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='SQLite store of injection/capture results: import DS text outputs, summaries and captures, query them')
+	cliargs.add_argument('paths', nargs='*', help='Dataset directories and/or DSx_*.txt, *.summary, *.pcapng files to import')
+	cliargs.add_argument('-d', action='store', default=dbdefault, dest='db', help='Results database default: ' + dbdefault)
+	cliargs.add_argument('-k', action='store', default=None, dest='kernel', help='Import: kernel of the runs; query: only this kernel')
+	cliargs.add_argument('-b', action='store', default=None, dest='band', help='Import: band when not in the file names; query: only this band (e.g. 5GHz, 24GHz)')
+	cliargs.add_argument('-m', action='store', default=None, dest='modulation', help='Import: modulation when not in the file names; query: only this modulation')
+	cliargs.add_argument('-t', action='store', default=None, dest='typesubtype', help='Query: injectors getting this type_subtype (e.g. 0x18) through')
+	cliargs.add_argument('-x', action='store', default=None, dest='injector', help='Query: only this injector (e.g. sys1_wlan1)')
+	cliargs.add_argument('-C', action='store', default=None, dest='capture', help='Query: only frames seen by this capture interface')
+	cliargs.add_argument('-s', action='store', default=None, dest='sql', help='Run this SQL statement and print the rows')
+	clioptions = cliargs.parse_args()
+
+	db = connect(clioptions.db)
+	if clioptions.paths:
+		started = time.perf_counter()
+		importpaths(db, clioptions.paths, clioptions.kernel, clioptions.band, clioptions.modulation)
+		print('Imported in {:.3f}s'.format(time.perf_counter() - started))
+	started = time.perf_counter()
+	if clioptions.sql:
+		cursor = db.execute(clioptions.sql)
+		if cursor.description:
+			print('\t'.join(column[0] for column in cursor.description))
+		for row in cursor:
+			print('\t'.join('' if value is None else str(value) for value in row))
+		db.commit()
+	elif clioptions.typesubtype or not clioptions.paths:
+		rows = injectorsfor(db, int(clioptions.typesubtype, 16) if clioptions.typesubtype else None, clioptions.modulation, clioptions.band,
+			clioptions.kernel, clioptions.injector, clioptions.capture)
+		print('{:14s} {:6s} {:12s} {:16s} {:>8s}  {}'.format('Injector', 'Band', 'Modulation', 'Kernel', 'Frames', 'Seen by'))
+		for name, band, modulation, kernel, captures, frames in rows:
+			print('{:14s} {:6s} {:12s} {:16s} {:8d}  {}'.format(name, band or '', modulation or '', kernel, frames, captures))
+	else:
+		sys.exit(0)
+	print('Query: {:.1f} ms'.format((time.perf_counter() - started) * 1e3))
+	db.close()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+#
+#	Protoype: sudo saturation.py -i <injection interface> -I <capture interfaces> [options]
+#
+#	Receiver saturation ramp: at what frame rate does each capture adapter start dropping?
+#	Replaces "seen or not" over fixed 5x repetitions with a capacity measurement.  The injection
+#	interface sends the frame set paced at a rate that grows step by step (geometric, from -r by
+#	-g per step, up to -M or the airtime model's 100% ceiling); every capture interface on the same
+#	system is read in a background thread, and the frame tag sequence numbers (see frametag) of the
+#	run are collected per capture interface.  After each step (plus a settle time for late frames)
+#	the delivery ratio of the step's sequence range is computed per capture interface.
+#
+#	The knee of an adapter is the highest step rate still delivered within the drop threshold; the
+#	first step past it is reported with it.  The ramp stops when every capture interface is past
+#	the threshold, when the injector cannot keep up with the requested rate, or at the last step.
+#
+#	Frames default to beacon, data and QoS data (received by every adapter in DS1/DS2), so missing
+#	frame types do not count as drops.
+#
+#		Example:
+#		sudo ./saturation.py -i wlan1 -I 'mon0,wlan2,wlan3,wlan4' -m abg -j sys3_saturation.json
+#		sudo ./saturation.py -i wlan1 -I wlan2 -m VHT92SS -r 500 -g 1.25 -t 2 -T 1
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+import select
+import sys
+import threading
+import time
+
+import airtime
+import dot11catalog
+import framecache
+import frametag
+import livecapture
+import multiinject
+import pacing
+import pcapanalyze
+import rawinject
+
+
+frametypesdefault = '0x08,0x20,0x28'
+startdefault = 100.0
+growthdefault = 1.5
+steptimedefault = 3.0
+thresholddefault = 5.0
+settledefault = 0.5
+#Step ends the ramp when the injector achieved less than this share of the requested rate
+injectorlimit = 0.9
+
+
+class TagCollector:
+	"""Tag sequence numbers of one run received per capture interface"""
+
+	def __init__(self, runid, ifaces):
+		self.runid = runid
+		self.ifaces = list(ifaces)
+		#received[iface][seq] is 1 once seq was captured on iface
+		self.received = {iface: bytearray() for iface in self.ifaces}
+		self.packets = {iface: 0 for iface in self.ifaces}
+
+	def feed(self, iface, linktype, packet):
+		self.packets[iface] += 1
+		offset = pcapanalyze.dot11offset(linktype, packet)
+		tagoffset = frametag.findtag(packet)
+		if offset < 0 or tagoffset <= offset:
+			return
+		tag = frametag.parsetag(packet, tagoffset)
+		if tag is None or tag[1] != self.runid:
+			return
+		seq = tag[2]
+		seen = self.received[iface]
+		if seq >= len(seen):
+			seen.extend(bytes(seq - len(seen) + 4096))
+		seen[seq] = 1
+
+	def delivered(self, iface, first, end):
+		"""Distinct sequence numbers first..end-1 captured on iface"""
+		return self.received[iface][first:end].count(1)
+
+
+class Receiver:
+	"""Background thread feeding a TagCollector from {iface: (socket, linktype)}"""
+
+	def __init__(self, sockets, collector):
+		self.sockets = sockets
+		self.collector = collector
+		self.stopping = threading.Event()
+		self.thread = threading.Thread(target=self._loop, name='saturation', daemon=True)
+
+	def start(self):
+		self.thread.start()
+
+	def stop(self):
+		self.stopping.set()
+		self.thread.join()
+
+	def _loop(self):
+		poller = select.epoll()
+		byfd = {}
+		for iface, (sock, ltype) in self.sockets.items():
+			poller.register(sock.fileno(), select.EPOLLIN)
+			byfd[sock.fileno()] = (iface, sock, ltype)
+		try:
+			while not self.stopping.is_set():
+				for fd, events in poller.poll(0.1):
+					iface, sock, ltype = byfd[fd]
+					while True:
+						try:
+							data, address = sock.recvfrom(livecapture.snaplen)
+						except OSError:
+							break
+						if address[2] != livecapture.PACKET_OUTGOING:
+							self.collector.feed(iface, ltype, data)
+		finally:
+			poller.close()
+
+
+def steprates(start, stop, growth):
+	"""Geometric ramp start, start * growth, ... up to stop (included)"""
+	if not (start > 0 and growth > 1 and stop >= start):
+		raise ValueError('Ramp needs start > 0, growth > 1 and stop >= start, got {}, {}, {}'.format(start, growth, stop))
+	rates = []
+	rate = start
+	while rate < stop * (1 + 1e-9):
+		rates.append(rate)
+		rate *= growth
+	if not rates or rates[-1] < stop:
+		rates.append(stop)
+	return rates
+
+
+def ramp(injector, frames, collector, rates, steptime=steptimedefault, threshold=thresholddefault, settle=settledefault, show=print):
+	"""Run the ramp; returns {'steps', 'knees', 'reason'}
+
+	frames are the raw frames to cycle, injector a rawinject.RawInjector.  threshold is the drop
+	ratio in % past which a capture interface is saturated.
+	"""
+	tagger = frametag.FrameTagger(frames, collector.runid)
+	steps = []
+	knees = {}
+	reason = 'last step'
+	for rate in rates:
+		first = tagger.seq
+		repeat = max(1, round(rate * steptime / len(frames)))
+		stats = pacing.run(frames, injector.send, pacing.schedule('fixed', rate), rate, repeat=repeat, tagger=tagger)
+		time.sleep(settle)
+		step = {'rate': rate, 'achieved': stats.achievedrate, 'sent': stats.frames, 'errors': stats.errors, 'delivery': {}}
+		for iface in collector.ifaces:
+			delivered = collector.delivered(iface, first, tagger.seq)
+			ratio = delivered / stats.frames if stats.frames else 0.0
+			step['delivery'][iface] = {'delivered': delivered, 'ratio': ratio}
+			if iface not in knees and ratio < 1 - threshold / 100.0:
+				good = [earlier['rate'] for earlier in steps if earlier['delivery'][iface]['ratio'] >= 1 - threshold / 100.0]
+				knees[iface] = {'knee': good[-1] if good else None, 'firstdrop': rate, 'ratio': ratio}
+		steps.append(step)
+		show(formatstep(step, collector.ifaces))
+		if all(iface in knees for iface in collector.ifaces):
+			reason = 'all capture interfaces past the drop threshold'
+			break
+		if stats.achievedrate < injectorlimit * rate:
+			reason = 'injector limit, {:.1f} of {:.1f} frames/s'.format(stats.achievedrate, rate)
+			break
+	for iface in collector.ifaces:
+		if iface not in knees:
+			#Never saturated: the knee is above the last rate tried
+			knees[iface] = {'knee': steps[-1]['rate'] if steps else None, 'firstdrop': None, 'ratio': steps[-1]['delivery'][iface]['ratio'] if steps else 0.0}
+	return {'steps': steps, 'knees': knees, 'reason': reason}
+
+
+def formatheader(ifaces):
+	return '{:>10s} {:>10s} {:>8s}'.format('Rate', 'Achieved', 'Sent') + ''.join(' {:>10s}'.format(iface) for iface in ifaces)
+
+
+def formatstep(step, ifaces):
+	return '{:10.1f} {:10.1f} {:8d}'.format(step['rate'], step['achieved'], step['sent']) + ''.join(
+		' {:9.1f}%'.format(step['delivery'][iface]['ratio'] * 100) for iface in ifaces)
+
+
+def formatknees(result):
+	lines = ['Stopped: ' + result['reason'], '{:10s} {:>12s} {:>12s}'.format('Capture', 'Knee fr/s', 'First drop')]
+	for iface, knee in result['knees'].items():
+		lines.append('{:10s} {:>12s} {:>12s}{}'.format(iface, '-' if knee['knee'] is None else '{:.1f}'.format(knee['knee']),
+			'-' if knee['firstdrop'] is None else '{:.1f}'.format(knee['firstdrop']),
+			'  (drops at the lowest rate)' if knee['knee'] is None else '  (not saturated)' if knee['firstdrop'] is None else ''))
+	return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Ramp the injection rate and find the rate at which each capture adapter starts dropping')
+	cliargs.add_argument('-i', action='store', required=True, dest='iface', help='Injection interface (monitor mode)')
+	cliargs.add_argument('-I', action='store', required=True, dest='captures', help='Capture interfaces: comma separated names and/or globs')
+	cliargs.add_argument('-m', action='store', default='abg', dest='modulation', help='Modulation default: abg')
+	cliargs.add_argument('-f', action='store', default=frametypesdefault, dest='frametypes', help='Frame types (type_subtype list, see CaptureTestV0.2.py -f) default: ' + frametypesdefault)
+	cliargs.add_argument('-r', action='store', type=float, default=startdefault, dest='start', help='First step rate frames/s default: {:g}'.format(startdefault))
+	cliargs.add_argument('-g', action='store', type=float, default=growthdefault, dest='growth', help='Rate growth per step default: {:g}'.format(growthdefault))
+	cliargs.add_argument('-M', action='store', type=float, default=None, dest='maxrate', help='Last step rate frames/s default: 100%% airtime (see airtime.py)')
+	cliargs.add_argument('-t', action='store', type=float, default=steptimedefault, dest='steptime', help='Seconds per step default: {:g}'.format(steptimedefault))
+	cliargs.add_argument('-T', action='store', type=float, default=thresholddefault, dest='threshold', help='Drop threshold in %% default: {:g}'.format(thresholddefault))
+	cliargs.add_argument('-s', action='store', type=float, default=settledefault, dest='settle', help='Wait for late frames after each step, seconds default: {:g}'.format(settledefault))
+	cliargs.add_argument('-c', action='store', default=framecache.cachedirdefault, dest='cachedir', help='Frame cache directory default: ' + framecache.cachedirdefault)
+	cliargs.add_argument('-j', action='store', default=None, dest='json', help='Write steps and knees as JSON to this file')
+	clioptions = cliargs.parse_args()
+	if not clioptions.start > 0:
+		cliargs.error('-r must be above 0 frames/s')
+	if not clioptions.growth > 1:
+		cliargs.error('-g must be above 1')
+	if clioptions.maxrate is not None and not clioptions.maxrate >= clioptions.start:
+		cliargs.error('-M must be at least -r')
+
+	if clioptions.modulation not in dot11catalog.radiomodulation:
+		sys.exit('Unknown modulation: ' + clioptions.modulation)
+	frametypes = {(int(ts, 16) >> 4, int(ts, 16) & 0xf) for ts in clioptions.frametypes.split(',') if ts.strip()}
+	frames, rebuilt = framecache.loadframes(clioptions.iface, [clioptions.modulation], cachedir=clioptions.cachedir)
+	frames = [entry for entry in frames if entry[1] in frametypes]
+	if not frames:
+		sys.exit('No frames of types ' + clioptions.frametypes)
+	durations = airtime.durations(frames)
+	maxrate = airtime.rate(sum(durations) / len(durations), 100.0) if clioptions.maxrate is None else clioptions.maxrate
+	if maxrate < clioptions.start:
+		sys.exit('-r {:g} is above the {:.1f} frames/s airtime ceiling, set -M'.format(clioptions.start, maxrate))
+
+	sockets = {}
+	for iface in multiinject.expandifaces(clioptions.captures):
+		ltype = livecapture.linktype(iface)
+		if ltype is None:
+			print('Skipping {}: not an 802.11 monitor interface'.format(iface))
+			continue
+		try:
+			sockets[iface] = (livecapture.opensocket(iface), ltype)
+		except OSError as e:
+			print('Skipping {}: {}'.format(iface, e))
+	if not sockets:
+		sys.exit('No capture interface')
+
+	collector = TagCollector(frametag.newrunid(), sockets)
+	receiver = Receiver(sockets, collector)
+	rates = steprates(clioptions.start, maxrate, clioptions.growth)
+	print('Run id 0x{:08x}: {} frames of {} on {}, {} steps {:.1f} .. {:.1f} frames/s, {:g}s each'.format(collector.runid, len(frames),
+		clioptions.modulation, clioptions.iface, len(rates), rates[0], rates[-1], clioptions.steptime))
+	print(formatheader(collector.ifaces))
+	receiver.start()
+	try:
+		with rawinject.RawInjector(clioptions.iface) as injector:
+			result = ramp(injector, [frame for modSelected, key, frame in frames], collector, rates, clioptions.steptime, clioptions.threshold, clioptions.settle)
+	finally:
+		receiver.stop()
+		for sock, ltype in sockets.values():
+			sock.close()
+	print(formatknees(result))
+	if clioptions.json:
+		result.update(runid=collector.runid, injector=clioptions.iface, modulation=clioptions.modulation, frametypes=clioptions.frametypes, threshold=clioptions.threshold)
+		with open(clioptions.json, 'w') as f:
+			json.dump(result, f, indent=1)
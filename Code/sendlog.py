@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+#
+#	Injector side record of every frame sent in a run
+#
+#	Written by CaptureTestV0.2.py -l <file> after the run from the FrameTagger logs, read by
+#	correlate.py to join against captured frames on (run id, injection interface, sequence number).
+#	Stored as columns so neither side loops over frames to write or read it.
+#
+#	File layout (little endian):
+#		magic, run id u32, interface count u16, then per interface
+#			name length u8, name
+#			catalog frame count u32, then per frame: modulation index u8, type_subtype u8
+#			sent count u32, then sent count x frame index u16, then sent count x Tx time i64 (ns)
+#		The sequence number of a sent frame is its position in the sent columns.
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import array
+import os
+import struct
+import sys
+
+import dot11catalog
+
+
+logmagic = b'PCSL0001'
+_header = struct.Struct('<IH')
+_count = struct.Struct('<I')
+
+
+def _littleendian(values):
+	if sys.byteorder != 'little':
+		values = array.array(values.typecode, values)
+		values.byteswap()
+	return values.tobytes()
+
+
+def framecolumns(frames):
+	"""(modulation index, type_subtype) bytes for a frame list of (modulation, (type, subtype), bytes)"""
+	table = bytearray()
+	for modSelected, (frametype, subtype), frame in frames:
+		table += struct.pack('BB', dot11catalog.modulationindex(modSelected), (frametype << 4) | subtype)
+	return bytes(table)
+
+
+def write(path, runid, interfaces):
+	"""Write the log of a run; interfaces is {name: (frame list, FrameTagger with log enabled)}"""
+	blob = bytearray(logmagic)
+	blob += _header.pack(runid, len(interfaces))
+	for name, (frames, tagger) in interfaces.items():
+		encoded = name.encode('utf-8')
+		blob += struct.pack('B', len(encoded)) + encoded
+		blob += _count.pack(len(frames)) + framecolumns(frames)
+		blob += _count.pack(len(tagger.sent)) + _littleendian(tagger.sent) + _littleendian(tagger.txtimes)
+	tmppath = '{}.{}.tmp'.format(path, os.getpid())
+	with open(tmppath, 'wb') as f:
+		f.write(blob)
+	os.replace(tmppath, path)
+
+
+def read(path):
+	"""{'runid', 'interfaces': {name: {'modindex', 'type_subtype', 'sent', 'txtime'}}} with array columns
+
+	modindex/type_subtype are per catalog frame, sent (frame index) / txtime per sequence number.
+	"""
+	with open(path, 'rb') as f:
+		blob = f.read()
+	if not blob.startswith(logmagic):
+		raise ValueError('{}: not a send log'.format(path))
+	offset = len(logmagic)
+	runid, count = _header.unpack_from(blob, offset)
+	offset += _header.size
+	interfaces = {}
+	for _ in range(count):
+		length = blob[offset]
+		name = blob[offset + 1:offset + 1 + length].decode('utf-8')
+		offset += 1 + length
+		nframes = _count.unpack_from(blob, offset)[0]
+		offset += _count.size
+		table = blob[offset:offset + 2 * nframes]
+		offset += 2 * nframes
+		nsent = _count.unpack_from(blob, offset)[0]
+		offset += _count.size
+		sent = array.array('H', blob[offset:offset + 2 * nsent])
+		offset += 2 * nsent
+		txtime = array.array('q', blob[offset:offset + 8 * nsent])
+		offset += 8 * nsent
+		if sys.byteorder != 'little':
+			sent.byteswap()
+			txtime.byteswap()
+		interfaces[name] = {'modindex': array.array('B', table[0::2]), 'type_subtype': array.array('B', table[1::2]),
+			'sent': sent, 'txtime': txtime}
+	return {'runid': runid, 'interfaces': interfaces}
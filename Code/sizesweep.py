@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+#
+#	Protoype: sudo sizesweep.py -i <interfaces> [options]
+#
+#	Frame-size sweep: injector throughput curves with real payload sizes.  The catalog frames are
+#	tiny (SSID + vendor IE + tag, about 80 bytes), so the data-type frames (dot11_data_2_0,
+#	dot11_qosdata_2_8, ...) are padded with a payload of each size of the sweep, up to the
+#	interface MTU (at most the 2304 byte 802.11 MSDU), and burst injected repeat times per size
+#	and modulation over one raw socket (see rawinject).  Payloads are slices of one preallocated
+#	buffer; the padded frame set of a size is laid out once and reused for every repeat.
+#
+#	Interfaces are swept one after the other so each gets the CPU to itself.  Output is one row per
+#	interface / modulation / payload size: achieved frames/s and Mbps (802.11 bytes) next to the
+#	airtime model's ceiling (100% airtime, see airtime), i.e. the per-adapter throughput ceiling.
+#	Each interface is watched by adapterhealth; a skipped adapter ends its sweep (-N: off).
+#
+#		Example:
+#		sudo ./sizesweep.py -i 'wlan1,wlan2' -m 'abg,HT2SS40,VHT92SS' -j sys1_sweep.json
+#		sudo ./sizesweep.py -i wlan1 -s 0:1500:100 -x 500
+#
+#	THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+
+
+import argparse
+import json
+import os
+import struct
+import sys
+
+import adapterhealth
+import airtime
+import dot11catalog
+import framecache
+import frametag
+import multiinject
+import rawinject
+
+
+sizesdefault = '0,64,128,256,512,1024,1500,2304'
+repeatdefault = 200
+#Largest 802.11 MSDU
+maxmsdu = 2304
+mtudefault = 1500
+datatype = 2
+
+
+def interfacemtu(iface, netdir=multiinject.netdir):
+	"""Largest payload for iface: its MTU, at most the 802.11 MSDU"""
+	try:
+		with open(os.path.join(netdir, iface, 'mtu')) as f:
+			mtu = int(f.read())
+	except (OSError, ValueError):
+		mtu = mtudefault
+	return min(mtu, maxmsdu)
+
+
+def parsesizes(spec):
+	"""Payload sizes from a comma separated list and/or start:stop:step ranges (stop included)"""
+	sizes = []
+	for part in spec.split(','):
+		part = part.strip()
+		if not part:
+			continue
+		if ':' in part:
+			start, stop, step = (int(value) for value in (part.split(':') + ['100'])[:3])
+			sizes += range(start, stop + 1, step)
+		else:
+			sizes.append(int(part))
+	return sorted(set(sizes))
+
+
+def payloadbuffer(size):
+	"""One preallocated payload, a repeating 0x00..0xff pattern; frames take slices of it"""
+	return memoryview(bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def padded(frames, payload, size):
+	"""(modulation, key, frame) list with size payload bytes appended to every frame"""
+	tail = payload[:size]
+	return [(modSelected, key, frame + tail) for modSelected, key, frame in frames]
+
+
+def _mbps(framespersec, frames):
+	"""Mbps of 802.11 bytes (RadioTap header excluded) at framespersec, mean over frames"""
+	if not frames:
+		return 0.0
+	dot11bytes = sum(len(frame) - struct.unpack_from('<H', frame, 2)[0] for modSelected, key, frame in frames) / len(frames)
+	return framespersec * dot11bytes * 8 / 1e6
+
+
+def sweepinterface(iface, frames, sizes, repeat=repeatdefault, health=True, show=print):
+	"""Sweep one interface; returns [row dict] per modulation and payload size"""
+	payload = payloadbuffer(max(sizes))
+	monitor = adapterhealth.AdapterMonitor(iface) if health else None
+	rows = []
+	try:
+		with rawinject.RawInjector(iface, queuefulltimeout=adapterhealth.queuefulltimeout if health else None) as injector:
+			for modSelected in dict.fromkeys(modSelected for modSelected, key, frame in frames):
+				modframes = [entry for entry in frames if entry[0] == modSelected]
+				for size in sizes:
+					sizeframes = padded(modframes, payload, size)
+					tagger = frametag.FrameTagger([frame for m, key, frame in sizeframes])
+					stats = injector.burst(tagger.buffers, repeat=repeat, tagger=tagger, health=monitor)
+					durations = airtime.durations(sizeframes)
+					ceiling = airtime.rate(sum(durations) / len(durations), 100.0)
+					row = {'iface': iface, 'modulation': modSelected, 'size': size, 'frames': stats.frames, 'errors': stats.errors,
+						'elapsed': stats.elapsed, 'framespersec': stats.framespersec, 'mbps': _mbps(stats.framespersec, sizeframes),
+						'airtimerate': ceiling, 'airtimembps': _mbps(ceiling, sizeframes), 'skipped': stats.skipped}
+					rows.append(row)
+					show(formatrow(row))
+					if stats.skipped:
+						return rows
+	finally:
+		if monitor is not None:
+			monitor.close()
+	return rows
+
+
+def formatheader():
+	return '{:10s} {:12s} {:>6s} {:>8s} {:>11s} {:>9s} {:>11s} {:>9s} {:>6s}'.format('Iface', 'Modulation', 'Size', 'Frames', 'Frames/s', 'Mbps', 'Ceiling/s', 'Mbps', 'Errors')
+
+
+def formatrow(row):
+	return '{:10s} {:12s} {:6d} {:8d} {:11.1f} {:9.2f} {:11.1f} {:9.2f} {:6d}{}'.format(row['iface'], row['modulation'], row['size'], row['frames'],
+		row['framespersec'], row['mbps'], row['airtimerate'], row['airtimembps'], row['errors'], '  skipped (adapter health)' if row['skipped'] else '')
+
+
+if __name__ == '__main__':
+	cliargs = argparse.ArgumentParser(description='Sweep the payload size of the injected data frames and report frames/s and Mbps per interface and modulation')
+	cliargs.add_argument('-i', action='store', required=True, dest='iface', help='Injection interfaces: comma separated names and/or globs, swept one after the other')
+	cliargs.add_argument('-m', action='store', default='ALL', dest='modulations', help='Comma separated modulations default: ALL')
+	cliargs.add_argument('-s', action='store', default=sizesdefault, dest='sizes', help='Payload sizes: list and/or start:stop:step default: ' + sizesdefault)
+	cliargs.add_argument('-x', action='store', type=int, default=repeatdefault, dest='repeat', help='Data frame set repeats per size default: {}'.format(repeatdefault))
+	cliargs.add_argument('-c', action='store', default=framecache.cachedirdefault, dest='cachedir', help='Frame cache directory default: ' + framecache.cachedirdefault)
+	cliargs.add_argument('-N', action='store_true', default=False, dest='nohealth', help='No adapter health feedback')
+	cliargs.add_argument('-j', action='store', default=None, dest='json', help='Write the rows as JSON to this file')
+	clioptions = cliargs.parse_args()
+
+	modulations = list(dot11catalog.radiomodulation) if clioptions.modulations == 'ALL' else clioptions.modulations.split(',')
+	unknown = [modSelected for modSelected in modulations if modSelected not in dot11catalog.radiomodulation]
+	if unknown:
+		sys.exit('Unknown modulation(s): ' + ', '.join(unknown))
+	requested = parsesizes(clioptions.sizes)
+	rows = []
+	print(formatheader())
+	for iface in multiinject.expandifaces(clioptions.iface):
+		frames, rebuilt = framecache.loadframes(iface, modulations, cachedir=clioptions.cachedir)
+		frames = [entry for entry in frames if entry[1][0] == datatype]
+		mtu = interfacemtu(iface)
+		sizes = [size for size in requested if size <= mtu]
+		if not sizes:
+			print('{}: no sizes within the {} byte MTU'.format(iface, mtu))
+			continue
+		if len(sizes) < len(requested):
+			print('{}: sizes over the {} byte MTU left out'.format(iface, mtu))
+		try:
+			rows += sweepinterface(iface, frames, sizes, clioptions.repeat, not clioptions.nohealth)
+		except OSError as e:
+			print('{}: sweep failed: {}'.format(iface, e))
+	if clioptions.json:
+		with open(clioptions.json, 'w') as f:
+			json.dump(rows, f, indent=1)